@@ -4,6 +4,7 @@ import streamlit as st
 from session.state import init_session_state
 from session.auth_handler import expose_handlers
 from routing.router import route
+from utils.read_cache import begin_run
 
 
 def main():
@@ -13,6 +14,9 @@ def main():
         layout="wide"
     )
 
+    # Fresh request-scoped read cache for this rerun
+    begin_run()
+
     init_session_state()
     expose_handlers()
 
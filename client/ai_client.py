@@ -5,33 +5,66 @@ Just raw model responses.
 """
 
 import os
+import httpx
 import streamlit as st
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator
 from openai import OpenAI
 
+from utils.config import (
+    LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE_CONNECTIONS, LLM_KEEPALIVE_EXPIRY,
+    LLM_CONNECT_TIMEOUT, LLM_REQUEST_TIMEOUT, LLM_MAX_RETRIES
+)
 
-class SimpleAIClient:
-    """A minimal, no-frills OpenAI chat client."""
 
-    def __init__(self):
-        # Load API key
-        try:
-            api_key = st.secrets["openai"]["api_key"]
-        except:
-            api_key = os.getenv("OPENAI_API_KEY")
+@st.cache_resource(show_spinner=False)
+def get_shared_openai() -> OpenAI:
+    """
+    Build the OpenAI client once per server process.
+    Every session shares its connection pool, so keep-alive connections
+    (and their TLS handshakes) are reused across students.
+    """
+    # Load API key
+    try:
+        api_key = st.secrets["openai"]["api_key"]
+    except:
+        api_key = os.getenv("OPENAI_API_KEY")
+
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not configured")
+
+    timeout = httpx.Timeout(LLM_REQUEST_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        ),
+        timeout=timeout,
+    )
+
+    return OpenAI(
+        api_key=api_key,
+        http_client=http_client,
+        timeout=timeout,
+        max_retries=LLM_MAX_RETRIES,
+    )
 
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not configured")
 
-        self.client = OpenAI(api_key=api_key)
+class SimpleAIClient:
+    """
+    A minimal, no-frills OpenAI chat client.
+    Instances are lightweight handles onto the shared process-wide client,
+    so it is cheap to keep one in each session's state.
+    """
+
+    def __init__(self, client: Optional[OpenAI] = None):
+        self.client = client or get_shared_openai()
         self.model = "gpt-4o-mini"  # or whatever you prefer
 
-    def generate_response(self, system_prompt: str, user_message: str,
-                          conversation_history: Optional[List[Dict]] = None,
-                          temperature: float = 0.7) -> str:
-        """
-        Generate a response with custom system prompt and conversation history.
-        """
+    @staticmethod
+    def _build_messages(system_prompt: str, user_message: str,
+                        conversation_history: Optional[List[Dict]] = None) -> List[Dict]:
+        """Assemble the chat payload: system prompt, history, then the new user turn."""
         messages = []
 
         # Add system prompt
@@ -44,6 +77,16 @@ class SimpleAIClient:
         # Add the new user message
         messages.append({"role": "user", "content": user_message})
 
+        return messages
+
+    def generate_response(self, system_prompt: str, user_message: str,
+                          conversation_history: Optional[List[Dict]] = None,
+                          temperature: float = 0.7) -> str:
+        """
+        Generate a response with custom system prompt and conversation history.
+        """
+        messages = self._build_messages(system_prompt, user_message, conversation_history)
+
         try:
             #print(f"DEBUG: Sending {len(messages)} messages to API")
             #print(f"DEBUG: User message: {user_message}")
@@ -62,4 +105,35 @@ class SimpleAIClient:
             print(f"ERROR in generate_response: {type(e).__name__}: {e}")
             import traceback
             traceback.print_exc()
-            raise  # Re-raise so the handler catches it
\ No newline at end of file
+            raise  # Re-raise so the handler catches it
+
+    def stream_response(self, system_prompt: str, user_message: str,
+                        conversation_history: Optional[List[Dict]] = None,
+                        temperature: float = 0.7) -> Iterator[str]:
+        """
+        Same request as generate_response, but yields text chunks as the
+        model produces them. Callers join the chunks to get the final reply.
+        """
+        messages = self._build_messages(system_prompt, user_message, conversation_history)
+
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=500,
+                stream=True
+            )
+
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+
+        except Exception as e:
+            print(f"ERROR in stream_response: {type(e).__name__}: {e}")
+            import traceback
+            traceback.print_exc()
+            raise  # Re-raise so the handler catches it
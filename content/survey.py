@@ -80,13 +80,15 @@ SURVEY_QUESTIONS = {
 
 
 
-def render_survey(topic_name: str, condition: int) -> Dict:
+def render_survey(topic_name: str, condition: int, saved: Dict = None) -> Dict:
     """
     Render the survey and return responses.
+    Call inside an st.form so answering doesn't rerun the page per click.
     
     Args:
         topic_name: Name of the topic (for substitution in questions)
         condition: 1 (character), 2 (non-character), or 3 (control)
+        saved: Earlier (possibly partial) responses to prefill
     
     Returns:
         Dict of responses
@@ -96,18 +98,20 @@ def render_survey(topic_name: str, condition: int) -> Dict:
     st.write("This will help us improve the learning experience!")
     st.write("---")
     
+    saved = saved or {}
     responses = {}
     
     # Render standard questions
     for key, q_data in SURVEY_QUESTIONS.items():
         q_text = q_data['text'].format(topic=topic_name)
+        previous = saved.get(key)
         
-        if q_data['type'] == 'likert_5':
+        if q_data['type'] in ('likert_5', 'yes_no'):
             response = st.radio(
                 q_text,
                 options=q_data['options'],
                 key=f"survey_{key}",
-                index=None
+                index=q_data['options'].index(previous) if previous in q_data['options'] else None
             )
             responses[key] = response
             st.write("")  # Spacing
@@ -115,21 +119,12 @@ def render_survey(topic_name: str, condition: int) -> Dict:
         elif q_data['type'] == 'text':
             response = st.text_area(
                 q_text,
+                value=previous or '',
                 placeholder=q_data.get('placeholder', ''),
                 key=f"survey_{key}"
             )
             responses[key] = response
             st.write("")
-            
-        elif q_data['type'] == 'yes_no':
-            response = st.radio(
-                q_text,
-                options=q_data['options'],
-                key=f"survey_{key}",
-                index=None
-            )
-            responses[key] = response
-            st.write("")
 
     return responses
 
@@ -1,7 +1,6 @@
 # routing/guards.py
 
 import streamlit as st
-from views.admin import is_admin
 
 
 def login_required() -> bool:
@@ -11,5 +10,8 @@ def login_required() -> bool:
 
 def admin_only() -> bool:
     """Return True if the logged-in user is an admin."""
+    # views.admin loads the AI client and tutor flow - only import it when asked
+    from views.admin import is_admin
+
     email = st.session_state.get("email")
     return email is not None and is_admin(email)
\ No newline at end of file
@@ -1,16 +1,29 @@
 # routing/router.py
 
+import importlib
+
 import streamlit as st
 
 from routing.guards import login_required
 
-# Views
-from views.login import render_login_page
-from views.dashboard import render_dashboard, render_character_selection
-from views.learning import render_learning_session
-from views.quiz import render_quiz
-from views.survey import render_survey_page
-from views.complete import render_complete
+# Views, by phase: (module, render function). Each view module - and what
+# it pulls in (OpenAI client, tutor flow, Firebase) - is imported the first
+# time its phase is routed, so the login page doesn't pay for the rest.
+VIEWS = {
+    "login": ("views.login", "render_login_page"),
+    "dashboard": ("views.dashboard", "render_dashboard"),
+    "character_selection": ("views.dashboard", "render_character_selection"),
+    "learning": ("views.learning", "render_learning_session"),
+    "quiz": ("views.quiz", "render_quiz"),
+    "survey": ("views.survey", "render_survey_page"),
+    "complete": ("views.complete", "render_complete"),
+}
+
+
+def get_view(phase: str):
+    """Render function for a phase, importing its module on first use."""
+    module_name, func_name = VIEWS.get(phase, VIEWS["dashboard"])
+    return getattr(importlib.import_module(module_name), func_name)
 
 
 def route():
@@ -22,47 +35,31 @@ def route():
     # DEBUG DASHBOARD (check first, before login)
     # ---------------------------------------------------------
     if st.query_params.get("debug") == "true":
+        from utils.auth import init_firebase
         from utils.firebase_debug import render_debug_dashboard
+        init_firebase()
         return render_debug_dashboard()
     
     # ---------------------------------------------------------
     # DATA EXPORT (for researchers)
     # ---------------------------------------------------------
     if st.query_params.get("export") == "true":
+        from utils.auth import init_firebase
         from utils.data_export import render_admin_export
+        init_firebase()
         return render_admin_export()
     
     # ---------------------------------------------------------
     # LOGIN GATE
     # ---------------------------------------------------------
     if not login_required():
-        return render_login_page()
-
-    # ---------------------------------------------------------
-    # PHASE-BASED ROUTING
-    # ---------------------------------------------------------
-    phase = st.session_state.get("phase", "dashboard")
-
-    if phase == "dashboard":
-        return render_dashboard()
-
-    if phase == "character_selection":
-        return render_character_selection()
-
-    if phase == "learning":
-        return render_learning_session()
-
-    if phase == "quiz":
-        return render_quiz()
-
-    if phase == "survey":
-        return render_survey_page()
-
-    if phase == "complete":
-        return render_complete()
+        return get_view("login")()
 
     # ---------------------------------------------------------
-    # FALLBACK
+    # PHASE-BASED ROUTING (unknown phases fall back to the dashboard)
     # ---------------------------------------------------------
-    return render_dashboard()
+    from utils.auth import init_firebase
+    init_firebase()
 
+    phase = st.session_state.get("phase", "dashboard")
+    return get_view(phase)()
@@ -0,0 +1,139 @@
+"""
+Import-Time Benchmark
+Measures what each entry point costs to import, using `python -X importtime`
+in a fresh interpreter per run. With --history, results are appended to a
+JSONL file and compared with the previous run, so regressions show up over
+time. Also checks that the login path doesn't pull in the OpenAI SDK or
+Firebase.
+
+Usage:
+    python scripts/benchmark_imports.py                  # default targets, 5 runs each
+    python scripts/benchmark_imports.py views.learning --runs 10
+    python scripts/benchmark_imports.py --check          # exit 1 if the login path imports heavy packages
+    python scripts/benchmark_imports.py --history ~/import_times.jsonl   # record + compare
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_TARGETS = ['app', 'views.login', 'views.dashboard', 'views.learning', 'views.quiz']
+
+# Packages the login page shouldn't need
+HEAVY_PACKAGES = ['openai', 'httpx', 'firebase_admin', 'google.cloud', 'requests', 'tutor_flow']
+LOGIN_PATH = ['app', 'views.login']
+
+
+def import_profile(target):
+    """
+    One fresh-interpreter import of `target`.
+    Returns (total_us, direct imports [(cumulative_us, name)], imported names).
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    total, top, names = 0, [], set()
+    for line in result.stderr.splitlines():
+        # "import time:      self [us] |  cumulative | imported package"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        total += int(self_us)
+        names.add(name.strip())
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:  # Imported directly by the target (or its parent package)
+            top.append((int(cumulative_us), name.strip()))
+
+    return total, sorted(top, reverse=True), names
+
+
+def measure(target, runs):
+    totals, profile = [], None
+    for _ in range(runs):
+        total, top, names = import_profile(target)
+        totals.append(total)
+        profile = profile or (top, names)
+
+    top, names = profile
+    heavy = [p for p in HEAVY_PACKAGES if any(n == p or n.startswith(p + '.') for n in names)]
+    return {
+        'median_ms': statistics.median(totals) / 1000,
+        'min_ms': min(totals) / 1000,
+        'modules': len(names),
+        'heavy': heavy,
+        'top': [(us / 1000, name) for us, name in top[:8]],
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def last_record(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('targets', nargs='*', default=DEFAULT_TARGETS, help='modules to import')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per target (median reported)')
+    parser.add_argument('--history', help='JSONL file to append results to (not recorded by default)')
+    parser.add_argument('--check', action='store_true', help='fail if the login path imports heavy packages')
+    args = parser.parse_args()
+
+    previous = last_record(args.history) if args.history else None
+    results = {}
+
+    for target in args.targets:
+        r = results[target] = measure(target, args.runs)
+        before = (previous or {}).get('targets', {}).get(target)
+        delta = f"  ({r['median_ms'] - before['median_ms']:+.0f} ms vs {previous['commit'] or 'last run'})" if before else ""
+
+        print(f"\n{target}: {r['median_ms']:.0f} ms median, {r['min_ms']:.0f} ms min, "
+              f"{r['modules']} modules{delta}")
+        print(f"  heavy packages: {', '.join(r['heavy']) or 'none'}")
+        for ms, name in r['top']:
+            print(f"    {ms:8.1f} ms  {name}")
+
+    if args.history:
+        record = {
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'commit': git_commit(),
+            'python': sys.version.split()[0],
+            'runs': args.runs,
+            'targets': {t: {k: r[k] for k in ('median_ms', 'min_ms', 'modules', 'heavy')}
+                        for t, r in results.items()},
+        }
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+        print(f"\nAppended to {args.history}")
+
+    if args.check:
+        leaks = {t: results[t]['heavy'] for t in LOGIN_PATH if t in results and results[t]['heavy']}
+        if leaks:
+            for target, heavy in leaks.items():
+                print(f"FAIL: import {target} loads {', '.join(heavy)}")
+            sys.exit(1)
+        print("OK: login path imports none of " + ", ".join(HEAVY_PACKAGES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Signal Matcher Benchmark
+Times the compiled ready/needs-help matcher against the old substring scan
+and lists the messages where the two disagree.
+
+Usage:
+    python scripts/benchmark_signals.py                       # built-in sample
+    python scripts/benchmark_signals.py detailed_export.csv   # real student messages
+"""
+import csv
+import gzip
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tutor_flow.signals import match_signals
+
+# Typical student replies, used when no export file is given
+SAMPLE_MESSAGES = [
+    "yes", "ok", "okay!", "yeah that makes sense", "got it, next", "sure",
+    "show me", "can you show me an example?", "what do you mean by index?",
+    "whatever works", "i'm not sure", "not sure what happens here",
+    "how does add() work?", "I think it's like a row of lockers where each has a number",
+    "wait, go back", "huh", "cool, that helps", "i see", "I don't know",
+    "it returns the size of the list", "so it grows when it runs out of room?",
+    "sounds good", "furthermore the list shifts everything over", "alright let's go",
+    "the base case is when n equals 0", "why does it call itself again?",
+    "perfect", "I understand now, continue", "somehow it keeps going", "more please",
+]
+
+
+def legacy_signals_ready(user_message: str) -> bool:
+    """The old check, kept here for comparison: sets rebuilt per call, substring scan."""
+    user_lower = user_message.lower().strip()
+
+    READY_SIGNALS = {
+        "yes", "yeah", "yep", "yup", "sure", "ok", "okay", "ready",
+        "let's go", "go ahead", "next", "continue", "show me",
+        "got it", "makes sense", "i understand", "understood",
+        "i see", "that helps", "clear", "cool", "great", "nice",
+        "sounds good", "alright", "perfect", "awesome"
+    }
+    NEEDS_HELP = {
+        "confused", "confusing", "don't understand", "don't get it",
+        "what do you mean", "can you explain", "help", "unclear",
+        "lost", "wait", "hold on", "go back", "repeat", "again",
+        "not sure", "i don't know", "huh", "what", "why", "how",
+        "more", "example", "another"
+    }
+
+    has_ready = any(signal in user_lower for signal in READY_SIGNALS)
+    has_help = any(signal in user_lower for signal in NEEDS_HELP)
+    return has_ready and not has_help
+
+
+def load_messages(path: str) -> list:
+    """Student messages from a detailed message export (.csv or .csv.gz)."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', newline='', encoding='utf-8') as f:
+        return [row['content'] for row in csv.DictReader(f)
+                if row.get('role') == 'user' and row.get('content')]
+
+
+def main():
+    messages = load_messages(sys.argv[1]) if len(sys.argv) > 1 else SAMPLE_MESSAGES
+    repeat = max(1, 20000 // len(messages))
+
+    legacy = timeit.timeit(lambda: [legacy_signals_ready(m) for m in messages], number=repeat)
+    compiled = timeit.timeit(lambda: [match_signals(m).signals_ready for m in messages], number=repeat)
+    calls = len(messages) * repeat
+
+    print(f"{len(messages)} messages x {repeat} rounds")
+    print(f"  substring scan : {legacy / calls * 1e6:7.2f} us/message")
+    print(f"  compiled regex : {compiled / calls * 1e6:7.2f} us/message")
+
+    changed = [m for m in messages if legacy_signals_ready(m) != match_signals(m).signals_ready]
+    print(f"\n{len(changed)} messages now classified differently:")
+    for m in changed:
+        match = match_signals(m)
+        print(f"  {legacy_signals_ready(m)!s:>5} -> {match.signals_ready!s:<5} {m[:70]!r}"
+              f"  ready={sorted(match.ready)} help={sorted(match.help)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,12 @@ import firebase_admin
 from firebase_admin import credentials, auth, db
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keeps condition_counts in step, so reserve_condition keeps balancing
+# against every provisioned user
+from utils.auth import reserve_condition, move_condition
+
 # Initialize Firebase Admin SDK
 def init_firebase():
     """Initialize Firebase - update path to your service account key"""
@@ -73,6 +79,7 @@ def create_users_from_csv(csv_file, default_password="Cougars2026"):
             print(f"✅ Created user: {email} (UID: {user.uid})")
             
             # Add user to Realtime Database with condition
+            reserve_condition(condition)
             user_ref = db.reference(f'users/{user.uid}')
             user_ref.set({
                 'email': email,
@@ -82,6 +89,10 @@ def create_users_from_csv(csv_file, default_password="Cougars2026"):
                 'sessions': {
                     'arraylist': {'status': 'not_started'},
                     'recursion': {'status': 'not_started'}
+                },
+                'status': {
+                    'arraylist': 'not_started',
+                    'recursion': 'not_started'
                 }
             })
             
@@ -98,6 +109,7 @@ def create_users_from_csv(csv_file, default_password="Cougars2026"):
             try:
                 existing_user = auth.get_user_by_email(email)
                 user_ref = db.reference(f'users/{existing_user.uid}')
+                update_condition_count(user_ref, condition)
                 user_ref.update({
                     'condition': condition,
                     'condition_name': get_condition_name(condition)
@@ -157,6 +169,7 @@ def create_users_from_dataframe(df, default_password="Cougars2026"):
             print(f"✅ Created: {email} → Condition {condition} (UID: {user.uid})")
             
             # Add to database with condition
+            reserve_condition(condition)
             user_ref = db.reference(f'users/{user.uid}')
             user_ref.set({
                 'email': email,
@@ -166,6 +179,10 @@ def create_users_from_dataframe(df, default_password="Cougars2026"):
                 'sessions': {
                     'arraylist': {'status': 'not_started'},
                     'recursion': {'status': 'not_started'}
+                },
+                'status': {
+                    'arraylist': 'not_started',
+                    'recursion': 'not_started'
                 }
             })
             
@@ -181,6 +198,7 @@ def create_users_from_dataframe(df, default_password="Cougars2026"):
             try:
                 existing_user = auth.get_user_by_email(email)
                 user_ref = db.reference(f'users/{existing_user.uid}')
+                update_condition_count(user_ref, condition)
                 user_ref.update({
                     'condition': condition,
                     'condition_name': get_condition_name(condition)
@@ -200,6 +218,15 @@ def create_users_from_dataframe(df, default_password="Cougars2026"):
     return results
 
 
+def update_condition_count(user_ref, condition):
+    """Move an existing user's count to `condition` (or add it if they had none)."""
+    previous = user_ref.child('condition').get()
+    if previous is None:
+        reserve_condition(condition)
+    else:
+        move_condition(previous, condition)
+
+
 def get_condition_name(condition):
     """Get readable condition name"""
     conditions = {
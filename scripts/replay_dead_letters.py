@@ -0,0 +1,36 @@
+"""
+Dead-Letter Replay
+Retries writes the write-behind buffer dead-lettered because the database
+rejected them (security rules, validation). Run it after fixing the rule or
+data that caused the rejection; writes that go through are removed from the
+`write_dead_letters` node and the local fallback file.
+
+Usage:
+    python scripts/replay_dead_letters.py
+    python scripts/replay_dead_letters.py --file logs/write_buffer_dead_letters.jsonl
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.auth import init_firebase
+from utils.config import WRITE_BUFFER_DEAD_LETTER_NODE, WRITE_BUFFER_DEAD_LETTER_PATH
+from utils.write_buffer import replay_dead_letters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--node', default=WRITE_BUFFER_DEAD_LETTER_NODE, help='RTDB node holding dead letters')
+    parser.add_argument('--file', default=WRITE_BUFFER_DEAD_LETTER_PATH, help='local fallback JSONL file')
+    args = parser.parse_args()
+
+    init_firebase()
+    replayed, failed = replay_dead_letters(args.node, args.file)
+    print(f"Replayed {replayed} writes, {failed} still failing")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Transcript Replay
+Replays recorded sessions through TutorFlow offline and reports step
+transitions, divergence from the recorded scaffold_progress, prompt sizes
+and throughput. With --compare, also runs the candidate flow and lists the
+sessions where the two disagree.
+
+Usage:
+    python scripts/replay_transcripts.py snapshot.json
+    python scripts/replay_transcripts.py detailed_export.csv.gz --compare
+    python scripts/replay_transcripts.py snapshot.json --candidate path/to/flow_manager.py
+
+A snapshot is a Firebase JSON export of the database (or just `users`).
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tutor_flow.replay import (
+    load_transcripts, load_flow_class, load_step_guide, prompt_builder_for,
+    replay_all, summarize
+)
+from utils.tokens import tokens_exact
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLISHED_FLOW = os.path.join(ROOT, 'temp_patch', 'flow_improvements', 'flow_manager_POLISHED.py')
+
+
+def print_summary(name, summary):
+    agreement = summary['agreement']
+    print(f"\n== {name} ==")
+    print(f"  sessions            : {summary['sessions']} ({summary['completed_sessions']} reach the end)")
+    print(f"  student turns       : {summary['turns']}")
+    print(f"  step transitions    : {summary['transitions']}")
+    print(f"  agrees with recorded: {agreement:.1%}" if agreement is not None else
+          "  agrees with recorded: n/a (no recorded progress)")
+    print(f"  diverged sessions   : {summary['diverged_sessions']}")
+    print(f"  prompt tokens       : mean {summary['prompt_tokens_mean']:.0f}, max {summary['prompt_tokens_max']}")
+    print(f"  throughput          : {summary['turns_per_second']:,.0f} turns/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help='JSON snapshot or detailed message export (.csv / .csv.gz)')
+    parser.add_argument('--candidate', help='flow_manager.py to compare against the live flow')
+    parser.add_argument('--compare', action='store_true', help=f'compare against {os.path.relpath(POLISHED_FLOW, ROOT)}')
+    parser.add_argument('--candidate-guide', help='step_guide.py to build the candidate prompts with')
+    parser.add_argument('--limit', type=int, help='replay only the first N sessions')
+    parser.add_argument('--show', type=int, default=10, help='diverging sessions to list')
+    parser.add_argument('--json', help='write the full report to this file')
+    args = parser.parse_args()
+
+    transcripts = load_transcripts(args.source)[:args.limit]
+    if not transcripts:
+        parser.error(f"no scaffolded sessions with student messages in {args.source}")
+
+    print(f"Loaded {len(transcripts)} sessions from {args.source}")
+    if not tokens_exact():
+        print("(tiktoken not installed - prompt tokens estimated at 4 chars/token)")
+
+    runs = {'live': replay_all(transcripts, load_flow_class())}
+
+    candidate = args.candidate or (POLISHED_FLOW if args.compare else None)
+    if candidate:
+        builder = prompt_builder_for(load_step_guide(args.candidate_guide)) if args.candidate_guide else None
+        runs['candidate'] = replay_all(transcripts, load_flow_class(candidate), builder)
+
+    report = {name: summarize(results) for name, results in runs.items()}
+    for name, summary in report.items():
+        print_summary(name, summary)
+
+    for name, results in runs.items():
+        diverged = [r for r in results if r.first_divergence is not None]
+        if diverged and args.show:
+            print(f"\n  {name}: first divergence from the recording")
+            for r in diverged[:args.show]:
+                i = r.first_divergence
+                print(f"    {r.user_id[:8]}/{r.session_id} turn {i}: "
+                      f"{'advanced' if r.predicted[i] else 'stayed'}, recording "
+                      f"{'advanced' if r.recorded[i] else 'stayed'}")
+
+    if 'candidate' in runs:
+        differ = [
+            (live, cand) for live, cand in zip(runs['live'], runs['candidate'])
+            if live.predicted != cand.predicted
+        ]
+        print(f"\nLive and candidate flows differ on {len(differ)} of {len(transcripts)} sessions")
+        for live, cand in differ[:args.show]:
+            print(f"  {live.user_id[:8]}/{live.session_id}: live ends at {live.final_step}"
+                  f" after {len(live.transitions)} transitions, candidate at {cand.final_step}"
+                  f" after {len(cand.transitions)}")
+
+    if args.json:
+        report['sessions'] = {
+            name: [
+                {
+                    'user_id': r.user_id, 'session_id': r.session_id, 'turns': r.turns,
+                    'transitions': r.transitions, 'predicted': r.predicted, 'recorded': r.recorded,
+                    'prompt_tokens': r.prompt_tokens, 'final_step': r.final_step,
+                }
+                for r in results
+            ]
+            for name, results in runs.items()
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
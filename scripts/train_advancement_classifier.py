@@ -0,0 +1,159 @@
+"""
+Train the Scaffold Advancement Classifier
+Builds (message, label) examples from stored sessions - messages plus
+scaffold_progress timestamps - trains tutor_flow/classifier.py, and prints
+an accuracy / latency report against the keyword rules.
+
+Usage:
+    python scripts/train_advancement_classifier.py --firebase
+    python scripts/train_advancement_classifier.py --examples labeled.jsonl
+    python scripts/train_advancement_classifier.py --firebase --dump-examples examples.jsonl
+
+Set ADVANCEMENT_POLICY = 'classifier' in utils/config.py to use the model.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import ADVANCEMENT_MODEL_PATH
+from tutor_flow.advancement import KeywordPolicy, ClassifierPolicy
+from tutor_flow.classifier import AdvancementClassifier, LABELS, label_session
+from tutor_flow.signals import match_signals
+
+ADVANCING = ("ready", "substantive")
+
+
+def examples_from_firebase():
+    """(group, text, label) for every student message in scaffolded sessions."""
+    from utils.auth import init_firebase
+    from utils.fetch_engine import iter_user_subtrees
+
+    init_firebase()
+    help_check = lambda text: bool(match_signals(text).help)
+    fields = ('condition', 'sessions/{session}/messages', 'sessions/{session}/scaffold_progress')
+
+    for user_id, user_data in iter_user_subtrees(fields=fields):
+        if user_data.get('condition') not in (1, 2):
+            continue  # Direct chat has no scaffold
+        for session_id, session_data in (user_data.get('sessions') or {}).items():
+            for text, label in label_session(session_data, help_check):
+                yield f"{user_id}/{session_id}", text, label
+
+
+def examples_from_jsonl(path):
+    """Hand-labeled or dumped examples: one {"text", "label"[, "group"]} per line."""
+    with open(path, encoding='utf-8') as f:
+        for i, line in enumerate(f):
+            if line.strip():
+                row = json.loads(line)
+                yield row.get('group', str(i)), row['text'], row['label']
+
+
+def split(examples, holdout):
+    """Hold out whole sessions, so a student's phrasing isn't in both halves."""
+    train, test = [], []
+    for group, text, label in examples:
+        bucket = zlib.crc32(group.encode('utf-8')) % 1000
+        (test if bucket < holdout * 1000 else train).append((text, label))
+    return train, test
+
+
+def evaluate(policy_ready, examples):
+    """Share of messages where the policy's advance / don't-advance call matches what happened."""
+    if not examples:
+        return 0.0
+    hits = sum(policy_ready(text) == (label in ADVANCING) for text, label in examples)
+    return hits / len(examples)
+
+
+def latency_us(fn, texts, rounds=20):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - start) / (rounds * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--firebase', action='store_true', help='derive examples from stored sessions')
+    parser.add_argument('--examples', action='append', default=[], help='JSONL file of labeled examples')
+    parser.add_argument('--dump-examples', help='write the combined examples to this JSONL file')
+    parser.add_argument('--out', default=ADVANCEMENT_MODEL_PATH, help='weight file to write')
+    parser.add_argument('--holdout', type=float, default=0.2, help='share of sessions held out for the report')
+    parser.add_argument('--epochs', type=int, default=15)
+    args = parser.parse_args()
+
+    examples = []
+    if args.firebase:
+        examples.extend(examples_from_firebase())
+    for path in args.examples:
+        examples.extend(examples_from_jsonl(path))
+    if not examples:
+        parser.error("no examples - pass --firebase and/or --examples")
+
+    if args.dump_examples:
+        with open(args.dump_examples, 'w', encoding='utf-8') as f:
+            for group, text, label in examples:
+                f.write(json.dumps({'group': group, 'text': text, 'label': label}) + '\n')
+        print(f"Wrote {len(examples)} examples to {args.dump_examples}")
+
+    train, test = split(examples, args.holdout)
+    print(f"{len(examples)} examples ({len(train)} train / {len(test)} held out)")
+    print("  " + ", ".join(f"{label}: {n}" for label, n in Counter(l for _, _, l in examples).most_common()))
+
+    model = AdvancementClassifier().fit(train, epochs=args.epochs)
+
+    # ---- Report ----
+    classifier, keywords = ClassifierPolicy(model), KeywordPolicy()
+    texts = [text for text, _ in test] or [text for text, _ in train]
+
+    label_hits = Counter()
+    label_totals = Counter()
+    confusion = Counter()
+    for text, label in test:
+        predicted = model.predict(text)
+        label_totals[label] += 1
+        label_hits[label] += predicted == label
+        confusion[(label, predicted)] += 1
+
+    metrics = {
+        'trained_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'n_train': len(train),
+        'n_test': len(test),
+        'label_accuracy': sum(label_hits.values()) / len(test) if test else 0.0,
+        'per_label_recall': {l: label_hits[l] / label_totals[l] for l in LABELS if label_totals[l]},
+        'advance_accuracy': evaluate(classifier.signals_ready, test),
+        'keyword_advance_accuracy': evaluate(keywords.signals_ready, test),
+        'latency_us': latency_us(model.predict, texts),
+        'keyword_latency_us': latency_us(keywords.signals_ready, texts),
+    }
+    model.metrics = metrics
+
+    print("\nHeld-out report")
+    print(f"  label accuracy        : {metrics['label_accuracy']:.1%}")
+    for label, recall in metrics['per_label_recall'].items():
+        print(f"    {label:<12} recall {recall:.1%}  (n={label_totals[label]})")
+    print(f"  advance decision      : classifier {metrics['advance_accuracy']:.1%}"
+          f" | keywords {metrics['keyword_advance_accuracy']:.1%}")
+    print(f"  latency per message   : classifier {metrics['latency_us']:.1f} us"
+          f" | keywords {metrics['keyword_latency_us']:.1f} us")
+
+    print("\n  confusion (rows = actual, cols = predicted)")
+    print("  " + " " * 12 + "".join(f"{l[:11]:>12}" for l in LABELS))
+    for actual in LABELS:
+        print(f"  {actual:<12}" + "".join(f"{confusion[(actual, p)]:>12}" for p in LABELS))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    model.save(args.out)
+    print(f"\nSaved {len(model.weights)} weight rows to {args.out} ({os.path.getsize(args.out) // 1024} KB)")
+
+
+if __name__ == "__main__":
+    main()
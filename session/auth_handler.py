@@ -1,11 +1,15 @@
 # session/auth_handler.py
 
 import streamlit as st
-from utils.auth import firebase_login, set_session, logout_user as legacy_logout
+
+# utils.auth (Firebase Admin SDK, requests) is imported on login/logout,
+# not when the login page renders
 
 
 def login(email: str, password: str):
     """Handle login using Firebase email/password."""
+    from utils.auth import firebase_login, set_session
+
     try:
         user_data = firebase_login(email, password)
         set_session(user_data)
@@ -24,6 +28,8 @@ def login(email: str, password: str):
 
 def logout():
     """Clear session state and redirect to login."""
+    from utils.auth import logout_user as legacy_logout
+
     legacy_logout()
 
     for key in [
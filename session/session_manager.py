@@ -14,11 +14,12 @@ from client.ai_client import SimpleAIClient
 def start_session(session_id: str):
     """Initialize a learning session."""
     from tutor_flow.handlers import generate_initial_message
+    from tutor_flow.opening_pool import get_opening_pool
     
     topic = get_research_topic(session_id)
     condition = st.session_state.condition
 
-    # Initialize AI client
+    # Handle onto the shared, connection-pooled AI client
     st.session_state.ai_client = SimpleAIClient()
     st.session_state.current_session_id = session_id
 
@@ -29,6 +30,12 @@ def start_session(session_id: str):
     # CONDITION 1 & 2 — SCAFFOLDED
     # ---------------------------------------------------------
     if condition in [1, 2]:
+        # Top this topic's opening pools back up (first filled at startup)
+        try:
+            get_opening_pool().warm(topic)
+        except Exception as e:
+            print(f"ERROR warming opening pool: {e}")
+
         st.session_state.flow = TutorFlow(topic.name, "Tutor")
 
         if condition == 1:
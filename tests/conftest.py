@@ -0,0 +1,238 @@
+"""
+Test setup.
+The views and utils run against in-memory stand-ins for Streamlit and the
+Firebase Admin SDK, so tests need neither a Streamlit runtime nor network
+access. `fake_db` holds the database contents and counts reads.
+"""
+
+import copy
+import functools
+import os
+import sys
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+# ---------------------------------------------------------
+# Streamlit
+# ---------------------------------------------------------
+
+class RerunRequested(Exception):
+    """Raised by st.rerun() - a test asserts on it instead of a rerun happening."""
+
+
+class _Block:
+    """Any container / element: usable as a context manager, accepts any call."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: _Block()
+
+
+class SessionState(dict):
+    def __getattr__(self, key):
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key)
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+    def __delattr__(self, key):
+        del self[key]
+
+
+def _cache_resource(func=None, **_):
+    if func is None:
+        return _cache_resource
+    cached = functools.lru_cache(maxsize=None)(func)
+    cached.clear = cached.cache_clear
+    return cached
+
+
+def _fragment(func=None, **_):
+    # Calls run inline, like the first run of a real fragment; tests call
+    # the fragment function again to stand in for a fragment rerun
+    if func is None:
+        return _fragment
+    return func
+
+
+def _columns(spec, **_):
+    return [_Block() for _ in range(spec if isinstance(spec, int) else len(spec))]
+
+
+def _rerun(**_):
+    raise RerunRequested()
+
+
+def _make_streamlit():
+    st = types.ModuleType("streamlit")
+    st.session_state = SessionState()
+    st.secrets = {}
+    st.query_params = {}
+    st.cache_resource = _cache_resource
+    st.cache_data = _cache_resource
+    st.fragment = _fragment
+    st.columns = _columns
+    st.rerun = _rerun
+    st.button = lambda *a, **k: False
+    st.form_submit_button = lambda *a, **k: False
+    st.chat_input = lambda *a, **k: st.pending_chat_input.pop(0) if st.pending_chat_input else None
+    st.pending_chat_input = []  # Messages the next chat_input() calls return
+    st.RerunRequested = RerunRequested
+    st.__getattr__ = lambda name: (lambda *a, **k: _Block())
+
+    components = types.ModuleType("streamlit.components")
+    v1 = types.ModuleType("streamlit.components.v1")
+    v1.html = lambda *a, **k: None
+    components.v1 = v1
+    st.components = components
+    return {"streamlit": st, "streamlit.components": components, "streamlit.components.v1": v1}
+
+
+# ---------------------------------------------------------
+# Firebase Admin SDK
+# ---------------------------------------------------------
+
+class FakeDatabase:
+    """Nested dicts standing in for RTDB; every get() is recorded in `reads`."""
+
+    def __init__(self, data=None):
+        self.data = data or {}
+        self.reads = []
+        self.updates = []
+        self.pushed = 0
+
+    def _node(self, path):
+        value = self.data
+        for part in [p for p in path.split('/') if p]:
+            value = value.get(part) if isinstance(value, dict) else None
+        return value
+
+    def get(self, path):
+        self.reads.append(path)
+        return copy.deepcopy(self._node(path))  # Like the SDK: a fresh value per get()
+
+    def update(self, path, values):
+        self.updates.append((path, dict(values)))
+        for key, value in values.items():
+            parts = [p for p in f"{path}/{key}".split('/') if p]
+            node = self.data
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            node[parts[-1]] = value
+
+
+class _Reference:
+    def __init__(self, database, path):
+        self._database, self.path = database, path.strip('/')
+
+    def get(self, shallow=False):
+        return self._database.get(self.path)
+
+    def update(self, values):
+        self._database.update(self.path, values)
+
+    def set(self, value):
+        self._database.update('', {self.path: value})
+
+    def transaction(self, update):
+        # No contention here, so the update function runs once
+        value = update(copy.deepcopy(self._database._node(self.path)))
+        self.set(value)
+        return value
+
+    def push(self, value):
+        self._database.pushed += 1
+        key = f"-push{self._database.pushed:04d}"
+        self.child(key).set(value)
+        return self.child(key)
+
+    def delete(self):
+        parts = [p for p in self.path.split('/') if p]
+        parent = self._database._node('/'.join(parts[:-1]))
+        if isinstance(parent, dict):
+            parent.pop(parts[-1], None)
+
+    def child(self, path):
+        return _Reference(self._database, f"{self.path}/{path}")
+
+
+class _DbModule(types.ModuleType):
+    current = FakeDatabase()
+
+    def reference(self, path='/'):
+        return _Reference(self.current, path)
+
+
+def _make_firebase_admin():
+    firebase_admin = types.ModuleType("firebase_admin")
+    firebase_admin._apps = {"[DEFAULT]": object()}  # Initialized, as far as init_firebase can tell
+    firebase_admin.db = _DbModule("firebase_admin.db")
+    firebase_admin.credentials = types.ModuleType("firebase_admin.credentials")
+    firebase_admin.auth = types.ModuleType("firebase_admin.auth")
+    return {
+        "firebase_admin": firebase_admin,
+        "firebase_admin.db": firebase_admin.db,
+        "firebase_admin.credentials": firebase_admin.credentials,
+        "firebase_admin.auth": firebase_admin.auth,
+    }
+
+
+def _make_requests():
+    requests = types.ModuleType("requests")
+    requests.RequestException = type("RequestException", (IOError,), {})
+    requests.Timeout = type("Timeout", (requests.RequestException,), {})
+    requests.Session = type("Session", (), {"mount": lambda self, *a: None})
+    adapters = types.ModuleType("requests.adapters")
+    adapters.HTTPAdapter = lambda **kwargs: None
+    urllib3 = types.ModuleType("urllib3")
+    util = types.ModuleType("urllib3.util")
+    retry = types.ModuleType("urllib3.util.retry")
+    retry.Retry = lambda **kwargs: None
+    return {
+        "requests": requests, "requests.adapters": adapters,
+        "urllib3": urllib3, "urllib3.util": util, "urllib3.util.retry": retry,
+    }
+
+
+# Streamlit and Firebase are always replaced; requests only when missing
+sys.modules.update(_make_streamlit())
+sys.modules.update(_make_firebase_admin())
+try:
+    import requests  # noqa: F401
+    import urllib3  # noqa: F401
+except ImportError:
+    sys.modules.update(_make_requests())
+
+
+# ---------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------
+
+@pytest.fixture
+def st():
+    """The fake streamlit module, with a fresh session_state."""
+    module = sys.modules["streamlit"]
+    module.session_state.clear()
+    module.pending_chat_input.clear()
+    return module
+
+
+@pytest.fixture
+def fake_db():
+    """A fresh in-memory database behind firebase_admin.db.reference."""
+    database = FakeDatabase()
+    sys.modules["firebase_admin.db"].current = database
+    return database
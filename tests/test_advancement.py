@@ -0,0 +1,155 @@
+"""Advancement policies: keyword decisions, the classifier and training labels."""
+
+import pytest
+
+from tutor_flow.advancement import AdvancementPolicy, ClassifierPolicy, KeywordPolicy, load_classifier_policy
+from tutor_flow.classifier import AdvancementClassifier, label_session
+from tutor_flow.flow_manager import TutorFlow
+from tutor_flow.steps import ScaffoldStep
+
+# should_advance_step before policies existed, for each step in order and
+# step_message_count 0, 1, 2 within it: "1" advances
+PRE_POLICY_DECISIONS = {
+    "ok": "000011011011011001001",
+    "yes let's go": "111011011011011001001",
+    "I'm confused": "111000000000000000000",
+    "it doubles the array and copies each element over": "111000000001001000011",
+    "got it, what next?": "111000000000000000000",
+    "show me": "111011011011011001001",
+    "that helps": "111011011011011001001",
+    "sure but why": "111000000000000000000",
+    "hmm": "000000000000000000000",
+    "it stores items in order and grows when it needs space, makes sense": "111011011011011001011",
+}
+
+
+def decisions(message, policy):
+    out = []
+    for step in ScaffoldStep:
+        for count in (0, 1, 2):
+            flow = TutorFlow("ArrayList", "Tutor", policy=policy)
+            flow.current_step, flow.step_message_count = step, count
+            out.append("1" if flow.should_advance_step(message) else "0")
+    return "".join(out)
+
+
+@pytest.mark.parametrize("message, expected", PRE_POLICY_DECISIONS.items())
+def test_keyword_policy_matches_pre_policy_flow(message, expected):
+    assert decisions(message, KeywordPolicy()) == expected
+
+
+def test_flow_without_policy_uses_keywords():
+    # Flows restored from session state predate the attribute
+    flow = TutorFlow("ArrayList", "Tutor")
+    del flow.policy
+    flow.current_step, flow.step_message_count = ScaffoldStep.STUDENT_METAPHOR, 1
+    assert flow.should_advance_step("makes sense")
+    assert not flow.should_advance_step("makes sense, but why?")
+
+
+def test_incomplete_policy_fails_on_construction():
+    class OnlyReady(AdvancementPolicy):
+        def signals_ready(self, message):
+            return True
+
+    with pytest.raises(TypeError):
+        OnlyReady()
+
+
+# ---------------------------------------------------------
+# Classifier
+# ---------------------------------------------------------
+
+EXAMPLES = [
+    ("ok got it", "ready"), ("yes let's go", "ready"), ("makes sense, next", "ready"), ("sure", "ready"),
+    ("I'm confused, why does it copy?", "needs_help"), ("what do you mean by capacity?", "needs_help"),
+    ("can you explain again", "needs_help"), ("huh?", "needs_help"),
+    ("it doubles the array and copies every element over", "substantive"),
+    ("the base case stops the recursion from going forever", "substantive"),
+    ("each call waits on the stack until the one below returns", "substantive"),
+    ("hmm", "other"), ("lol", "other"), ("brb", "other"),
+]
+
+EXPECTED = {
+    "got it, next": "ready",
+    "why is it copying?": "needs_help",
+    "it copies all the elements into a bigger array": "substantive",
+    "hmm ok": "other",
+}
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    path = str(tmp_path / "advancement_classifier.json")
+    AdvancementClassifier().fit(EXAMPLES, seed=0).save(path)
+    return path
+
+
+def test_training_is_deterministic():
+    a = AdvancementClassifier().fit(EXAMPLES, seed=0)
+    b = AdvancementClassifier().fit(EXAMPLES, seed=0)
+    assert a.weights == b.weights and a.bias == b.bias
+
+
+def test_loaded_model_predicts_fixed_labels(model_path):
+    model = AdvancementClassifier.load(model_path)
+
+    assert {text: model.predict(text) for text in EXPECTED} == EXPECTED
+    # Same answer on every load
+    again = AdvancementClassifier.load(model_path)
+    assert [again.predict_proba(t) for t in EXPECTED] == [model.predict_proba(t) for t in EXPECTED]
+
+
+def test_classifier_policy_decisions(model_path):
+    policy = load_classifier_policy(model_path)
+
+    assert policy.signals_ready("got it, next")
+    assert not policy.gave_substantive_answer("got it, next")
+    assert policy.signals_ready("it copies all the elements into a bigger array")
+    assert policy.gave_substantive_answer("it copies all the elements into a bigger array")
+    assert not policy.signals_ready("why is it copying?")
+
+
+def test_load_rejects_other_bucket_count(tmp_path):
+    path = tmp_path / "model.json"
+    path.write_text('{"n_buckets": 8, "labels": [], "bias": [], "weights": {}}')
+    with pytest.raises(ValueError):
+        AdvancementClassifier.load(str(path))
+
+
+# ---------------------------------------------------------
+# Training labels
+# ---------------------------------------------------------
+
+def test_label_session():
+    session = {
+        "messages": {
+            "-1": {"role": "assistant", "content": "Opening", "timestamp": 1},
+            "-2": {"role": "user", "content": "like a bookshelf", "timestamp": 2},  # Skipped
+            "-3": {"role": "assistant", "content": "Nice", "timestamp": 3},
+            "-4": {"role": "user", "content": "ok next", "timestamp": 4},
+            "-5": {"role": "assistant", "content": "Diagram", "timestamp": 5},
+            "-6": {"role": "user", "content": "why does it copy?", "timestamp": 6},
+            "-7": {"role": "assistant", "content": "Because", "timestamp": 7},
+            "-8": {"role": "user", "content": "i am lost here", "timestamp": 8},
+            "-9": {"role": "assistant", "content": "Let me explain", "timestamp": 9},
+            "-10": {"role": "user", "content": "hmm", "timestamp": 10},
+            "-11": {"role": "assistant", "content": "Code", "timestamp": 11},
+            "-12": {"role": "user", "content": "it copies each element into the new array", "timestamp": 12},
+        },
+        "scaffold_progress": {
+            "-a": {"step": "student_metaphor", "timestamp": 2.5},
+            "-b": {"step": "visual_diagram", "timestamp": 4.5},
+            "-c": {"step": "code_usage", "timestamp": 12.5},
+        },
+    }
+
+    help_check = lambda text: "lost" in text
+
+    assert label_session(session, help_check) == [
+        ("ok next", "ready"),
+        ("why does it copy?", "needs_help"),
+        ("i am lost here", "needs_help"),
+        ("hmm", "other"),
+        ("it copies each element into the new array", "substantive"),
+    ]
@@ -0,0 +1,168 @@
+"""Login: condition assignment and its counters, the sign-in call, the login snapshot."""
+
+import pytest
+
+from utils import auth, read_cache
+
+COUNTS = {"condition_1": 1, "condition_2": 0, "condition_3": 1}
+
+
+@pytest.fixture
+def users_db(st, fake_db):
+    fake_db.data = {
+        "users": {
+            "a": {"email": "a@example.edu", "condition": 1},
+            "b": {"email": "b@example.edu", "condition": 3},
+        },
+        "condition_counts": dict(COUNTS),
+    }
+    return fake_db
+
+
+def counts(db):
+    return db.data["condition_counts"]
+
+
+def test_first_login_assigns_and_counts_once(users_db):
+    record = auth.assign_condition_if_needed("new", "new@example.edu")
+
+    assert record["condition"] == 2
+    assert record["condition_name"] == "non_character_scaffolded"
+    assert users_db.data["users"]["new"]["status"] == {"arraylist": "not_started", "recursion": "not_started"}
+    assert counts(users_db) == {**COUNTS, "condition_2": 1}
+
+    # Second login: already assigned, counters untouched
+    assert auth.assign_condition_if_needed("new", "new@example.edu")["condition"] == 2
+    assert counts(users_db) == {**COUNTS, "condition_2": 1}
+
+
+def test_losing_a_double_login_releases_the_slot(users_db, monkeypatch):
+    reserve = auth._reserve_condition
+
+    def other_tab_wins(condition=None):
+        # This tab reserves; meanwhile the other tab (holding its own
+        # reservation, counted here too) claims the user's condition field
+        reserved = reserve(condition)
+        reserve(3)
+        users_db.data["users"]["new"] = {"condition": 3, "condition_name": "direct_chat"}
+        return reserved
+
+    monkeypatch.setattr(auth, "_reserve_condition", other_tab_wins)
+
+    record = auth.assign_condition_if_needed("new", "new@example.edu")
+
+    assert record["condition"] == 3
+    assert counts(users_db) == {**COUNTS, "condition_3": 2}
+
+
+def test_both_tabs_reserving_the_same_condition_count_once(users_db, monkeypatch):
+    reserve = auth._reserve_condition
+
+    def other_tab_wins_same_condition(condition=None):
+        reserved = reserve(condition)
+        reserve(reserved)
+        users_db.data["users"]["new"] = {"condition": reserved}
+        return reserved
+
+    monkeypatch.setattr(auth, "_reserve_condition", other_tab_wins_same_condition)
+
+    auth.assign_condition_if_needed("new", "new@example.edu")
+
+    assert counts(users_db) == {**COUNTS, "condition_2": 1}
+
+
+def test_failed_claim_releases_the_slot(users_db, monkeypatch):
+    from conftest import _Reference
+
+    transaction = _Reference.transaction
+
+    def failing(self, update):
+        if self.path.endswith("/condition"):
+            raise ConnectionError("network unreachable")
+        return transaction(self, update)
+
+    monkeypatch.setattr(_Reference, "transaction", failing)
+
+    assert auth.assign_condition_if_needed("new", "new@example.edu") is None
+    assert counts(users_db) == COUNTS
+    assert "new" not in users_db.data["users"]
+
+
+def test_balanced_condition_seeds_counters_once(users_db, monkeypatch):
+    del users_db.data["condition_counts"]
+    seeded = []
+    count_users = auth._count_conditions_from_users
+    monkeypatch.setattr(auth, "_count_conditions_from_users",
+                        lambda: seeded.append(1) or count_users())
+
+    assert auth.get_balanced_condition() == 2
+    assert auth.get_balanced_condition() == 2
+
+    assert seeded == [1]
+    assert counts(users_db) == COUNTS
+
+
+# ---------------------------------------------------------
+# firebase_login
+# ---------------------------------------------------------
+
+class StubSession:
+    """Stands in for the auth requests.Session: returns `reply` or raises it."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = []
+
+    def post(self, url, json=None, timeout=None):
+        self.calls.append((url, json, timeout))
+        if isinstance(self.reply, Exception):
+            raise self.reply
+        reply = self.reply
+        return type("Response", (), {"json": lambda self: reply})()
+
+
+@pytest.fixture
+def login(users_db, monkeypatch):
+    monkeypatch.setattr(auth, "get_firebase_api_key", lambda: "test-key")
+
+    def use(reply):
+        session = StubSession(reply)
+        monkeypatch.setattr(auth, "get_auth_http_session", lambda: session)
+        return session
+    return use
+
+
+def test_login_timeout_raises_value_error(login):
+    import requests
+
+    session = login(requests.Timeout("read timed out"))
+
+    with pytest.raises(ValueError, match="Could not reach the login service"):
+        auth.firebase_login("new@example.edu", "pw")
+    assert session.calls[0][2] == (auth.AUTH_CONNECT_TIMEOUT, auth.AUTH_READ_TIMEOUT)
+
+
+def test_login_rejection_raises_firebase_message(login):
+    login({"error": {"message": "INVALID_PASSWORD"}})
+
+    with pytest.raises(ValueError, match="INVALID_PASSWORD"):
+        auth.firebase_login("new@example.edu", "pw")
+
+
+def test_login_record_reaches_the_dashboard_without_a_read(st, login, users_db):
+    login({"idToken": "id", "refreshToken": "refresh", "localId": "new", "email": "new@example.edu"})
+
+    data = auth.firebase_login("new@example.edu", "pw")
+    auth.set_session(data)
+
+    assert st.session_state["condition"] == 2
+    assert "user" not in st.session_state
+
+    # The next page run, as the router starts it
+    read_cache.begin_run()
+    try:
+        assert auth.get_user_data("new")["condition"] == 2
+        assert read_cache.get_read_count() == 0  # Served from the login snapshot
+        assert "login_user_snapshot" not in st.session_state
+    finally:
+        read_cache._local.active = False
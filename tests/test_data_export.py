@@ -0,0 +1,23 @@
+"""Detailed CSV export: a failed walk leaves no temp file behind."""
+
+import os
+import tempfile
+
+import pytest
+
+
+def test_failed_export_removes_temp_file(fake_db, monkeypatch):
+    from utils import data_export, database
+
+    def broken_walk():
+        yield "u1", {"sessions": {"arraylist": {"messages": {"-a1": {"role": "user"}}}}}
+        raise ConnectionError("RTDB went away")
+
+    monkeypatch.setattr(database, "iter_users", broken_walk)
+    before = set(os.listdir(tempfile.gettempdir()))
+
+    with pytest.raises(ConnectionError):
+        data_export.generate_detailed_csv_with_messages(compress=True)
+
+    left = set(os.listdir(tempfile.gettempdir())) - before
+    assert not [name for name in left if name.startswith("research_detailed_")]
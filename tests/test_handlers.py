@@ -0,0 +1,68 @@
+"""Streamed replies: one bubble per reply, and the saved text is what it shows."""
+
+import contextlib
+
+import pytest
+
+
+class _Placeholder:
+    def __init__(self):
+        self.shown = None
+
+    def markdown(self, text):
+        self.shown = text
+
+
+class _Client:
+    def __init__(self, chunks, fail_after=None):
+        self.chunks, self.fail_after = chunks, fail_after
+
+    def stream_response(self, **_):
+        for i, chunk in enumerate(self.chunks):
+            if i == self.fail_after:
+                raise ConnectionError("stream dropped")
+            yield chunk
+
+
+@pytest.fixture
+def bubbles(st, monkeypatch):
+    from tutor_flow import handlers
+
+    opened, placeholders = [], []
+
+    def chat_message(role):
+        opened.append(role)
+        return contextlib.nullcontext()
+
+    def empty():
+        placeholders.append(_Placeholder())
+        return placeholders[-1]
+
+    monkeypatch.setattr(handlers, "STREAM_RESPONSES", True)
+    monkeypatch.setattr(st, "chat_message", chat_message, raising=False)
+    monkeypatch.setattr(st, "empty", empty, raising=False)
+    return handlers, opened, placeholders
+
+
+def _reply(st, handlers, client):
+    st.session_state.ai_client = client
+    return handlers._request_reply("system", "hi", [], fallback="Sorry, try again.")
+
+
+def test_stream_failing_partway_keeps_partial_text(st, bubbles):
+    handlers, opened, placeholders = bubbles
+
+    response = _reply(st, handlers, _Client(["An ArrayList ", "grows by ", "copying"], fail_after=2))
+
+    assert opened == ["assistant"]
+    assert response == placeholders[0].shown == "An ArrayList grows by"
+    assert st.session_state.reply_rendered
+
+
+def test_empty_stream_shows_fallback_in_the_same_bubble(st, bubbles):
+    handlers, opened, placeholders = bubbles
+
+    response = _reply(st, handlers, _Client(["ignored"], fail_after=0))
+
+    assert opened == ["assistant"]
+    assert response == placeholders[0].shown == "Sorry, try again."
@@ -0,0 +1,78 @@
+"""Learning view: a chat turn reruns only the chat fragment, a step change reruns the page."""
+
+import time
+
+import pytest
+
+
+@pytest.fixture
+def learning(st, fake_db, monkeypatch):
+    from tutor_flow.flow_manager import TutorFlow
+    from views import learning
+
+    flow = TutorFlow("ArrayList", "Tutor")
+    flow.add_message("assistant", "Welcome! Think of an ArrayList as a row of lockers.")
+    st.session_state.update(
+        current_session_id="arraylist",
+        condition=2,
+        user_id="u1",
+        start_time=time.time(),
+        flow=flow,
+    )
+    return learning
+
+
+def _reply(advance):
+    """Stand-in for handle_user_message_scaffolded: records the turn, optionally advances."""
+    def handle(user_input):
+        import streamlit as st
+
+        flow = st.session_state.flow
+        flow.add_message("user", user_input)
+        if advance:
+            flow.advance_step()
+        flow.add_message("assistant", f"Reply to: {user_input}")
+    return handle
+
+
+def test_chat_turn_reruns_only_the_fragment(st, learning, monkeypatch):
+    learning.render_learning_session()
+    assert learning.get_rerun_stats() == {"app_reruns": 1, "fragment_reruns": 0, "turn_reruns": 1}
+
+    monkeypatch.setattr(learning, "handle_user_message_scaffolded", _reply(advance=False))
+    st.pending_chat_input.append("it grows when it runs out of room")
+
+    # Submitting runs the fragment on its own - no st.rerun() of the page
+    learning._chat_fragment(2)
+
+    assert learning.get_rerun_stats() == {"app_reruns": 1, "fragment_reruns": 1, "turn_reruns": 1}
+    assert [m.role for m in st.session_state.flow.messages] == ["assistant", "user", "assistant"]
+
+
+def test_step_change_reruns_the_page(st, learning, monkeypatch):
+    learning.render_learning_session()
+    step_before = st.session_state.flow.current_step
+
+    monkeypatch.setattr(learning, "handle_user_message_scaffolded", _reply(advance=True))
+    st.pending_chat_input.append("ok, ready")
+
+    with pytest.raises(st.RerunRequested):
+        learning._chat_fragment(2)
+    assert st.session_state.flow.current_step != step_before
+
+    # The page run that follows redraws the progress bar: two runs this turn
+    learning.render_learning_session()
+    assert learning.get_rerun_stats() == {"app_reruns": 2, "fragment_reruns": 1, "turn_reruns": 2}
+
+
+def test_fragment_draws_only_new_messages(st, learning, monkeypatch):
+    learning.render_learning_session()
+    assert st.session_state.chat_rendered_upto == 1
+
+    monkeypatch.setattr(learning, "handle_user_message_scaffolded", _reply(advance=False))
+    st.pending_chat_input.append("first")
+    learning._chat_fragment(2)
+
+    # Messages from the page run stay as drawn; the fragment owns the rest
+    tail = learning._chat_messages(2, st.session_state.chat_rendered_upto)
+    assert [content for _, content in tail] == ["first", "Reply to: first"]
@@ -0,0 +1,120 @@
+"""Request-scoped read cache: read counts per run, ancestor hits, invalidation."""
+
+import pytest
+
+from utils import read_cache
+from utils.read_cache import begin_run, cached_get, get_read_count, invalidate, prime
+
+USER = {
+    "email": "student@example.edu",
+    "condition": 2,
+    "status": {"arraylist": "completed", "recursion": "in_progress"},
+    "sessions": {
+        "arraylist": {"status": "completed", "start_time": 1.0},
+        "recursion": {"status": "in_progress", "start_time": 2.0},
+    },
+}
+
+
+@pytest.fixture
+def user_db(fake_db):
+    fake_db.data = {"users": {"u1": USER}}
+    begin_run()
+    yield fake_db
+    read_cache._local.active = False
+
+
+def test_ancestor_read_serves_descendants(user_db):
+    assert cached_get("users/u1")["condition"] == 2
+    assert cached_get("users/u1/status/arraylist") == "completed"
+    assert cached_get("/users/u1/sessions/recursion/start_time/") == 2.0
+
+    assert get_read_count() == 1
+    assert user_db.reads == ["users/u1"]
+
+
+def test_primed_ancestor_needs_no_read(user_db):
+    prime("users/u1", USER)
+
+    assert cached_get("users/u1/status") == USER["status"]
+    assert cached_get("users/u1/sessions/arraylist/status") == "completed"
+    assert cached_get("users/u1/missing/child") is None
+    assert get_read_count() == 0
+
+
+def test_cached_values_are_copies(user_db):
+    cached_get("users/u1")["condition"] = 99
+    assert cached_get("users/u1/condition") == 2
+
+
+def test_invalidate_drops_descendants_and_ancestors(user_db):
+    cached_get("users/u1/sessions/arraylist")
+    cached_get("users/u1/sessions/recursion")
+    cached_get("users/u1/status")
+    assert get_read_count() == 3
+
+    invalidate("users/u1/sessions")
+
+    # Both sessions are read again, the sibling status node is not
+    cached_get("users/u1/sessions/arraylist")
+    cached_get("users/u1/sessions/recursion")
+    cached_get("users/u1/status")
+    assert get_read_count() == 5
+
+    cached_get("users/u1")
+    invalidate("users/u1/status/arraylist")  # Drops the cached users/u1 above it
+    cached_get("users/u1/condition")
+    assert get_read_count() == 7
+
+
+def test_begin_run_starts_empty(user_db):
+    cached_get("users/u1")
+    begin_run()
+    assert get_read_count() == 0
+    cached_get("users/u1")
+    assert get_read_count() == 1
+
+
+def test_outside_a_run_reads_every_time(fake_db):
+    fake_db.data = {"users": {"u1": USER}}
+    read_cache._local.active = False
+
+    cached_get("users/u1")
+    cached_get("users/u1")
+    assert fake_db.reads == ["users/u1", "users/u1"]
+
+
+# ---------------------------------------------------------
+# Dashboard
+# ---------------------------------------------------------
+
+@pytest.fixture
+def dashboard(st, user_db, monkeypatch):
+    import tutor_flow.opening_pool as opening_pool
+    from views import dashboard
+
+    monkeypatch.setattr(opening_pool, "get_opening_pool", lambda: None)
+    st.session_state.update(user_id="u1", email=USER["email"])
+    return dashboard
+
+
+def test_dashboard_render_reads_user_once(dashboard, user_db):
+    dashboard.render_dashboard()
+
+    # The user record serves the condition, the status index and every card
+    assert get_read_count() == 1
+    assert user_db.reads == ["users/u1"]
+
+
+def test_dashboard_after_login_reuses_login_read(st, dashboard, user_db):
+    st.session_state.login_user_snapshot = ("u1", USER)
+
+    dashboard.render_dashboard()
+
+    assert get_read_count() == 0
+    assert "login_user_snapshot" not in st.session_state
+
+    # One-shot: the next run reads as usual
+    begin_run()
+    dashboard.render_dashboard()
+    assert get_read_count() == 1
@@ -0,0 +1,70 @@
+"""Transcript replay sends the same prompts as the live handlers."""
+
+import os
+import time
+
+import pytest
+
+from tutor_flow import replay
+from tutor_flow.flow_manager import TutorFlow
+
+SNAPSHOT = os.path.join(os.path.dirname(__file__), "fixtures", "replay_snapshot.json")
+
+
+class RecordingClient(replay.ReplayAIClient):
+    """Replays the recorded replies and keeps every request it was sent."""
+
+    requests = []
+
+    def generate_response(self, system_prompt, user_message, conversation_history=None,
+                          temperature=0.7):
+        RecordingClient.requests.append((system_prompt, user_message, conversation_history))
+        return super().generate_response(system_prompt, user_message, conversation_history, temperature)
+
+
+@pytest.fixture
+def transcript():
+    [transcript] = replay.load_transcripts(SNAPSHOT)
+    return transcript
+
+
+@pytest.fixture(autouse=True)
+def clear_requests():
+    RecordingClient.requests = []
+
+
+def test_replay_fixture_transcript(transcript):
+    result = replay.replay_transcript(transcript, replay.load_flow_class())
+
+    assert result.turns == 3
+    assert result.transitions == [(0, "initial_metaphor", "student_metaphor")]
+    assert result.predicted == result.recorded == [True, False, False]
+    assert len(result.prompt_tokens) == 3 and all(n > 0 for n in result.prompt_tokens)
+
+
+def test_replay_prompts_match_live_handlers(st, fake_db, transcript, monkeypatch):
+    from content.research_topics import get_research_topic
+    from tutor_flow import handlers
+
+    monkeypatch.setattr(replay, "ReplayAIClient", RecordingClient)
+    replay.replay_transcript(transcript, replay.load_flow_class())
+    replayed, RecordingClient.requests = RecordingClient.requests, []
+
+    # The same session through the live handler, with the same stub client
+    monkeypatch.setattr(handlers, "save_message", lambda *a, **k: None)
+    monkeypatch.setattr(handlers, "save_scaffold_progress", lambda *a, **k: None)
+    replies = [t.content for t in transcript.turns if t.role == "assistant"]
+    client = RecordingClient(replies)
+    flow = TutorFlow(get_research_topic(transcript.session_id).name, "Tutor")
+    flow.add_message("assistant", client.next_reply())
+    st.session_state.update(
+        flow=flow, ai_client=client, condition=transcript.condition,
+        current_session_id=transcript.session_id, user_id=transcript.user_id,
+        start_time=time.time(),
+    )
+    for turn in transcript.turns:
+        if turn.role == "user":
+            handlers.handle_user_message_scaffolded(turn.content)
+
+    assert len(replayed) == 3
+    assert RecordingClient.requests == replayed
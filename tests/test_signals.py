@@ -0,0 +1,54 @@
+"""Ready / needs-help signals: what the word-boundary matcher does and doesn't count."""
+
+import pytest
+
+from tutor_flow.signals import match_signals
+
+# (message, ready signals, help signals, signals_ready)
+
+# Not ready under the old substring scan, ready now: "how" in "show me",
+# "help" in "that helps", "what" in "whatever" no longer count as help
+NOW_READY = [
+    ("show me", {"show me"}, set(), True),
+    ("cool, that helps", {"cool", "that helps"}, set(), True),
+    ("whatever works, next", {"next"}, set(), True),
+    ("sure, show me", {"sure", "show me"}, set(), True),
+    ("got  it", {"got it"}, set(), True),
+]
+
+# Signals the substring scan found inside other words; none match now
+NO_LONGER_MATCH = [
+    ("yesterday I read about it", set(), set(), False),
+    ("nicely done", set(), set(), False),
+    ("somehow it keeps going", set(), set(), False),
+    ("whatsoever", set(), set(), False),
+    ("showme", set(), set(), False),
+    ("knowhow", set(), set(), False),
+]
+
+# Same decision as before
+UNCHANGED = [
+    ("yes", {"yes"}, set(), True),
+    ("okay!", {"okay"}, set(), True),
+    ("sounds good", {"sounds good"}, set(), True),
+    ("i understand now, continue", {"i understand", "continue"}, set(), True),
+    ("it’s okay, let’s go", {"okay", "let's go"}, set(), True),
+    ("the code is clear", {"clear"}, set(), True),
+    ("not sure", set(), {"not sure"}, False),
+    ("ok, i'm not sure", {"ok"}, {"not sure"}, False),
+    ("unclear", set(), {"unclear"}, False),
+    ("can you show me an example?", {"show me"}, {"example"}, False),
+    ("how does add() work?", set(), {"how"}, False),
+    ("wait, go back", set(), {"wait", "go back"}, False),
+    ("I don't know", set(), {"i don't know"}, False),
+    ("another one please", set(), {"another"}, False),
+    ("it returns the size of the list", set(), set(), False),
+]
+
+
+@pytest.mark.parametrize("message, ready, help_, signals_ready", NOW_READY + NO_LONGER_MATCH + UNCHANGED)
+def test_match_signals(message, ready, help_, signals_ready):
+    match = match_signals(message)
+    assert match.ready == ready
+    assert match.help == help_
+    assert match.signals_ready is signals_ready
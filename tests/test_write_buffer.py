@@ -0,0 +1,151 @@
+"""Write-behind buffer: merging, bounded flushes, outages and rejected writes."""
+
+import json
+
+import pytest
+
+from utils.write_buffer import Increment, WriteBehindBuffer, is_retryable, replay_dead_letters
+
+
+class Rejected(Exception):
+    """Stands in for a FirebaseError the database answered with (rules, validation)."""
+    code = 'PERMISSION_DENIED'
+
+
+@pytest.fixture
+def buffer(fake_db, tmp_path):
+    # The worker only wakes on a full queue or after an hour: tests flush by hand
+    return WriteBehindBuffer(
+        max_batch=100, flush_interval=3600, max_retries=1, retry_backoff=0,
+        dead_letter_path=str(tmp_path / "dead_letters.jsonl"),
+    )
+
+
+def failing(fake_db, error, paths=None):
+    """Make updates under any of `paths` (every update if None) raise `error`."""
+    update = fake_db.update
+
+    def touches(key):
+        key = key.strip("/")
+        return any(key == p or key.startswith(p + "/") for p in paths)
+
+    def broken(path, values):
+        if paths is None or any(touches(f"{path}/{key}") for key in values):
+            raise error
+        update(path, values)
+    fake_db.update = broken
+    return update
+
+
+def test_merge_last_write_wins_and_increments_sum(buffer, fake_db):
+    buffer.enqueue({"users/u1/sessions/s/status": "in_progress", "users/u1/sessions/s/total_messages": Increment()})
+    buffer.enqueue({"users/u1/sessions/s/status": "completed", "users/u1/sessions/s/total_messages": Increment(2)})
+
+    assert buffer.flush()
+    assert fake_db.updates == [("", {
+        "users/u1/sessions/s/status": "completed",
+        "users/u1/sessions/s/total_messages": {".sv": {"increment": 3}},
+    })]
+    assert buffer.pending_count() == 0
+
+
+def test_outage_keeps_writes_queued(buffer, fake_db):
+    update = failing(fake_db, ConnectionError("network unreachable"))
+    buffer.enqueue({"users/u1/sessions/s/messages/-m1": {"content": "hi"}})
+
+    for _ in range(5):
+        assert not buffer.flush()
+
+    assert buffer.pending_count() == 1
+    assert buffer.dead_lettered == 0
+    assert "write_dead_letters" not in fake_db.data
+
+    fake_db.update = update
+    assert buffer.flush()
+    assert fake_db.data["users"]["u1"]["sessions"]["s"]["messages"]["-m1"] == {"content": "hi"}
+
+
+def test_bounded_flush_returns_during_backoff(buffer, fake_db):
+    failing(fake_db, TimeoutError("read timed out"))
+    buffer.enqueue({"users/u1/status/s": "in_progress"})
+
+    assert not buffer.flush(timeout=1)
+    attempts = fake_db.updates[:]
+
+    # Backing off: the page run doesn't wait on the database at all
+    assert not buffer.flush(timeout=1)
+    assert fake_db.updates == attempts
+    assert buffer.pending_count() == 1
+
+
+def test_discard_drops_only_that_subtree(buffer, fake_db):
+    buffer.enqueue({
+        "users/u1/sessions/s/messages/-m1": {"content": "old"},
+        "users/u1/sessions/s2/messages/-m1": {"content": "keep"},
+        "users/u1/sessions/s2/status": "in_progress",
+    })
+
+    assert buffer.discard("users/u1/sessions/s")
+    assert buffer.pending_count() == 2
+
+
+def test_rejected_write_is_dead_lettered_rest_lands(buffer, fake_db):
+    failing(fake_db, Rejected("Permission denied"), paths={"users/u1/locked"})
+    buffer.enqueue({"users/u1/locked": 1, "users/u1/status/s": "completed"})
+
+    assert buffer.flush()
+
+    assert buffer.pending_count() == 0
+    assert buffer.dead_lettered == 1
+    assert fake_db.data["users"]["u1"]["status"] == {"s": "completed"}
+    [record] = fake_db.data["write_dead_letters"].values()
+    assert record["path"] == "users/u1/locked"
+    assert json.loads(record["value"]) == 1
+
+
+def test_bounded_flush_leaves_rejected_batch_to_the_worker(buffer, fake_db):
+    failing(fake_db, Rejected("Permission denied"), paths={"users/u1/locked"})
+    buffer.enqueue({"users/u1/locked": 1, "users/u1/status/s": "completed"})
+
+    assert not buffer.flush(timeout=1)
+    assert buffer.pending_count() == 2
+    assert buffer.dead_lettered == 0
+
+
+def test_replay_dead_letters(buffer, fake_db, tmp_path):
+    update = failing(fake_db, Rejected("Permission denied"), paths={"users/u1/locked"})
+    buffer.enqueue({"users/u1/locked": {"a": 1}})
+    buffer.flush()
+
+    # Rules fixed: the replay lands the write and clears the node
+    fake_db.update = update
+    assert replay_dead_letters(path=str(tmp_path / "dead_letters.jsonl")) == (1, 0)
+    assert fake_db.data["users"]["u1"]["locked"] == {"a": 1}
+    assert fake_db.data["write_dead_letters"] == {}
+
+
+def test_dead_letter_falls_back_to_file(buffer, fake_db, tmp_path):
+    # Neither the write nor the dead-letter record is accepted
+    update = failing(fake_db, Rejected("Permission denied"), paths={"users/u1/locked", "write_dead_letters"})
+    buffer.enqueue({"users/u1/locked": 1})
+    buffer.flush()
+
+    path = tmp_path / "dead_letters.jsonl"
+    assert json.loads(path.read_text())["path"] == "users/u1/locked"
+
+    fake_db.update = update
+    assert replay_dead_letters(path=str(path)) == (1, 0)
+    assert path.read_text() == ""
+
+
+@pytest.mark.parametrize("error, retryable", [
+    (ConnectionError("reset"), True),
+    (TimeoutError("timed out"), True),
+    (Rejected("denied"), False),
+    (ValueError("invalid key"), False),
+    (type("Http", (Exception,), {"http_response": type("R", (), {"status_code": 503})()})(), True),
+    (type("Http", (Exception,), {"http_response": type("R", (), {"status_code": 429})()})(), True),
+    (type("Http", (Exception,), {"http_response": type("R", (), {"status_code": 400})()})(), False),
+])
+def test_is_retryable(error, retryable):
+    assert is_retryable(error) is retryable
@@ -0,0 +1,94 @@
+# tutor_flow/advancement.py
+"""
+Advancement policies for TutorFlow.
+
+should_advance_step() owns the per-step rules (how many tutor messages a
+step needs, which steps accept a substantive answer); a policy only answers
+two questions about the student's message. KeywordPolicy is the original
+phrase matching; ClassifierPolicy asks the offline-trained model.
+"""
+
+from __future__ import annotations
+
+import os
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from utils.config import ADVANCEMENT_POLICY, ADVANCEMENT_MODEL_PATH
+from .classifier import AdvancementClassifier, SUBSTANTIVE_WORDS
+from .signals import match_signals
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class AdvancementPolicy(ABC):
+    """
+    Interface: judge one student message. A subclass missing either
+    method fails when it is instantiated, not in the middle of a session.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def signals_ready(self, message: str) -> bool:
+        """Student says they're ready to move on."""
+
+    @abstractmethod
+    def gave_substantive_answer(self, message: str) -> bool:
+        """Student gave a real answer (not just "yes" or "ok")."""
+
+
+class KeywordPolicy(AdvancementPolicy):
+    """Ready phrases without help phrases; six or more words is substantive."""
+
+    name = "keywords"
+
+    def signals_ready(self, message: str) -> bool:
+        return match_signals(message).signals_ready
+
+    def gave_substantive_answer(self, message: str) -> bool:
+        return len(message.split()) >= SUBSTANTIVE_WORDS
+
+
+class ClassifierPolicy(AdvancementPolicy):
+    """
+    Decisions from AdvancementClassifier. A "substantive" prediction means
+    a longer message that advanced the step, so it also counts as ready.
+    """
+
+    name = "classifier"
+
+    def __init__(self, model: AdvancementClassifier):
+        self.model = model
+        self._last = (None, None)  # Both checks usually see the same message
+
+    def _label(self, message: str) -> str:
+        last_message, last_label = self._last
+        if last_message == message:
+            return last_label
+        label = self.model.predict(message)
+        self._last = (message, label)
+        return label
+
+    def signals_ready(self, message: str) -> bool:
+        return self._label(message) in ("ready", "substantive")
+
+    def gave_substantive_answer(self, message: str) -> bool:
+        return self._label(message) == "substantive"
+
+
+def load_classifier_policy(path: str = ADVANCEMENT_MODEL_PATH) -> ClassifierPolicy:
+    if not os.path.isabs(path):
+        path = os.path.join(_PROJECT_ROOT, path)
+    return ClassifierPolicy(AdvancementClassifier.load(path))
+
+
+@lru_cache(maxsize=1)
+def get_default_policy() -> AdvancementPolicy:
+    """The configured policy, loaded once per process."""
+    if ADVANCEMENT_POLICY == "classifier":
+        try:
+            return load_classifier_policy()
+        except Exception as e:
+            print(f"WARNING: advancement classifier unavailable, using keywords: {e}")
+    return KeywordPolicy()
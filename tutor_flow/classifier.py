@@ -0,0 +1,203 @@
+# tutor_flow/classifier.py
+"""
+Offline-trained advancement classifier.
+
+Multinomial logistic regression over hashed bag-of-words features (word
+unigrams + bigrams and a few shape features). Pure Python, CPU only: a
+prediction is a handful of dict lookups. Weights live in a small JSON file
+produced by scripts/train_advancement_classifier.py.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import random
+import re
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+LABELS = ("ready", "needs_help", "substantive", "other")
+
+N_BUCKETS = 2 ** 14
+SUBSTANTIVE_WORDS = 6  # Same threshold as the keyword rules
+
+_TOKEN = re.compile(r"[a-z0-9']+|\?")
+
+
+def _bucket(feature: str) -> int:
+    # crc32, not hash(): str hashes are salted per process
+    return zlib.crc32(feature.encode("utf-8")) % N_BUCKETS
+
+
+def featurize(message: str) -> List[int]:
+    """Hashed feature buckets for one message (binary, deduplicated)."""
+    tokens = _TOKEN.findall(message.lower().replace("’", "'"))
+    words = [t for t in tokens if t != "?"]
+
+    features = {f"w:{t}" for t in words}
+    features.update(f"b:{a} {b}" for a, b in zip(words, words[1:]))
+    if words:
+        features.add(f"first:{words[0]}")
+    if "?" in tokens:
+        features.add("has_question")
+
+    n = len(words)
+    length = "0" if n == 0 else "1-2" if n <= 2 else "3-5" if n < SUBSTANTIVE_WORDS else "6-15" if n <= 15 else "16+"
+    features.add(f"len:{length}")
+
+    return sorted({_bucket(f) for f in features})
+
+
+def _softmax(scores: Sequence[float]) -> List[float]:
+    top = max(scores)
+    exps = [math.exp(s - top) for s in scores]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+
+class AdvancementClassifier:
+    """Predicts ready / needs_help / substantive / other for a student message."""
+
+    def __init__(self, labels: Sequence[str] = LABELS,
+                 weights: Optional[Dict[int, List[float]]] = None,
+                 bias: Optional[List[float]] = None,
+                 metrics: Optional[Dict] = None):
+        self.labels = tuple(labels)
+        self.weights: Dict[int, List[float]] = weights or {}
+        self.bias: List[float] = bias or [0.0] * len(self.labels)
+        self.metrics: Dict = metrics or {}
+
+    # ------------------------------------------------------------------
+    # Prediction
+    # ------------------------------------------------------------------
+
+    def _scores(self, buckets: Iterable[int]) -> List[float]:
+        scores = list(self.bias)
+        for b in buckets:
+            w = self.weights.get(b)
+            if w is not None:
+                for i, value in enumerate(w):
+                    scores[i] += value
+        return scores
+
+    def predict_proba(self, message: str) -> Dict[str, float]:
+        probs = _softmax(self._scores(featurize(message)))
+        return dict(zip(self.labels, probs))
+
+    def predict(self, message: str) -> str:
+        scores = self._scores(featurize(message))
+        return self.labels[max(range(len(scores)), key=scores.__getitem__)]
+
+    # ------------------------------------------------------------------
+    # Training
+    # ------------------------------------------------------------------
+
+    def fit(self, examples: Sequence[Tuple[str, str]], epochs: int = 15,
+            learning_rate: float = 0.2, l2: float = 1e-5, seed: int = 0) -> "AdvancementClassifier":
+        """Plain SGD on the softmax cross-entropy, one example at a time."""
+        rng = random.Random(seed)
+        k = len(self.labels)
+        index = {label: i for i, label in enumerate(self.labels)}
+        data = [(featurize(text), index[label]) for text, label in examples if label in index]
+
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            lr = learning_rate / (1 + epoch * 0.5)
+            for buckets, target in data:
+                probs = _softmax(self._scores(buckets))
+                grad = [p - (1.0 if i == target else 0.0) for i, p in enumerate(probs)]
+                for i in range(k):
+                    self.bias[i] -= lr * grad[i]
+                for b in buckets:
+                    w = self.weights.setdefault(b, [0.0] * k)
+                    for i in range(k):
+                        w[i] -= lr * (grad[i] + l2 * w[i])
+
+        return self
+
+    # ------------------------------------------------------------------
+    # Weight file
+    # ------------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        payload = {
+            "labels": list(self.labels),
+            "n_buckets": N_BUCKETS,
+            "bias": [round(b, 5) for b in self.bias],
+            "weights": {
+                str(b): [round(v, 5) for v in w]
+                for b, w in self.weights.items()
+                if any(abs(v) >= 1e-5 for v in w)
+            },
+            "metrics": self.metrics,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "AdvancementClassifier":
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("n_buckets") != N_BUCKETS:
+            raise ValueError(f"{path} was trained with {payload.get('n_buckets')} buckets, expected {N_BUCKETS}")
+        return cls(
+            labels=payload["labels"],
+            weights={int(b): w for b, w in payload["weights"].items()},
+            bias=payload["bias"],
+            metrics=payload.get("metrics", {}),
+        )
+
+
+# ----------------------------------------------------------------------
+# Training data from stored sessions
+# ----------------------------------------------------------------------
+
+def _sorted_values(node) -> List[Dict]:
+    if isinstance(node, dict):
+        items = list(node.values())
+    elif isinstance(node, list):
+        items = node
+    else:
+        return []
+    items = [item for item in items if isinstance(item, dict)]
+    return sorted(items, key=lambda item: item.get("timestamp", 0))
+
+
+def label_session(session_data: Dict, help_check=None) -> List[Tuple[str, str]]:
+    """
+    Derive (message, label) pairs from one stored session.
+
+    A student message counts as advancing when a scaffold_progress entry
+    was written after it and before the next message: "substantive" if it
+    had SUBSTANTIVE_WORDS or more words, else "ready". Non-advancing
+    messages are "needs_help" if they ask a question (or `help_check` flags
+    them), else "other". The first student message is skipped: any reply
+    advances past the opening metaphor, so it says nothing about readiness.
+    """
+    messages = _sorted_values(session_data.get("messages"))
+    progress_times = [p.get("timestamp", 0) for p in _sorted_values(session_data.get("scaffold_progress"))]
+
+    examples = []
+    seen_first = False
+    for i, msg in enumerate(messages):
+        text = (msg.get("content") or "").strip()
+        if msg.get("role") != "user" or not text:
+            continue
+        if not seen_first:
+            seen_first = True
+            continue
+
+        start = msg.get("timestamp", 0)
+        end = messages[i + 1].get("timestamp", math.inf) if i + 1 < len(messages) else math.inf
+        advanced = any(start < t <= end for t in progress_times)
+
+        if advanced:
+            label = "substantive" if len(text.split()) >= SUBSTANTIVE_WORDS else "ready"
+        elif "?" in text or (help_check and help_check(text)):
+            label = "needs_help"
+        else:
+            label = "other"
+        examples.append((text, label))
+
+    return examples
@@ -0,0 +1,125 @@
+# tutor_flow/context.py
+"""
+Token-budgeted conversation context.
+
+Instead of "the last N messages", each reply gets as many recent messages
+as fit a per-condition token budget. Older turns are folded into a short
+extractive summary that is updated incrementally: each message is
+summarized once, when it drops out of the window. Prompt size stays
+bounded however long the session runs.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Optional, Sequence
+
+from utils.config import (
+    CONTEXT_TOKEN_BUDGET, CONTEXT_SUMMARY_TOKENS,
+    CONTEXT_MESSAGE_MAX_TOKENS, CONTEXT_INPUT_MAX_TOKENS
+)
+from utils.tokens import count_tokens, truncate_to_tokens
+
+SUMMARY_HEADER = "Summary of earlier conversation in this session:"
+SUMMARY_LINE_WORDS = 25
+
+_CODE_BLOCK = re.compile(r"```.*?(```|$)", re.DOTALL)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def clip_input(text: str) -> str:
+    """The student's current message, clipped to CONTEXT_INPUT_MAX_TOKENS."""
+    return truncate_to_tokens(text, CONTEXT_INPUT_MAX_TOKENS)
+
+
+def summarize_message(role: str, content: str) -> str:
+    """One extractive summary line: the first sentence, code replaced by [code]."""
+    text = _CODE_BLOCK.sub(" [code] ", content)
+    text = " ".join(text.split())
+    first = _SENTENCE_END.split(text, maxsplit=1)[0]
+    words = first.split()
+    if len(words) > SUMMARY_LINE_WORDS:
+        first = " ".join(words[:SUMMARY_LINE_WORDS]) + " …"
+    speaker = "Student" if role == "user" else "Tutor"
+    return f"- {speaker}: {first}"
+
+
+class ConversationContext:
+    """
+    Context state for one session. Messages are append-only, so per-message
+    token counts and the summary are only ever extended, never recomputed.
+    """
+
+    def __init__(self, session_id: str, condition: int):
+        self.session_id = session_id
+        self.condition = condition
+        self.budget = CONTEXT_TOKEN_BUDGET.get(condition, CONTEXT_TOKEN_BUDGET[3])
+        self.summary_lines: List[str] = []
+        self.summary_tokens = 0
+        self.omitted = 0  # Summary lines dropped to stay within CONTEXT_SUMMARY_TOKENS
+        self.summarized_upto = 0  # messages[:summarized_upto] live only in the summary
+        self._clipped: List[str] = []
+        self._tokens: List[int] = []
+
+    def _sync(self, messages: Sequence[Dict]) -> None:
+        if len(messages) < len(self._tokens):
+            # History was reset underneath us - start over
+            self.__init__(self.session_id, self.condition)
+        for m in messages[len(self._tokens):]:
+            clipped = truncate_to_tokens(m["content"], CONTEXT_MESSAGE_MAX_TOKENS)
+            self._clipped.append(clipped)
+            self._tokens.append(count_tokens(clipped) + 4)  # + per-message overhead
+
+    def _fold(self, messages: Sequence[Dict], upto: int) -> None:
+        """Move messages[summarized_upto:upto] into the rolling summary."""
+        for m in messages[self.summarized_upto:upto]:
+            line = summarize_message(m["role"], m["content"])
+            self.summary_lines.append(line)
+            self.summary_tokens += count_tokens(line)
+        self.summarized_upto = max(self.summarized_upto, upto)
+
+        # Keep the most recent lines within the summary budget
+        while self.summary_tokens > CONTEXT_SUMMARY_TOKENS and len(self.summary_lines) > 1:
+            self.summary_tokens -= count_tokens(self.summary_lines.pop(0))
+            self.omitted += 1
+
+    def summary_message(self) -> Optional[Dict]:
+        if not self.summary_lines:
+            return None
+        lines = [SUMMARY_HEADER]
+        if self.omitted:
+            lines.append(f"- ({self.omitted} earlier messages omitted)")
+        lines.extend(self.summary_lines)
+        return {"role": "system", "content": "\n".join(lines)}
+
+    def build(self, messages: Sequence[Dict]) -> List[Dict]:
+        """
+        History to send with the next reply: the rolling summary (if any),
+        then the newest messages that fit the budget. `messages` is the full
+        history so far, oldest first, without the student's current message.
+        """
+        self._sync(messages)
+
+        window_budget = self.budget - CONTEXT_SUMMARY_TOKENS
+        start, used = len(messages), 0
+        while start > self.summarized_upto and used + self._tokens[start - 1] <= window_budget:
+            start -= 1
+            used += self._tokens[start]
+
+        self._fold(messages, start)
+
+        history = [
+            {"role": messages[i]["role"], "content": self._clipped[i]}
+            for i in range(start, len(messages))
+        ]
+        summary = self.summary_message()
+        return [summary] + history if summary else history
+
+
+def get_context(state, session_id: str, condition: int) -> ConversationContext:
+    """The session's context from `state` (st.session_state), created on first use."""
+    context = state.get("conversation_context")
+    if not isinstance(context, ConversationContext) or context.session_id != session_id:
+        context = ConversationContext(session_id, condition)
+        state["conversation_context"] = context
+    return context
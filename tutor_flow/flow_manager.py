@@ -7,8 +7,9 @@ Advancement is based on simple rules, not complex state tracking.
 """
 
 from __future__ import annotations
-from typing import List
+from typing import List, Optional
 from .steps import ScaffoldStep, ConversationMessage, RoleType
+from .advancement import AdvancementPolicy, get_default_policy
 
 
 class TutorFlow:
@@ -17,13 +18,16 @@ class TutorFlow:
     Simple state machine - AI handles the nuance within each step.
     """
 
-    def __init__(self, topic_key: str, character_name: str) -> None:
+    def __init__(self, topic_key: str, character_name: str,
+                 policy: Optional[AdvancementPolicy] = None) -> None:
         self.topic_key: str = topic_key
         self.character_name: str = character_name
         self.current_step: ScaffoldStep = ScaffoldStep.INITIAL_METAPHOR
         self.messages: List[ConversationMessage] = []
         self.step_message_count: int = 0
         self.completed: bool = False
+        # None = the configured default (see tutor_flow/advancement.py)
+        self.policy: Optional[AdvancementPolicy] = policy
 
     def add_message(self, role: RoleType, content: str) -> None:
         """Append a message tagged with the current scaffold step."""
@@ -51,36 +55,16 @@ class TutorFlow:
 
         We only advance when student clearly signals readiness.
         """
-        user_lower = user_message.lower().strip()
-        word_count = len(user_message.split())
-
-        # Signals that student is ready to move on
-        READY_SIGNALS = {
-            "yes", "yeah", "yep", "yup", "sure", "ok", "okay", "ready",
-            "let's go", "go ahead", "next", "continue", "show me",
-            "got it", "makes sense", "i understand", "understood",
-            "i see", "that helps", "clear", "cool", "great", "nice",
-            "sounds good", "alright", "perfect", "awesome"
-        }
-
-        # Signals that student needs more help (DON'T advance)
-        NEEDS_HELP = {
-            "confused", "confusing", "don't understand", "don't get it",
-            "what do you mean", "can you explain", "help", "unclear",
-            "lost", "wait", "hold on", "go back", "repeat", "again",
-            "not sure", "i don't know", "huh", "what", "why", "how",
-            "more", "example", "another"
-        }
+        # Flows created before policies existed have no attribute
+        policy = getattr(self, "policy", None) or get_default_policy()
 
         def signals_ready() -> bool:
-            # Check for ready signals, but not if they also signal confusion
-            has_ready = any(signal in user_lower for signal in READY_SIGNALS)
-            has_help = any(signal in user_lower for signal in NEEDS_HELP)
-            return has_ready and not has_help
+            # Ready signal present, and no sign of confusion
+            return policy.signals_ready(user_message)
 
         def gave_substantive_answer() -> bool:
             # Student gave a real answer (not just "yes" or "ok")
-            return word_count >= 6
+            return policy.gave_substantive_answer(user_message)
 
         # ============================================================
         # STEP 1: INITIAL_METAPHOR → STUDENT_METAPHOR
@@ -6,47 +6,100 @@ SIMPLIFIED: Clean flow, let AI handle conversation nuance.
 
 import time
 import streamlit as st
+from utils.config import STREAM_RESPONSES, SESSION_DURATION
 from utils.database import save_message, save_scaffold_progress
 
 
+def _stream_reply(chunks, fallback) -> str:
+    """
+    Render streamed chunks into an assistant chat bubble as they arrive.
+
+    If the stream breaks partway, the bubble keeps the text that arrived;
+    if nothing arrived, the same bubble shows the fallback instead. Returns
+    exactly what the bubble ends up showing, so the saved transcript matches
+    the screen.
+    """
+    text = ""
+    with st.chat_message("assistant"):
+        placeholder = st.empty()
+        try:
+            for chunk in chunks:
+                text += chunk
+                placeholder.markdown(text + "▌")
+        except Exception as e:
+            print(f"ERROR: {e}")
+        text = text.strip() or fallback
+        placeholder.markdown(text)
+    return text
+
+
+def _request_reply(system_prompt, user_message, conversation_history, fallback):
+    """
+    Ask the AI client for a reply, streaming it into the chat when enabled.
+    Only the final text is returned, so callers save one message per reply.
+    """
+    client = st.session_state.ai_client
+
+    if not STREAM_RESPONSES:
+        try:
+            return client.generate_response(
+                system_prompt=system_prompt,
+                user_message=user_message,
+                conversation_history=conversation_history,
+            )
+        except Exception as e:
+            print(f"ERROR: {e}")
+            return fallback
+
+    try:
+        chunks = client.stream_response(
+            system_prompt=system_prompt,
+            user_message=user_message,
+            conversation_history=conversation_history,
+        )
+    except Exception as e:
+        print(f"ERROR: {e}")
+        chunks = ()
+
+    response = _stream_reply(chunks, fallback)
+
+    # Already on screen - the chat view doesn't draw it again
+    st.session_state.reply_rendered = True
+    return response
+
+
 def generate_initial_message(topic, condition):
     """
     Generate the initial learning message for scaffolded conditions.
     Called automatically when session starts.
+    Uses a pre-generated message from the opening pool when one is ready,
+    falling back to a live LLM call.
     """
-    from characters import get_character
-    from tutor_flow.step_guide import StepGuide
+    from tutor_flow.opening_pool import get_opening_pool, generate_opening_message
 
     session_id = st.session_state.current_session_id
+    character_name = st.session_state.selected_character if condition == 1 else None
 
-    # Build system prompt
-    if condition == 1:
-        character = get_character(st.session_state.selected_character)
-        system_prompt = character.get_system_prompt(topic.name)
-    else:
-        system_prompt = (
-            f"You are a friendly, encouraging CS tutor teaching {topic.name}.\n"
-            "Be conversational, warm, and clear. Keep responses focused and under 150 words."
-        )
-
-    # Get the metaphor prompt
-    metaphor_prompt = StepGuide.get_metaphor_prompt(topic)
-
-    # Generate the initial message
+    initial_message = None
     try:
-        initial_message = st.session_state.ai_client.generate_response(
-            system_prompt=system_prompt,
-            user_message=metaphor_prompt,
-            temperature=0.9,
-        )
+        initial_message = get_opening_pool().take(topic, condition, character_name)
     except Exception as e:
-        print(f"ERROR generating initial message: {e}")
-        initial_message = (
-            f"Hello! Let's learn about {topic.name}.\n\n"
-            f"**What we'll cover:** {topic.concept}\n\n"
-            f"{topic.metaphor_prompt}\n\n"
-            "What does this remind you of from your own experience?"
-        )
+        print(f"ERROR reading opening pool: {e}")
+
+    # Generate the initial message
+    if initial_message is None:
+        try:
+            initial_message = generate_opening_message(
+                st.session_state.ai_client, topic, condition, character_name
+            )
+        except Exception as e:
+            print(f"ERROR generating initial message: {e}")
+            initial_message = (
+                f"Hello! Let's learn about {topic.name}.\n\n"
+                f"**What we'll cover:** {topic.concept}\n\n"
+                f"{topic.metaphor_prompt}\n\n"
+                "What does this remind you of from your own experience?"
+            )
 
     # Add to flow and save
     st.session_state.flow.add_message("assistant", initial_message)
@@ -65,11 +118,8 @@ def handle_user_message_scaffolded(user_input: str):
     Handle user message for scaffolded conditions (1 & 2).
     Simple flow: record message → check advancement → generate response.
     """
-    from characters import get_character
-    from tutor_flow.step_guide import StepGuide
     from tutor_flow.steps import ScaffoldStep
     from content.research_topics import get_research_topic
-    from content.visuals import get_topic_visual
 
     flow = st.session_state.flow
     topic = get_research_topic(st.session_state.current_session_id)
@@ -91,9 +141,7 @@ def handle_user_message_scaffolded(user_input: str):
     # =========================================================
 
     # Time-based end
-    start_time = st.session_state.get('start_time', time.time())
-    elapsed_minutes = (time.time() - start_time) / 60
-    if elapsed_minutes >= 15:
+    if time_is_up():
         _end_session("time", flow, session_id)
         return
 
@@ -181,46 +229,25 @@ def _show_visual_diagram(flow, topic, session_id):
 
 def _generate_response(flow, topic, condition, session_id, user_input):
     """Generate an AI response for the current step."""
-    from characters import get_character
-    from tutor_flow.step_guide import StepGuide
-
-    # Get the response prompt (includes context and instructions)
-    response_prompt = StepGuide.get_response_prompt(
-        topic=topic,
-        current_step=flow.current_step,
-        user_input=user_input,
-        context_messages=flow.get_recent_context(5),
+    from tutor_flow.context import get_context
+    from tutor_flow.turn_prompt import build_turn_prompt
+
+    # Shared with the transcript replay, so offline reports match production
+    prompt = build_turn_prompt(
+        flow, topic, condition, user_input,
+        get_context(st.session_state, session_id, condition),
+        character_name=st.session_state.get("selected_character"),
     )
 
-    print(f"PROMPT:\n{response_prompt[:200]}...")
-
-    # Build system prompt
-    if condition == 1:
-        character = get_character(st.session_state.selected_character)
-        system_prompt = character.get_system_prompt(topic.name)
-    else:
-        system_prompt = (
-            f"You are a helpful, encouraging CS tutor teaching {topic.name}.\n"
-            "Be conversational and clear. Validate student answers explicitly.\n"
-            "Keep responses focused and under 150 words."
-        )
-
-    # Build conversation history
-    conversation_history = [
-        {"role": m.role, "content": m.content}
-        for m in flow.get_recent_context(5)[:-1]
-    ]
+    print(f"PROMPT:\n{prompt.response_prompt[:200]}...")
 
     # Generate response
-    try:
-        response = st.session_state.ai_client.generate_response(
-            system_prompt=system_prompt,
-            user_message=response_prompt,
-            conversation_history=conversation_history,
-        )
-    except Exception as e:
-        print(f"ERROR: {e}")
-        response = "I'm having trouble responding. Could you try rephrasing that?"
+    response = _request_reply(
+        prompt.system_prompt,
+        prompt.response_prompt,
+        prompt.history,
+        fallback="I'm having trouble responding. Could you try rephrasing that?",
+    )
 
     # Record response
     flow.add_message("assistant", response)
@@ -252,9 +279,44 @@ def _end_session(reason, flow, session_id):
     st.rerun()
 
 
+def _end_direct_session(session_id):
+    """End a direct chat session (condition 3) and transition to quiz."""
+    if st.session_state.get('quiz_ready', False):
+        return
+
+    final_message = "Time's up! Let's test your knowledge with a quiz."
+    st.session_state.messages.append({
+        "role": "assistant",
+        "content": final_message,
+        "timestamp": time.time(),
+    })
+    save_message(st.session_state.user_id, session_id, "assistant", final_message)
+    st.session_state.quiz_ready = True
+    st.rerun()
+
+
+def time_is_up() -> bool:
+    """Whether the learning session has run its SESSION_DURATION."""
+    start_time = st.session_state.get('start_time', time.time())
+    return time.time() - start_time >= SESSION_DURATION
+
+
+def expire_session(condition):
+    """
+    End a session whose time ran out while the student was idle, the same
+    way a message sent after the deadline would.
+    """
+    session_id = st.session_state.current_session_id
+    if condition in [1, 2]:
+        _end_session("time", st.session_state.flow, session_id)
+    else:
+        _end_direct_session(session_id)
+
+
 def handle_user_message_direct(user_input: str):
     """Handle user message for direct chat condition (3)."""
     from content.research_topics import get_research_topic
+    from tutor_flow.context import get_context, clip_input
 
     topic = get_research_topic(st.session_state.current_session_id)
     session_id = st.session_state.current_session_id
@@ -268,27 +330,15 @@ def handle_user_message_direct(user_input: str):
     save_message(st.session_state.user_id, session_id, "user", user_input)
 
     # Check time
-    start_time = st.session_state.get('start_time', time.time())
-    elapsed_minutes = (time.time() - start_time) / 60
-
-    if elapsed_minutes >= 15:
-        if not st.session_state.get('quiz_ready', False):
-            final_message = "Time's up! Let's test your knowledge with a quiz."
-            st.session_state.messages.append({
-                "role": "assistant",
-                "content": final_message,
-                "timestamp": time.time(),
-            })
-            save_message(st.session_state.user_id, session_id, "assistant", final_message)
-            st.session_state.quiz_ready = True
-            st.rerun()
+    if time_is_up():
+        _end_direct_session(session_id)
         return
 
-    # Build conversation history
-    conversation_history = [
-        {"role": m["role"], "content": m["content"]}
-        for m in st.session_state.messages[-10:]
-    ]
+    # Build conversation history: recent turns within the token budget,
+    # older ones folded into the rolling summary. The current message is
+    # sent separately below, so it's left out here.
+    context = get_context(st.session_state, session_id, 3)
+    conversation_history = context.build(st.session_state.messages[:-1])
 
     # System prompt
     system_prompt = (
@@ -297,14 +347,12 @@ def handle_user_message_direct(user_input: str):
     )
 
     # Generate response
-    try:
-        response = st.session_state.ai_client.generate_response(
-            system_prompt=system_prompt,
-            user_message=user_input,
-            conversation_history=conversation_history,
-        )
-    except Exception:
-        response = "I'm having trouble responding. Could you try rephrasing?"
+    response = _request_reply(
+        system_prompt,
+        clip_input(user_input),
+        conversation_history,
+        fallback="I'm having trouble responding. Could you try rephrasing?",
+    )
 
     st.session_state.messages.append({
         "role": "assistant",
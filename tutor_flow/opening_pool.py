@@ -0,0 +1,151 @@
+# tutor_flow/opening_pool.py
+"""
+Pre-generated opening messages.
+Keeps a small pool of ready-made first messages for every
+(topic, character, condition) so a session can start without
+waiting on the LLM. Pools refill in the background.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, Optional, Tuple
+
+import streamlit as st
+
+from utils.config import OPENING_POOL_DEPTH, OPENING_POOL_WORKERS
+
+PoolKey = Tuple[str, int, Optional[str]]
+
+
+def build_initial_prompts(topic, condition: int, character_name: Optional[str] = None) -> Tuple[str, str]:
+    """Return (system_prompt, user_message) for a session's opening message."""
+    from tutor_flow.prompt_compiler import get_prompt_compiler
+
+    compiler = get_prompt_compiler()
+
+    # Build system prompt
+    if condition == 1:
+        system_prompt = compiler.system_prompt(character_name, topic.name)
+    else:
+        system_prompt = (
+            f"You are a friendly, encouraging CS tutor teaching {topic.name}.\n"
+            "Be conversational, warm, and clear. Keep responses focused and under 150 words."
+        )
+
+    # Get the metaphor prompt
+    metaphor_prompt = compiler.metaphor_prompt(topic)
+
+    return system_prompt, metaphor_prompt
+
+
+def generate_opening_message(ai_client, topic, condition: int,
+                             character_name: Optional[str] = None) -> str:
+    """Generate one opening message with a live LLM call."""
+    system_prompt, metaphor_prompt = build_initial_prompts(topic, condition, character_name)
+    return ai_client.generate_response(
+        system_prompt=system_prompt,
+        user_message=metaphor_prompt,
+        temperature=0.9,
+    )
+
+
+class OpeningMessagePool:
+    """
+    Background-filled pool of opening messages.
+    take() never blocks on the LLM: it pops a ready message (or returns None)
+    and schedules a refill up to the configured depth.
+    """
+
+    def __init__(self, ai_client, depth: int = OPENING_POOL_DEPTH,
+                 max_workers: int = OPENING_POOL_WORKERS) -> None:
+        self._ai_client = ai_client
+        self._depth = depth
+        self._pools: Dict[PoolKey, Deque[str]] = {}
+        self._pending: Dict[PoolKey, int] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="opening-pool"
+        )
+
+    @staticmethod
+    def _key(topic, condition: int, character_name: Optional[str]) -> PoolKey:
+        # Only condition 1 varies by character
+        return (topic.key, condition, character_name if condition == 1 else None)
+
+    def take(self, topic, condition: int, character_name: Optional[str] = None) -> Optional[str]:
+        """Pop a pre-generated message, or None if the pool is empty."""
+        key = self._key(topic, condition, character_name)
+
+        with self._lock:
+            pool = self._pools.get(key)
+            message = pool.popleft() if pool else None
+
+        self._refill(topic, condition, character_name)
+        return message
+
+    def warm(self, topic) -> None:
+        """Start filling every pool for a topic (all characters, conditions 1 & 2)."""
+        from characters import get_all_character_names
+
+        for character_name in get_all_character_names():
+            self._refill(topic, 1, character_name)
+        self._refill(topic, 2, None)
+
+    def warm_all(self) -> None:
+        """Start filling the pools for every research topic."""
+        from content.research_topics import RESEARCH_TOPICS
+
+        for topic in RESEARCH_TOPICS.values():
+            self.warm(topic)
+
+    def size(self, topic, condition: int, character_name: Optional[str] = None) -> int:
+        """Number of ready messages for one (topic, condition, character)."""
+        key = self._key(topic, condition, character_name)
+        with self._lock:
+            return len(self._pools.get(key, ()))
+
+    def _refill(self, topic, condition: int, character_name: Optional[str]) -> None:
+        key = self._key(topic, condition, character_name)
+
+        with self._lock:
+            ready = len(self._pools.get(key, ()))
+            pending = self._pending.get(key, 0)
+            missing = self._depth - ready - pending
+            if missing <= 0:
+                return
+            self._pending[key] = pending + missing
+
+        for _ in range(missing):
+            self._executor.submit(self._fill_one, key, topic, condition, character_name)
+
+    def _fill_one(self, key: PoolKey, topic, condition: int, character_name: Optional[str]) -> None:
+        message = None
+        try:
+            message = generate_opening_message(self._ai_client, topic, condition, character_name)
+        except Exception as e:
+            print(f"ERROR filling opening pool {key}: {e}")
+        finally:
+            with self._lock:
+                self._pending[key] -= 1
+                if message:
+                    self._pools.setdefault(key, deque()).append(message)
+
+
+@st.cache_resource(show_spinner=False)
+def get_opening_pool() -> OpeningMessagePool:
+    """
+    Process-wide opening message pool, shared by all sessions.
+    Filling starts as soon as it's built, so the pools are ready before a
+    whole class starts sessions at once; start_session only tops them up.
+    """
+    from client.ai_client import SimpleAIClient
+
+    pool = OpeningMessagePool(SimpleAIClient())
+    try:
+        pool.warm_all()
+    except Exception as e:
+        print(f"ERROR warming opening pools: {e}")
+    return pool
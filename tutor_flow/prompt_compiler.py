@@ -0,0 +1,175 @@
+# tutor_flow/prompt_compiler.py
+"""
+Precompiled prompts.
+
+Every static part of the tutoring prompts - step prompts per (topic, step,
+variant), character system prompts per (character, topic) and opening
+metaphor prompts - is rendered once, split around its dynamic slots and
+cached with its token count. Each turn only joins in the student's message
+and the recent context. Output is identical to rendering from scratch.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from utils.tokens import count_tokens
+from .steps import ScaffoldStep, ConversationMessage
+from .step_guide import StepGuide
+
+# Rendered into the templates in place of dynamic values, then split on.
+# NUL never appears in the static prompt text.
+_USER_INPUT = "\x00user_input\x00"
+_RECENT_CONTEXT = "\x00recent_context\x00"
+_SLOT = re.compile("\x00(user_input|recent_context)\x00")
+
+# Keyed by the step's string value: Enum.__hash__ is Python-level and slow
+PromptKey = Tuple[str, str, Optional[str]]
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    """Static text split around named slots: parts[0] slots[0] parts[1] ..."""
+    parts: Tuple[str, ...]
+    slots: Tuple[str, ...]
+    static_tokens: int
+
+    @classmethod
+    def compile(cls, rendered: str) -> "CompiledPrompt":
+        pieces = _SLOT.split(rendered)
+        parts, slots = tuple(pieces[0::2]), tuple(pieces[1::2])
+        return cls(parts, slots, count_tokens("".join(parts)))
+
+    def render(self, values: Optional[Dict[str, str]] = None) -> str:
+        # A plain join - no template parsing per turn
+        parts = self.parts
+        if not self.slots:
+            return parts[0]
+        out = [parts[0]]
+        for slot, part in zip(self.slots, parts[1:]):
+            out.append(values[slot])
+            out.append(part)
+        return "".join(out)
+
+    def token_count(self, values: Optional[Dict[str, str]] = None) -> int:
+        """Static tokens (counted once) plus the dynamic values'."""
+        return self.static_tokens + sum(count_tokens(values[slot]) for slot in self.slots)
+
+
+class PromptCompiler:
+    """
+    Cache of compiled prompts. Topics and characters not seen before are
+    compiled on first use, so precompile() is only a warm-up.
+    """
+
+    def __init__(self):
+        self._step_prompts: Dict[PromptKey, CompiledPrompt] = {}
+        self._system_prompts: Dict[Tuple[str, str], CompiledPrompt] = {}
+        self._metaphor_prompts: Dict[str, CompiledPrompt] = {}
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+
+    def precompile(self, topics=None, characters=None) -> int:
+        """Compile everything for the given topics / characters (default: all)."""
+        if topics is None:
+            from content.research_topics import RESEARCH_TOPICS
+            topics = RESEARCH_TOPICS.values()
+        if characters is None:
+            from characters import CHARACTERS
+            characters = CHARACTERS.keys()
+
+        for topic in topics:
+            self.metaphor_template(topic)
+            for step in ScaffoldStep:
+                for variant in _variants(step):
+                    self.step_template(topic, step, variant)
+            for name in characters:
+                self.system_template(name, topic.name)
+
+        return len(self._step_prompts) + len(self._system_prompts) + len(self._metaphor_prompts)
+
+    def step_template(self, topic, step: ScaffoldStep, variant: Optional[str]) -> CompiledPrompt:
+        key = (topic.key, step.value, variant)
+        compiled = self._step_prompts.get(key)
+        if compiled is None:
+            compiled = CompiledPrompt.compile(
+                StepGuide.render_step_prompt(topic, step, variant, _USER_INPUT, _RECENT_CONTEXT)
+            )
+            self._step_prompts[key] = compiled
+        return compiled
+
+    def system_template(self, character_name: str, topic_name: str) -> CompiledPrompt:
+        key = (character_name, topic_name)
+        compiled = self._system_prompts.get(key)
+        if compiled is None:
+            from characters import get_character
+            compiled = CompiledPrompt.compile(get_character(character_name).get_system_prompt(topic_name))
+            self._system_prompts[key] = compiled
+        return compiled
+
+    def metaphor_template(self, topic) -> CompiledPrompt:
+        compiled = self._metaphor_prompts.get(topic.key)
+        if compiled is None:
+            compiled = CompiledPrompt.compile(StepGuide.get_metaphor_prompt(topic))
+            self._metaphor_prompts[topic.key] = compiled
+        return compiled
+
+    # ------------------------------------------------------------------
+    # Per-turn rendering
+    # ------------------------------------------------------------------
+
+    def _step_values(self, topic, step, user_input, context_messages):
+        template = self.step_template(topic, step, StepGuide.prompt_variant(step, user_input))
+        values = {"user_input": user_input}
+        if "recent_context" in template.slots:
+            values["recent_context"] = StepGuide.format_recent_context(context_messages)
+        return template, values
+
+    def response_prompt(self, topic, step: ScaffoldStep, user_input: str,
+                        context_messages: List[ConversationMessage]) -> str:
+        """Same text as StepGuide's step prompt, from the cached template."""
+        template, values = self._step_values(topic, step, user_input, context_messages)
+        return template.render(values)
+
+    def response_prompt_tokens(self, topic, step: ScaffoldStep, user_input: str,
+                               context_messages: List[ConversationMessage]) -> int:
+        template, values = self._step_values(topic, step, user_input, context_messages)
+        return template.token_count(values)
+
+    def system_prompt(self, character_name: str, topic_name: str) -> str:
+        """Character.get_system_prompt(topic_name), cached."""
+        return self.system_template(character_name, topic_name).render()
+
+    def metaphor_prompt(self, topic) -> str:
+        """StepGuide.get_metaphor_prompt(topic), cached."""
+        return self.metaphor_template(topic).render()
+
+    def stats(self) -> Dict[str, int]:
+        """Template counts and static token totals, for logging."""
+        templates = [*self._step_prompts.values(), *self._system_prompts.values(),
+                     *self._metaphor_prompts.values()]
+        return {
+            "step_prompts": len(self._step_prompts),
+            "system_prompts": len(self._system_prompts),
+            "metaphor_prompts": len(self._metaphor_prompts),
+            "static_tokens": sum(t.static_tokens for t in templates),
+        }
+
+
+def _variants(step: ScaffoldStep) -> Tuple[Optional[str], ...]:
+    if step in (ScaffoldStep.PRACTICE, ScaffoldStep.REFLECTION):
+        return ("affirmative", "answer")
+    return (None,)
+
+
+@lru_cache(maxsize=1)
+def get_prompt_compiler() -> PromptCompiler:
+    """Process-wide compiler, warmed with every known topic and character."""
+    compiler = PromptCompiler()
+    compiler.precompile()
+    return compiler
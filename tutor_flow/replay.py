@@ -0,0 +1,331 @@
+# tutor_flow/replay.py
+"""
+Offline transcript replay.
+
+Feeds the student turns of recorded sessions through a TutorFlow (the live
+one, or a candidate loaded from a file) with a stub AI client, and reports
+step transitions, divergence from the recorded scaffold_progress, prompt
+sizes and throughput. No Firebase or OpenAI access needed.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import csv
+import gzip
+import importlib.util
+import inspect
+import io
+import json
+import math
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from content.research_topics import get_research_topic
+from .context import ConversationContext
+from .steps import ScaffoldStep
+from .step_guide import StepGuide
+from .turn_prompt import build_turn_prompt
+
+CANDIDATE_MODULE = "tutor_flow._candidate_flow"
+CANDIDATE_GUIDE_MODULE = "tutor_flow._candidate_step_guide"
+
+
+# ----------------------------------------------------------------------
+# Transcripts
+# ----------------------------------------------------------------------
+
+@dataclass
+class Turn:
+    role: str
+    content: str
+    timestamp: float = 0.0
+    step: Optional[str] = None
+
+
+@dataclass
+class Transcript:
+    """One recorded session, messages in order."""
+    user_id: str
+    session_id: str
+    condition: int
+    turns: List[Turn]
+    # Recorded scaffold_progress: (step, timestamp), oldest first
+    progress: List[Tuple[str, float]] = field(default_factory=list)
+
+    def recorded_advances(self) -> List[bool]:
+        """For each student turn, whether the live app advanced the step after it."""
+        advances = []
+        user_indexes = [i for i, t in enumerate(self.turns) if t.role == "user"]
+
+        for i in user_indexes:
+            if self.progress:
+                start = self.turns[i].timestamp
+                end = self.turns[i + 1].timestamp if i + 1 < len(self.turns) else math.inf
+                advances.append(any(start < ts <= end for _, ts in self.progress))
+            else:
+                # CSV exports have no scaffold_progress: compare the steps
+                # stamped on the tutor messages either side of the turn
+                before = next((t.step for t in reversed(self.turns[:i]) if t.role == "assistant"), None)
+                after = next((t.step for t in self.turns[i + 1:] if t.role == "assistant"), None)
+                advances.append(bool(before and after and before != after))
+
+        return advances
+
+
+def _sorted_children(node) -> List[Dict]:
+    items = node.values() if isinstance(node, dict) else node if isinstance(node, list) else []
+    return sorted((i for i in items if isinstance(i, dict)), key=lambda i: i.get("timestamp", 0))
+
+
+def transcripts_from_users(users: Dict) -> Iterator[Transcript]:
+    """Transcripts for scaffolded sessions in a `users` tree (Firebase JSON export)."""
+    for user_id, user_data in sorted(users.items()):
+        if not isinstance(user_data, dict) or user_data.get("condition") not in (1, 2):
+            continue
+        for session_id, session_data in sorted((user_data.get("sessions") or {}).items()):
+            turns = [
+                Turn(m.get("role", ""), m.get("content") or "", m.get("timestamp", 0), m.get("step"))
+                for m in _sorted_children(session_data.get("messages"))
+            ]
+            if not any(t.role == "user" for t in turns):
+                continue
+            progress = [(p.get("step"), p.get("timestamp", 0))
+                        for p in _sorted_children(session_data.get("scaffold_progress"))]
+            yield Transcript(user_id, session_id, user_data["condition"], turns, progress)
+
+
+def transcripts_from_csv(path: str) -> Iterator[Transcript]:
+    """Transcripts from a detailed message export (.csv or .csv.gz)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    sessions: Dict[Tuple[str, str], Dict] = {}
+
+    with opener(path, "rt", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                condition = int(row.get("condition") or 0)
+            except ValueError:
+                continue
+            if condition not in (1, 2):
+                continue
+            key = (row["user_id"], row["topic"])
+            entry = sessions.setdefault(key, {"condition": condition, "rows": []})
+            entry["rows"].append(row)
+
+    for (user_id, session_id), entry in sorted(sessions.items()):
+        rows = sorted(entry["rows"], key=lambda r: int(r.get("message_number") or 0))
+        turns = [
+            Turn(r["role"], r["content"], float(r.get("timestamp") or 0), r.get("step") or None)
+            for r in rows
+        ]
+        if any(t.role == "user" for t in turns):
+            yield Transcript(user_id, session_id, entry["condition"], turns)
+
+
+def load_transcripts(path: str) -> List[Transcript]:
+    """Load a JSON snapshot (whole database or just `users`) or a detailed CSV export."""
+    if path.endswith((".csv", ".csv.gz")):
+        return list(transcripts_from_csv(path))
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    users = data.get("users", data) if isinstance(data, dict) else {}
+    return list(transcripts_from_users(users))
+
+
+# ----------------------------------------------------------------------
+# Flow / guide loading
+# ----------------------------------------------------------------------
+
+def _load_module(name: str, path: str):
+    # Registered under tutor_flow so the file's relative imports (.steps) resolve
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_flow_class(path: Optional[str] = None):
+    """TutorFlow from tutor_flow/flow_manager.py, or from a candidate file."""
+    if path is None:
+        from .flow_manager import TutorFlow
+        return TutorFlow
+    return _load_module(CANDIDATE_MODULE, path).TutorFlow
+
+
+def load_step_guide(path: Optional[str] = None):
+    """StepGuide from tutor_flow/step_guide.py, or from a candidate file."""
+    if path is None:
+        return StepGuide
+    return _load_module(CANDIDATE_GUIDE_MODULE, path).StepGuide
+
+
+def prompt_builder_for(guide):
+    """Call get_response_prompt whichever signature the guide uses."""
+    params = inspect.signature(guide.get_response_prompt).parameters
+
+    def build(topic, step, user_input, context):
+        if "topic_name" in params:
+            return guide.get_response_prompt(
+                role="Tutor", topic_name=topic.name, current_step=step,
+                user_input=user_input, context_messages=context,
+            )
+        return guide.get_response_prompt(
+            topic=topic, current_step=step, user_input=user_input, context_messages=context,
+        )
+
+    return build
+
+
+# ----------------------------------------------------------------------
+# Stub client
+# ----------------------------------------------------------------------
+
+class ReplayAIClient:
+    """
+    Stands in for SimpleAIClient. Replies with the recorded tutor messages
+    in order, so the flow sees the same context the student did.
+    """
+
+    model = "replay-stub"
+
+    def __init__(self, recorded_replies: List[str]):
+        self._replies = iter(recorded_replies)
+        self.calls = 0
+
+    def next_reply(self) -> str:
+        return next(self._replies, "(no recorded reply)")
+
+    def generate_response(self, system_prompt, user_message, conversation_history=None,
+                          temperature=0.7) -> str:
+        self.calls += 1
+        return self.next_reply()
+
+    def stream_response(self, system_prompt, user_message, conversation_history=None,
+                        temperature=0.7):
+        yield self.generate_response(system_prompt, user_message, conversation_history, temperature)
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+
+@dataclass
+class ReplayResult:
+    user_id: str
+    session_id: str
+    turns: int
+    # (student turn index, from step, to step)
+    transitions: List[Tuple[int, str, str]]
+    predicted: List[bool]
+    recorded: List[bool]
+    prompt_tokens: List[int]
+    final_step: str
+    completed: bool
+    seconds: float
+
+    @property
+    def mismatches(self) -> int:
+        return sum(p != r for p, r in zip(self.predicted, self.recorded))
+
+    @property
+    def first_divergence(self) -> Optional[int]:
+        return next((i for i, (p, r) in enumerate(zip(self.predicted, self.recorded)) if p != r), None)
+
+
+def replay_transcript(transcript: Transcript, flow_cls, prompt_builder=None) -> ReplayResult:
+    """
+    Run one transcript's student turns through a fresh flow.
+
+    Prompts are built by build_turn_prompt, as in the live handlers;
+    prompt_builder swaps in a candidate step prompt. Transcripts don't
+    record the character, so condition 1 uses the plain tutor system prompt.
+    """
+    # The flows log every transition with print(); keep that out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        return _replay(transcript, flow_cls, prompt_builder)
+
+
+def _replay(transcript: Transcript, flow_cls, prompt_builder=None) -> ReplayResult:
+    topic = get_research_topic(transcript.session_id)
+
+    assistant_turns = [t.content for t in transcript.turns if t.role == "assistant"]
+    user_turns = [t.content for t in transcript.turns if t.role == "user"]
+    client = ReplayAIClient(assistant_turns)
+
+    started = time.perf_counter()
+    conversation = ConversationContext(transcript.session_id, transcript.condition)
+    flow = flow_cls(topic.name, "Tutor")
+    flow.add_message("assistant", client.next_reply())  # Opening message
+
+    transitions, predicted, prompt_tokens = [], [], []
+
+    for index, user_input in enumerate(user_turns):
+        if flow.completed:
+            break  # The live app moves to the quiz here
+        flow.add_message("user", user_input)
+
+        advanced = flow.should_advance_step(user_input)
+        predicted.append(advanced)
+        if advanced:
+            old_step = flow.current_step
+            flow.advance_step()
+            if flow.current_step != old_step:
+                transitions.append((index, old_step.value, flow.current_step.value))
+
+            if flow.current_step == ScaffoldStep.VISUAL_DIAGRAM and old_step != flow.current_step:
+                # Pre-built visual, no LLM call
+                flow.add_message("assistant", client.next_reply())
+                continue
+
+        prompt = build_turn_prompt(
+            flow, topic, transcript.condition, user_input, conversation,
+            response_prompt_builder=prompt_builder,
+        )
+        prompt_tokens.append(prompt.token_count())
+
+        reply = client.generate_response(prompt.system_prompt, prompt.response_prompt, prompt.history)
+        flow.add_message("assistant", reply)
+
+    recorded = transcript.recorded_advances()[:len(predicted)]
+
+    return ReplayResult(
+        user_id=transcript.user_id,
+        session_id=transcript.session_id,
+        turns=len(predicted),
+        transitions=transitions,
+        predicted=predicted,
+        recorded=recorded,
+        prompt_tokens=prompt_tokens,
+        final_step=flow.current_step.value,
+        completed=flow.completed,
+        seconds=time.perf_counter() - started,
+    )
+
+
+def replay_all(transcripts: List[Transcript], flow_cls, prompt_builder=None) -> List[ReplayResult]:
+    return [replay_transcript(t, flow_cls, prompt_builder) for t in transcripts]
+
+
+def summarize(results: List[ReplayResult]) -> Dict:
+    """Aggregate report over a replay run."""
+    turns = sum(r.turns for r in results)
+    seconds = sum(r.seconds for r in results)
+    tokens = [n for r in results for n in r.prompt_tokens]
+    compared = sum(len(r.recorded) for r in results)
+    mismatches = sum(r.mismatches for r in results)
+
+    return {
+        "sessions": len(results),
+        "turns": turns,
+        "transitions": sum(len(r.transitions) for r in results),
+        "completed_sessions": sum(r.completed for r in results),
+        "agreement": 1 - mismatches / compared if compared else None,
+        "diverged_sessions": sum(r.first_divergence is not None for r in results),
+        "prompt_tokens_mean": sum(tokens) / len(tokens) if tokens else 0,
+        "prompt_tokens_max": max(tokens, default=0),
+        "turns_per_second": turns / seconds if seconds else 0,
+    }
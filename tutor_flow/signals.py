@@ -0,0 +1,74 @@
+# tutor_flow/signals.py
+"""
+Ready / needs-help signal matching for step advancement.
+
+Both phrase sets are compiled once into a single token-boundary regex, so a
+message is scanned in one pass and "how" no longer fires inside "show me"
+(nor "what" inside "whatever"). At each position the longest phrase wins,
+so "not sure" counts as needing help rather than as "sure".
+"""
+
+from __future__ import annotations
+
+import re
+from typing import FrozenSet, NamedTuple
+
+# Signals that student is ready to move on
+READY_SIGNALS: FrozenSet[str] = frozenset({
+    "yes", "yeah", "yep", "yup", "sure", "ok", "okay", "ready",
+    "let's go", "go ahead", "next", "continue", "show me",
+    "got it", "makes sense", "i understand", "understood",
+    "i see", "that helps", "clear", "cool", "great", "nice",
+    "sounds good", "alright", "perfect", "awesome"
+})
+
+# Signals that student needs more help (DON'T advance)
+NEEDS_HELP: FrozenSet[str] = frozenset({
+    "confused", "confusing", "don't understand", "don't get it",
+    "what do you mean", "can you explain", "help", "unclear",
+    "lost", "wait", "hold on", "go back", "repeat", "again",
+    "not sure", "i don't know", "huh", "what", "why", "how",
+    "more", "example", "another"
+})
+
+# Curly apostrophes from phone keyboards
+_APOSTROPHES = str.maketrans({"’": "'", "‘": "'"})
+
+
+def _compile(phrases) -> re.Pattern:
+    # Longest first so the alternation prefers "not sure" over "sure";
+    # words inside a phrase may be separated by any whitespace
+    alternatives = sorted(phrases, key=len, reverse=True)
+    body = "|".join(r"\s+".join(map(re.escape, p.split())) for p in alternatives)
+    return re.compile(rf"\b(?:{body})\b")
+
+
+_ALL_SIGNALS = READY_SIGNALS | NEEDS_HELP
+_SIGNAL_PATTERN = _compile(_ALL_SIGNALS)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class SignalMatch(NamedTuple):
+    """Signals found in one message."""
+    ready: FrozenSet[str]
+    help: FrozenSet[str]
+
+    @property
+    def signals_ready(self) -> bool:
+        """Ready to move on, with no sign of confusion."""
+        return bool(self.ready) and not self.help
+
+
+def match_signals(message: str) -> SignalMatch:
+    """Return every ready and needs-help signal in `message`, in one pass."""
+    text = message.lower()
+    if "’" in text or "‘" in text:
+        text = text.translate(_APOSTROPHES)
+
+    ready, help_ = set(), set()
+    for phrase in _SIGNAL_PATTERN.findall(text):
+        if phrase not in _ALL_SIGNALS:
+            phrase = _WHITESPACE.sub(" ", phrase)  # "got  it" -> "got it"
+        (ready if phrase in READY_SIGNALS else help_).add(phrase)
+
+    return SignalMatch(ready=frozenset(ready), help=frozenset(help_))
@@ -42,9 +42,16 @@ class StepGuide:
         - Respond naturally to what the student said
         - Accomplish the goal for this step
         - Transition smoothly to the next topic when appropriate
+
+        Static text comes from a precompiled template (see prompt_compiler);
+        only the student's message and recent context are filled in here.
         """
+        from .prompt_compiler import get_prompt_compiler
+        return get_prompt_compiler().response_prompt(topic, current_step, user_input, context_messages)
 
-        # Get topic-specific guidance
+    @staticmethod
+    def render_topic_guidance(topic, current_step: ScaffoldStep) -> str:
+        """Topic-specific guidance for a step, placeholders filled in."""
         step_key = current_step.value
         topic_guidance = topic.instructions.get(step_key, "")
         if topic_guidance:
@@ -53,14 +60,45 @@ class StepGuide:
             topic_guidance = topic_guidance.replace("{agent_solution}", topic.agent_solution)
             topic_guidance = topic_guidance.replace("{topic_name}", topic.name)
             topic_guidance = topic_guidance.replace("{code_focus}", topic.code_focus)
+        return topic_guidance
 
-        # Build context from recent messages
+    @staticmethod
+    def format_recent_context(context_messages: List[ConversationMessage]) -> str:
+        """Build context from recent messages."""
         recent_context = ""
         if context_messages:
             recent_context = "RECENT CONVERSATION:\n"
             for msg in context_messages[-3:]:
                 role = "Student" if msg.role == "user" else "You"
                 recent_context += f"{role}: {msg.content[:100]}...\n"
+        return recent_context
+
+    @staticmethod
+    def prompt_variant(current_step: ScaffoldStep, user_input: str) -> Optional[str]:
+        """
+        Practice and reflection prompts differ for a short affirmative
+        ("affirmative") versus a real answer ("answer"); other steps have one.
+        """
+        if current_step == ScaffoldStep.PRACTICE:
+            return "affirmative" if len(user_input.split()) <= 2 else "answer"
+        if current_step == ScaffoldStep.REFLECTION:
+            return "affirmative" if len(user_input.split()) <= 3 else "answer"
+        return None
+
+    @staticmethod
+    def render_step_prompt(
+            topic,
+            current_step: ScaffoldStep,
+            variant: Optional[str],
+            user_input: str,
+            recent_context: str,
+    ) -> str:
+        """
+        Full response prompt for one step. The prompt compiler calls this once
+        per (topic, step, variant) with placeholder user_input / recent_context
+        and fills in the real values each turn.
+        """
+        topic_guidance = StepGuide.render_topic_guidance(topic, current_step)
 
         # ============================================================
         # STEP-SPECIFIC PROMPTS
@@ -136,7 +174,7 @@ class StepGuide:
 
         if current_step == ScaffoldStep.PRACTICE:
             # Check if student just said a short affirmative vs gave a real answer
-            is_just_affirmative = len(user_input.split()) <= 2
+            is_just_affirmative = variant == "affirmative"
 
             if is_just_affirmative:
                 return (
@@ -164,8 +202,7 @@ class StepGuide:
 
         if current_step == ScaffoldStep.REFLECTION:
             # Check if student just said a short affirmative vs gave a real summary
-            word_count = len(user_input.split())
-            is_just_affirmative = word_count <= 3
+            is_just_affirmative = variant == "affirmative"
 
             if is_just_affirmative:
                 return (
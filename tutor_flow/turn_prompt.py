@@ -0,0 +1,75 @@
+# tutor_flow/turn_prompt.py
+"""
+Prompt assembly for one scaffolded tutor reply.
+
+The live handlers and the offline transcript replay both build their
+requests here, so the replay measures exactly what production sends:
+the same step prompt, recent-context window, input clipping, system
+prompt and token-budgeted history.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from utils.tokens import count_tokens
+from .context import ConversationContext, clip_input
+from .prompt_compiler import get_prompt_compiler
+
+RECENT_CONTEXT_MESSAGES = 5  # Messages quoted into the step prompt
+
+
+@dataclass
+class TurnPrompt:
+    """Everything sent to the AI client for one reply."""
+    system_prompt: str
+    response_prompt: str
+    history: List[Dict]
+
+    def token_count(self) -> int:
+        return (
+            count_tokens(self.system_prompt) + count_tokens(self.response_prompt)
+            + sum(count_tokens(m["content"]) for m in self.history)
+        )
+
+
+def system_prompt_for(topic, condition: int, character_name: Optional[str] = None) -> str:
+    """Character system prompt for condition 1, the plain tutor prompt otherwise."""
+    if condition == 1 and character_name:
+        return get_prompt_compiler().system_prompt(character_name, topic.name)
+    return (
+        f"You are a helpful, encouraging CS tutor teaching {topic.name}.\n"
+        "Be conversational and clear. Validate student answers explicitly.\n"
+        "Keep responses focused and under 150 words."
+    )
+
+
+def build_turn_prompt(flow, topic, condition: int, user_input: str,
+                      conversation: ConversationContext,
+                      character_name: Optional[str] = None,
+                      response_prompt_builder: Optional[Callable] = None) -> TurnPrompt:
+    """
+    Prompts and history for the reply to `user_input`, which must already be
+    the flow's last message.
+
+    response_prompt_builder(topic, step, user_input, context_messages)
+    replaces the compiled step prompt - the replay uses it to try a
+    candidate StepGuide.
+    """
+    build_response = response_prompt_builder or get_prompt_compiler().response_prompt
+    response_prompt = build_response(
+        topic,
+        flow.current_step,
+        clip_input(user_input),
+        flow.get_recent_context(RECENT_CONTEXT_MESSAGES),
+    )
+
+    # Recent turns within the token budget, older ones folded into the
+    # rolling summary. The current message is in the response prompt.
+    history = conversation.build([
+        {"role": m.role, "content": m.content}
+        for m in flow.messages[:-1]
+    ])
+
+    return TurnPrompt(system_prompt_for(topic, condition, character_name), response_prompt, history)
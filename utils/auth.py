@@ -1,8 +1,16 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import firebase_admin
 from firebase_admin import credentials, auth as admin_auth, db
-from utils.config import MANUAL_CONDITION_ASSIGNMENTS, CONDITIONS
+from utils.config import (
+    MANUAL_CONDITION_ASSIGNMENTS, CONDITIONS,
+    AUTH_HTTP_POOL_SIZE, AUTH_CONNECT_TIMEOUT, AUTH_READ_TIMEOUT, AUTH_MAX_RETRIES
+)
+from utils.read_cache import cached_get, invalidate, prime
+from utils.fetch_engine import fetch_all_users
+from utils.study_stats import invalidate_study_stats
 import time
 
 # ---------------------------------------------------------
@@ -10,7 +18,11 @@ import time
 # ---------------------------------------------------------
 
 def init_firebase():
-    """Initialize Firebase Admin SDK once."""
+    """
+    Initialize Firebase Admin SDK once.
+    Not run at import: the router calls it before any view that reads the
+    database, and firebase_login before assigning a condition.
+    """
     if not firebase_admin._apps:
         # Extract only the service account fields
         firebase_cfg = st.secrets["firebase"]
@@ -36,35 +48,85 @@ def init_firebase():
             "databaseURL": firebase_cfg["databaseURL"]
         })
 
-init_firebase()
-
 
 # ---------------------------------------------------------
 # Firebase REST API Login (Email/Password)
 # ---------------------------------------------------------
 
-FIREBASE_API_KEY = st.secrets["firebase"]["apiKey"]
+@st.cache_resource(show_spinner=False)
+def get_auth_http_adapter() -> HTTPAdapter:
+    """
+    One connection pool per server process for the auth REST calls.
+    Keep-alive connections are reused across logins, so a class signing in
+    at once doesn't open (and TLS-handshake) one connection per student.
+
+    Only requests the server can't have acted on are retried: connection
+    errors (nothing was sent) and 429 / 503 (turned away before sign-in
+    ran). Read timeouts and other 5xx are not retried, since the POST may
+    already have been processed; the student just tries again.
+    """
+    retry = Retry(
+        total=AUTH_MAX_RETRIES,
+        connect=AUTH_MAX_RETRIES,
+        read=0,
+        other=0,
+        status=AUTH_MAX_RETRIES,
+        status_forcelist=(429, 503),
+        allowed_methods=frozenset({"POST"}),
+        backoff_factor=0.5,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(pool_connections=1, pool_maxsize=AUTH_HTTP_POOL_SIZE, max_retries=retry)
+
+
+def get_auth_http_session() -> requests.Session:
+    """
+    A Session for one auth call, over the shared adapter.
+
+    requests.Session isn't documented as thread-safe, and every script
+    thread logs users in, so each call gets its own (cheap) Session. The
+    adapter's urllib3 pool is thread-safe and is what holds the
+    connections. Don't close() it - that would close the shared pool.
+    """
+    session = requests.Session()
+    session.mount("https://", get_auth_http_adapter())
+    return session
+
+
+def get_firebase_api_key() -> str:
+    """Web API key for the REST endpoints, read from secrets when first needed."""
+    return st.secrets["firebase"]["apiKey"]
+
 
 def firebase_login(email: str, password: str):
     """
     Authenticate a user using Firebase's REST API.
-    Returns a dict containing idToken, refreshToken, localId, etc.
+    Returns a dict containing idToken, refreshToken, localId, etc., plus
+    user_record: the user's database record, read (or created) while
+    assigning their condition, for set_session to pass on.
     Raises ValueError on failure.
     """
-    url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={FIREBASE_API_KEY}"
+    url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={get_firebase_api_key()}"
     payload = {
         "email": email,
         "password": password,
         "returnSecureToken": True
     }
 
-    response = requests.post(url, json=payload)
-    data = response.json()
+    try:
+        response = get_auth_http_session().post(
+            url, json=payload, timeout=(AUTH_CONNECT_TIMEOUT, AUTH_READ_TIMEOUT)
+        )
+        data = response.json()
+    except (requests.RequestException, ValueError) as e:
+        # Timed out, unreachable after retries, or not a JSON reply
+        raise ValueError(f"Could not reach the login service ({type(e).__name__})")
 
     if "idToken" in data:
         # After successful login, ensure user has condition assigned
         user_id = data["localId"]
-        assign_condition_if_needed(user_id, email)
+        init_firebase()
+        data["user_record"] = assign_condition_if_needed(user_id, email)
         return data
     else:
         error_msg = data.get("error", {}).get("message", "Login failed")
@@ -75,64 +137,216 @@ def assign_condition_if_needed(user_id: str, email: str):
     """
     Assign condition to user based on manual assignments.
     If email not in manual assignments, assign based on balanced distribution.
+    Returns the user's record as it now stands (None if it couldn't be read).
     """
     try:
-        ref = db.reference(f'users/{user_id}')
-        user_data = ref.get()
+        user_data = cached_get(f'users/{user_id}')
         
         # If user already has condition, don't change it
         if user_data and 'condition' in user_data:
-            return
-        
-        # Check manual assignments first
-        if email in MANUAL_CONDITION_ASSIGNMENTS:
-            assigned_condition = MANUAL_CONDITION_ASSIGNMENTS[email]
-        else:
-            # Auto-assign based on balanced distribution
-            assigned_condition = get_balanced_condition()
+            return user_data
         
-        # Create or update user record
-        if not user_data:
-            user_data = {
-                'email': email,
-                'condition': assigned_condition,
-                'condition_name': CONDITIONS[assigned_condition],
-                'assigned_date': time.time(),
-                'sessions': {
-                    'arraylist': {'status': 'not_started'},
-                    'recursion': {'status': 'not_started'}
-                }
-            }
-            ref.set(user_data)
-        else:
-            # User exists but no condition
-            ref.update({
-                'condition': assigned_condition,
-                'condition_name': CONDITIONS[assigned_condition],
-                'assigned_date': time.time()
-            })
+        return _claim_condition(user_id, email, user_data)
             
     except Exception as e:
         st.error(f"Error assigning condition: {e}")
+        return None
 
 
-def get_balanced_condition() -> int:
+def _new_user_record(email: str, condition: int) -> dict:
+    return {
+        'email': email,
+        'condition': condition,
+        'condition_name': CONDITIONS[condition],
+        'assigned_date': time.time(),
+        'sessions': {
+            'arraylist': {'status': 'not_started'},
+            'recursion': {'status': 'not_started'}
+        },
+        'status': {
+            'arraylist': 'not_started',
+            'recursion': 'not_started'
+        }
+    }
+
+
+def _claim_condition(user_id: str, email: str, user_data) -> dict:
     """
-    Assign condition based on balanced distribution.
-    Returns the condition with fewest users.
+    Give a user who has no condition one, and return their record.
+
+    The counter slot is reserved first, then `users/{uid}/condition` is
+    claimed in a transaction that only sets it while it is unset. If another
+    login (a second tab) claimed it first, or the claim fails, the slot is
+    released again, so condition_counts only counts conditions users hold.
     """
+    ref = db.reference(f'users/{user_id}')
+    manual = MANUAL_CONDITION_ASSIGNMENTS.get(email)
+    try:
+        reserved, counted = _reserve_condition(manual), True
+    except Exception as e:
+        st.error(f"Error reserving condition: {e}")
+        reserved, counted = (manual if manual in CONDITIONS else 1), False
+    
+    def release():
+        if counted:
+            move_condition(reserved, None)
+    
+    claimed = {}
+    
+    def claim(current):
+        # Decided by the last (committed) run of the transaction, not by the
+        # value: two tabs may well have reserved the same condition
+        claimed['won'] = current is None
+        return reserved if current is None else current
+    
     try:
-        ref = db.reference('users')
-        all_users = ref.get() or {}
+        condition = ref.child('condition').transaction(claim)
+    except Exception:
+        release()
+        raise
+    
+    if not claimed['won']:
+        # The other login holds the slot for this user; give ours back
+        release()
+        invalidate(f'users/{user_id}')
+        record = cached_get(f'users/{user_id}') or {}
+        record.setdefault('condition', condition)  # Its other fields may still be on the way
+        return record
+    
+    if not user_data:
+        record = _new_user_record(email, condition)
+        # update(), not set(): the condition is already in place
+        ref.update(record)
+    else:
+        # User exists but no condition
+        assignment = {
+            'condition_name': CONDITIONS[condition],
+            'assigned_date': time.time()
+        }
+        ref.update(assignment)
+        record = {**user_data, 'condition': condition, **assignment}
+    
+    prime(f'users/{user_id}', record)
+    return record
+
+
+# Running count of users per condition, kept with RTDB transactions.
+# Keys are 'condition_1'... so RTDB doesn't turn the node into an array.
+CONDITION_COUNTS_PATH = 'condition_counts'
+
+
+def _condition_key(condition: int) -> str:
+    return f'condition_{condition}'
+
+
+def _count_conditions_from_users() -> dict:
+    """
+    Count users per condition, fetching only each user's `condition`.
+    Only used once, to seed the counters when they don't exist yet.
+    """
+    all_users = fetch_all_users(fields=('condition',))
+    
+    counts = {_condition_key(c): 0 for c in CONDITIONS}
+    for user_data in all_users.values():
+        condition = user_data.get('condition', 0)
+        if condition in CONDITIONS:
+            counts[_condition_key(condition)] += 1
+    
+    return counts
+
+
+def _seeded_counts(current, seed: dict) -> dict:
+    """
+    Counters from a transaction's current value. When the node doesn't
+    exist yet they are seeded from existing users, fetched at most once per
+    call however often the transaction retries.
+    """
+    if current is None:
+        if not seed:
+            seed.update(_count_conditions_from_users())
+        current = seed
+    return {_condition_key(c): current.get(_condition_key(c), 0) for c in CONDITIONS}
+
+
+def reserve_condition(condition: int = None) -> int:
+    """
+    Assign a condition and record it in the counters, atomically.
+
+    With no condition given, picks the one with the fewest users. The pick
+    and the increment run in one RTDB transaction, so concurrent first
+    logins see each other's assignments and stay balanced. One small
+    round trip (plus retries under contention) instead of a full-tree read.
+    """
+    try:
+        return _reserve_condition(condition)
+    except Exception as e:
+        st.error(f"Error reserving condition: {e}")
+        return condition if condition in CONDITIONS else 1  # Default to condition 1
+
+
+def _reserve_condition(condition: int = None) -> int:
+    """reserve_condition, raising instead of falling back to an uncounted default."""
+    ref = db.reference(CONDITION_COUNTS_PATH)
+    seed = {}
+    chosen = {}
+    
+    def bump(current):
+        counts = _seeded_counts(current, seed)
+        pick = condition if condition in CONDITIONS else min(
+            CONDITIONS, key=lambda c: counts[_condition_key(c)]
+        )
+        counts[_condition_key(pick)] += 1
+        chosen['condition'] = pick
+        return counts
+    
+    ref.transaction(bump)
+    invalidate_study_stats()
+    return chosen['condition']
+
+
+def move_condition(old_condition: int, new_condition: int) -> None:
+    """
+    Record a reassignment in the counters: one fewer user in the old
+    condition, one more in the new one, in a single transaction.
+    A new_condition of None just releases the old one.
+    """
+    if old_condition == new_condition:
+        return
+    
+    try:
+        ref = db.reference(CONDITION_COUNTS_PATH)
+        seed = {}
+        
+        def shift(current):
+            # A seed counts users as they are now, still in the old condition
+            counts = _seeded_counts(current, seed)
+            if old_condition in CONDITIONS:
+                counts[_condition_key(old_condition)] = max(0, counts[_condition_key(old_condition)] - 1)
+            if new_condition in CONDITIONS:
+                counts[_condition_key(new_condition)] += 1
+            return counts
         
-        condition_counts = {1: 0, 2: 0, 3: 0}
-        for user_data in all_users.values():
-            condition = user_data.get('condition', 0)
-            if condition in condition_counts:
-                condition_counts[condition] += 1
+        ref.transaction(shift)
+        invalidate_study_stats()
+        
+    except Exception as e:
+        st.error(f"Error moving condition count: {e}")
+
+
+def get_balanced_condition() -> int:
+    """
+    Return the condition with fewest users, from the counters.
+    Doesn't assign: use reserve_condition() for that.
+    """
+    try:
+        ref = db.reference(CONDITION_COUNTS_PATH)
+        seed = {}
+        # Leaves existing counters as they are; seeds them if missing, so
+        # the full users count happens once, not on every call
+        counts = ref.transaction(lambda current: _seeded_counts(current, seed))
         
         # Return condition with fewest users
-        return min(condition_counts, key=condition_counts.get)
+        return min(CONDITIONS, key=lambda c: counts.get(_condition_key(c), 0))
         
     except Exception as e:
         st.error(f"Error getting balanced condition: {e}")
@@ -145,12 +359,18 @@ def get_balanced_condition() -> int:
 
 def set_session(user_data: dict):
     """Store user login info in Streamlit session_state."""
+    record = user_data.get("user_record")
+
     st.session_state["logged_in"] = True
     st.session_state["id_token"] = user_data["idToken"]
     st.session_state["refresh_token"] = user_data["refreshToken"]
     st.session_state["user_id"] = user_data["localId"]
     st.session_state["email"] = user_data.get("email")
-    st.session_state["condition"] = user_data.get("condition")
+    st.session_state["condition"] = (record or {}).get("condition", user_data.get("condition"))
+
+    if record:
+        # The first dashboard render reuses this instead of reading it again
+        st.session_state["login_user_snapshot"] = (user_data["localId"], record)
 
 
 def logout_user():
@@ -173,37 +393,22 @@ def require_auth():
 def get_user_data(uid: str):
     """
     Fetch user info from Firebase Realtime Database.
+    Right after login, the record read by firebase_login is used instead.
     """
     try:
-        ref = db.reference(f'users/{uid}')
-        user_data = ref.get()
+        # One-shot: later runs read the database as usual
+        snapshot = st.session_state.pop("login_user_snapshot", None)
+        if snapshot and snapshot[0] == uid:
+            prime(f'users/{uid}', snapshot[1])
+        
+        user_data = cached_get(f'users/{uid}')
         
         if user_data:
             return user_data
         else:
             # User doesn't exist in database yet, create basic record
             auth_user = admin_auth.get_user(uid)
-            email = auth_user.email
-            
-            # Assign condition
-            if email in MANUAL_CONDITION_ASSIGNMENTS:
-                condition = MANUAL_CONDITION_ASSIGNMENTS[email]
-            else:
-                condition = get_balanced_condition()
-            
-            new_user_data = {
-                'email': email,
-                'condition': condition,
-                'condition_name': CONDITIONS[condition],
-                'assigned_date': time.time(),
-                'sessions': {
-                    'arraylist': {'status': 'not_started'},
-                    'recursion': {'status': 'not_started'}
-                }
-            }
-            
-            ref.set(new_user_data)
-            return new_user_data
+            return _claim_condition(uid, auth_user.email, None)
             
     except Exception as e:
         st.error(f"Error fetching user data: {e}")
@@ -13,6 +13,46 @@ SESSION_1_START = '2026-01-22'
 SESSION_2_START = '2026-01-29'
 
 
+# LLM Client (one shared client per server process)
+LLM_MAX_CONNECTIONS = 100  # Upper bound on concurrent HTTP connections to the API
+LLM_MAX_KEEPALIVE_CONNECTIONS = 20  # Idle connections kept open for reuse
+LLM_KEEPALIVE_EXPIRY = 60  # Seconds an idle connection stays in the pool
+LLM_CONNECT_TIMEOUT = 5  # Seconds to establish a connection
+LLM_REQUEST_TIMEOUT = 30  # Seconds to wait on a request (per read while streaming)
+LLM_MAX_RETRIES = 2  # SDK-level retries on connection errors / 429 / 5xx
+
+# Firebase Auth REST calls (one pooled HTTP session per server process)
+AUTH_HTTP_POOL_SIZE = 20  # Keep-alive connections to the auth endpoint
+AUTH_CONNECT_TIMEOUT = 5  # Seconds to establish a connection
+AUTH_READ_TIMEOUT = 15  # Seconds to wait for the response
+AUTH_MAX_RETRIES = 2  # Retries on connection errors / 429 / 503, with backoff
+
+# Opening messages pre-generated per (topic, character, condition)
+OPENING_POOL_DEPTH = 2  # Ready messages kept per pool (0 = always generate live)
+OPENING_POOL_WORKERS = 4  # Background threads refilling the pools
+
+# Scaffold step advancement
+ADVANCEMENT_POLICY = 'keywords'  # 'keywords' or 'classifier' (falls back to keywords if the model is missing)
+ADVANCEMENT_MODEL_PATH = 'models/advancement_classifier.json'  # From scripts/train_advancement_classifier.py
+
+# Conversation context sent with each tutor reply
+CONTEXT_TOKEN_BUDGET = {1: 800, 2: 800, 3: 1500}  # History tokens per condition (summary included)
+CONTEXT_SUMMARY_TOKENS = 200  # Rolling summary of turns that no longer fit
+CONTEXT_MESSAGE_MAX_TOKENS = 400  # Any one earlier message (e.g. pasted code) is clipped to this
+CONTEXT_INPUT_MAX_TOKENS = 1000  # The student's current message is clipped to this
+
+
+# Write-behind buffer for chat telemetry (messages, scaffold progress)
+WRITE_BUFFER_MAX_BATCH = 50  # Flush as soon as this many writes are queued
+WRITE_BUFFER_FLUSH_INTERVAL = 2.0  # ...or after this many seconds
+WRITE_BUFFER_MAX_RETRIES = 3  # Retries per batch on transient errors
+WRITE_BUFFER_RETRY_BACKOFF = 0.5  # Seconds, doubled on each retry
+WRITE_BUFFER_MAX_BACKOFF = 60.0  # Cap on the wait between flushes while the database is unreachable
+WRITE_BUFFER_DEAD_LETTER_NODE = 'write_dead_letters'  # RTDB node for writes the database rejected
+WRITE_BUFFER_DEAD_LETTER_PATH = 'logs/write_buffer_dead_letters.jsonl'  # ...or this file if that write fails too
+WRITE_BUFFER_REQUEST_FLUSH_TIMEOUT = 3.0  # Seconds a page run waits on the buffer before moving on
+
+
 # Study Configuration
 TOTAL_PARTICIPANTS = 60
 PARTICIPANTS_PER_CONDITION = 20
@@ -74,6 +114,11 @@ COLLECT_DATA = {
 
 # Export Settings
 EXPORT_FORMAT = 'csv'
+EXPORT_PREVIEW_ROWS = 5  # Rows shown under each export button
+EXPORT_DIR = 'exports'  # Incremental export partitions; keep on persistent storage (manifest is in RTDB)
+EXPORT_ACTIVITY_OVERLAP = 5 * 60  # Seconds re-scanned behind the message checkpoint
+FETCH_MAX_WORKERS = 8  # Concurrent per-user requests for admin-wide reads
+STATS_TTL_SECONDS = 5 * 60  # Admin study statistics are recomputed at most this often
 EXPORT_INCLUDE = [
     'user_id',
     'email',
@@ -97,6 +142,7 @@ SHOW_DEBUG_INFO = False  # Set to True for testing, False for production
 SHOW_SKIP_BUTTONS = True  # Set to True to enable "Skip to Quiz" button
 REQUIRE_EMAIL_VERIFICATION = False  # Set to True if using email verification
 ALLOW_MULTIPLE_ATTEMPTS = False  # Students can only do each session once
+STREAM_RESPONSES = True  # Render tutor replies token-by-token as they arrive
 
 # Study Information (shown to students)
 STUDY_INFO = {
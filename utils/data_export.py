@@ -4,8 +4,13 @@ Export research data to CSV for analysis
 """
 
 import csv
+import gzip
 import io
+import os
+import tempfile
 from datetime import datetime
+from typing import Tuple
+from utils.config import EXPORT_PREVIEW_ROWS
 from utils.database import export_data_to_dict
 import streamlit as st
 
@@ -39,50 +44,136 @@ def generate_csv() -> str:
     return output.getvalue()
 
 
-def generate_detailed_csv_with_messages() -> str:
+SUMMARY_FIELDNAMES = [
+    'user_id', 'email', 'condition', 'condition_name',
+    'topic', 'session_start', 'session_end',
+    'duration_seconds', 'duration_minutes',
+    'total_messages', 'user_messages', 'assistant_messages',
+    'scaffold_steps_completed', 'quiz_score', 'quiz_total', 'quiz_percentage',
+    'survey_responses', 'completed'
+]
+
+DETAILED_FIELDNAMES = [
+    'user_id', 'email', 'condition', 'condition_name', 
+    'topic', 'message_number', 'role', 'content', 
+    'timestamp', 'step'
+]
+
+
+def generate_detailed_csv_with_messages(compress: bool = False) -> Tuple[str, str, int]:
     """
     Generate detailed CSV including message-level data.
     Each row is a message (for conversation analysis).
+
+    Walks users one at a time and streams rows to a temp file on disk,
+    optionally gzip-compressed, so the full corpus is never held in memory.
+
+    Returns:
+        (path, preview_csv, row_count) - the caller removes `path`
     """
-    from utils.database import get_all_users
-    
-    users = get_all_users()
-    output = io.StringIO()
+    from utils.database import iter_users, ordered_children
     
-    fieldnames = [
-        'user_id', 'email', 'condition', 'condition_name', 
-        'topic', 'message_number', 'role', 'content', 
-        'timestamp', 'step'
-    ]
+    suffix = '.csv.gz' if compress else '.csv'
+    handle, path = tempfile.mkstemp(prefix='research_detailed_', suffix=suffix)
     
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
-    writer.writeheader()
+    preview = io.StringIO()
+    preview_writer = csv.DictWriter(preview, fieldnames=DETAILED_FIELDNAMES)
+    preview_writer.writeheader()
+    row_count = 0
     
-    for user_id, user_data in users.items():
-        email = user_data.get('email', '')
-        condition = user_data.get('condition', 0)
-        condition_name = user_data.get('condition_name', '')
-        
-        sessions = user_data.get('sessions', {})
-        
-        for topic, session_data in sessions.items():
-            messages = session_data.get('messages', [])
+    try:
+        with open(handle, 'wb') as raw:
+            binary = gzip.GzipFile(fileobj=raw, mode='wb') if compress else raw
+            text = io.TextIOWrapper(binary, encoding='utf-8', newline='')
+            
+            writer = csv.DictWriter(text, fieldnames=DETAILED_FIELDNAMES)
+            writer.writeheader()
+            
+            for user_id, user_data in iter_users():
+                email = user_data.get('email', '')
+                condition = user_data.get('condition', 0)
+                condition_name = user_data.get('condition_name', '')
+                
+                sessions = user_data.get('sessions', {})
+                
+                for topic, session_data in sessions.items():
+                    messages = ordered_children(session_data.get('messages'))
+                    
+                    for i, msg in enumerate(messages):
+                        row = {
+                            'user_id': user_id,
+                            'email': email,
+                            'condition': condition,
+                            'condition_name': condition_name,
+                            'topic': topic,
+                            'message_number': i + 1,
+                            'role': msg.get('role', ''),
+                            'content': msg.get('content', ''),
+                            'timestamp': msg.get('timestamp', ''),
+                            'step': msg.get('step', '')
+                        }
+                        writer.writerow(row)
+                        
+                        if row_count < EXPORT_PREVIEW_ROWS:
+                            preview_writer.writerow(row)
+                        row_count += 1
             
-            for i, msg in enumerate(messages):
-                writer.writerow({
-                    'user_id': user_id,
-                    'email': email,
-                    'condition': condition,
-                    'condition_name': condition_name,
-                    'topic': topic,
-                    'message_number': i + 1,
-                    'role': msg.get('role', ''),
-                    'content': msg.get('content', ''),
-                    'timestamp': msg.get('timestamp', ''),
-                    'step': msg.get('step', '')
-                })
+            text.flush()
+            text.detach()
+            if compress:
+                binary.close()
+    except BaseException:
+        # Don't leave a partial export behind in the temp dir
+        os.remove(path)
+        raise
     
-    return output.getvalue()
+    return path, preview.getvalue(), row_count
+
+
+def render_incremental_export():
+    """Buttons and status for the checkpointed, partitioned export."""
+    from utils.incremental_export import (
+        load_manifest, export_summary_increment, export_messages_increment, bundle_partitions
+    )
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        if st.button("Export New Completions"):
+            partition = export_summary_increment()
+            if partition:
+                st.success(f"{partition['rows']} sessions → {partition['file']}")
+            else:
+                st.info("No new completed sessions since the last export")
+    
+    with col2:
+        if st.button("Export New Messages"):
+            partition = export_messages_increment()
+            if partition:
+                st.success(f"{partition['rows']} messages → {partition['file']}")
+            else:
+                st.info("No new messages since the last export")
+    
+    manifest = load_manifest()
+    summary_parts = manifest['summary']['partitions']
+    message_parts = manifest['messages']['partitions']
+    
+    if summary_parts or message_parts:
+        st.caption(
+            f"{len(summary_parts)} summary partitions "
+            f"({sum(p['rows'] for p in summary_parts)} sessions), "
+            f"{len(message_parts)} message partitions "
+            f"({sum(p['rows'] for p in message_parts)} messages)"
+        )
+        
+        if st.button("Bundle All Partitions"):
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            st.download_button(
+                label="📥 Download All Partitions (zip)",
+                data=bundle_partitions(),
+                file_name=f"research_data_incremental_{timestamp}.zip",
+                mime="application/zip"
+            )
 
 
 def render_admin_export():
@@ -122,57 +213,86 @@ def render_admin_export():
         st.subheader("Detailed Message Data")
         st.write("One row per message (for conversation analysis)")
         
+        compress = st.checkbox("Gzip compress", value=True, key="detailed_gzip")
+        
         if st.button("Generate Detailed CSV"):
-            csv_data = generate_detailed_csv_with_messages()
+            path, preview_csv, row_count = generate_detailed_csv_with_messages(compress)
             
-            if csv_data:
+            try:
+                if row_count:
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    extension = "csv.gz" if compress else "csv"
+                    filename = f"research_data_detailed_{timestamp}.{extension}"
+                    
+                    with open(path, 'rb') as export_file:
+                        st.download_button(
+                            label=f"📥 Download Detailed CSV ({row_count} messages)",
+                            data=export_file,
+                            file_name=filename,
+                            mime="application/gzip" if compress else "text/csv"
+                        )
+                    
+                    # Show preview
+                    st.write(f"Preview (first {EXPORT_PREVIEW_ROWS} rows):")
+                    st.code(preview_csv)
+                else:
+                    st.warning("No data available yet")
+            finally:
+                os.remove(path)
+    
+    # Incremental export
+    st.write("---")
+    st.subheader("Incremental Export")
+    st.write("Exports only sessions completed and messages written since the last run")
+    
+    render_incremental_export()
+    
+    # Typed research tables
+    st.write("---")
+    st.subheader("Research Tables")
+    st.write("Sessions, survey, quiz and messages as separate tables (join on user_id + topic)")
+    
+    from utils.research_export import EXPORT_FORMATS, export_research_tables
+    
+    table_format = st.selectbox(
+        "Format",
+        options=list(EXPORT_FORMATS),
+        format_func=EXPORT_FORMATS.get,
+        key="research_table_format"
+    )
+    
+    if st.button("Generate Research Tables"):
+        try:
+            path = export_research_tables(table_format)
+        except ImportError as e:
+            st.error(f"Columnar export needs pandas and pyarrow installed: {e}")
+        else:
+            try:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"research_data_detailed_{timestamp}.csv"
-                
-                st.download_button(
-                    label="📥 Download Detailed CSV",
-                    data=csv_data,
-                    file_name=filename,
-                    mime="text/csv"
-                )
                 
-                # Show preview
-                st.write("Preview (first 5 rows):")
-                lines = csv_data.split('\n')
-                st.code('\n'.join(lines[:6]))
-            else:
-                st.warning("No data available yet")
+                with open(path, 'rb') as export_file:
+                    st.download_button(
+                        label="📥 Download Research Tables",
+                        data=export_file,
+                        file_name=f"research_tables_{table_format}_{timestamp}.zip",
+                        mime="application/zip"
+                    )
+            finally:
+                os.remove(path)
     
     # Show statistics
     st.write("---")
     st.subheader("Study Statistics")
     
-    from utils.database import get_all_users
-    
-    users = get_all_users()
+    from utils.study_stats import render_study_stats_header
     
-    total_users = len(users)
-    condition_counts = {1: 0, 2: 0, 3: 0}
-    completed_arraylist = 0
-    completed_recursion = 0
-    completed_both = 0
+    stats = render_study_stats_header("export")
     
-    for user_data in users.values():
-        condition = user_data.get('condition', 0)
-        if condition in condition_counts:
-            condition_counts[condition] += 1
-        
-        sessions = user_data.get('sessions', {})
-        
-        arraylist_complete = sessions.get('arraylist', {}).get('status') == 'completed'
-        recursion_complete = sessions.get('recursion', {}).get('status') == 'completed'
-        
-        if arraylist_complete:
-            completed_arraylist += 1
-        if recursion_complete:
-            completed_recursion += 1
-        if arraylist_complete and recursion_complete:
-            completed_both += 1
+    total_users = stats['total_users']
+    condition_counts = stats['condition_counts']
+    completed_arraylist = stats['completed'].get('arraylist', 0)
+    completed_recursion = stats['completed'].get('recursion', 0)
+    completed_both = stats['completed_all']
     
     col1, col2, col3 = st.columns(3)
     
@@ -193,12 +313,11 @@ def render_admin_export():
     st.subheader("Completion Rates by Condition")
     
     for condition in [1, 2, 3]:
-        condition_users = [u for u in users.values() if u.get('condition') == condition]
+        condition_stats = stats['by_condition'][condition]
         
-        if condition_users:
-            completed = sum(1 for u in condition_users 
-                          if u.get('sessions', {}).get('arraylist', {}).get('status') == 'completed')
-            rate = (completed / len(condition_users)) * 100
+        if condition_stats['users']:
+            completed = condition_stats['completed'].get('arraylist', 0)
+            rate = (completed / condition_stats['users']) * 100
             
             condition_name = {1: "Character Scaffolded", 2: "Non-Character Scaffolded", 3: "Direct Chat"}[condition]
-            st.write(f"**{condition_name}:** {completed}/{len(condition_users)} ({rate:.1f}%)")
+            st.write(f"**{condition_name}:** {completed}/{condition_stats['users']} ({rate:.1f}%)")
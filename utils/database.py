@@ -4,22 +4,123 @@ Handle all data storage and retrieval for the research study
 """
 
 import time
+import random
+import threading
 from firebase_admin import db
 import streamlit as st
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Any
+from utils.config import SESSIONS, WRITE_BUFFER_REQUEST_FLUSH_TIMEOUT
+from utils.read_cache import cached_get, invalidate
+from utils.write_buffer import get_write_buffer, Increment
+from utils.fetch_engine import fetch_all_users, iter_user_subtrees, USER_SUMMARY
+from utils.study_stats import invalidate_study_stats
+
+
+# Small top-level indexes read by incremental exports
+COMPLETION_LOG_PATH = 'completion_log'  # {push_key: {user_id, session_id, end_time}}
+SESSION_ACTIVITY_PATH = 'session_activity'  # {user_id: {session_id: last message time}}
+EXPORT_MANIFEST_PATH = 'export_manifest'  # Incremental export checkpoints + partition list
+
+
+# ============================================================================
+# APPEND-ONLY CHILD KEYS
+# ============================================================================
+
+PUSH_CHARS = '-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz'
+
+_push_lock = threading.Lock()
+_last_push_time = 0
+_last_rand_chars: List[int] = []
+
+
+def new_push_key() -> str:
+    """
+    Generate a Firebase-style push key on the client.
+
+    Keys are 20 chars: 8 encode the millisecond timestamp, 12 are random
+    (incremented within the same millisecond), so they sort chronologically.
+    Writing to `.../messages/{key}` appends without reading the list first.
+    """
+    global _last_push_time, _last_rand_chars
+
+    with _push_lock:
+        now = int(time.time() * 1000)
+        duplicate_time = now == _last_push_time
+        _last_push_time = now
+
+        if not duplicate_time:
+            _last_rand_chars = [random.randrange(64) for _ in range(12)]
+        else:
+            # Same millisecond: bump the random part so keys stay ordered
+            i = 11
+            while i >= 0 and _last_rand_chars[i] == 63:
+                _last_rand_chars[i] = 0
+                i -= 1
+            if i >= 0:
+                _last_rand_chars[i] += 1
+
+        time_chars = []
+        for _ in range(8):
+            time_chars.append(PUSH_CHARS[now % 64])
+            now //= 64
+
+        return ''.join(reversed(time_chars)) + ''.join(PUSH_CHARS[c] for c in _last_rand_chars)
+
+
+def _child_sort_key(key: str):
+    """Realtime Database key order: integer keys numerically, then strings."""
+    try:
+        return (0, int(key), '')
+    except ValueError:
+        return (1, 0, key)
+
+
+def ordered_child_items(value: Any) -> List[tuple]:
+    """
+    Return an append-only node (messages, scaffold_progress) as ordered
+    (key, item) pairs.
+
+    Older sessions stored these as arrays, which come back as lists; newer
+    ones use push keys and come back as dicts. A session written by both
+    comes back as a dict with integer and push keys mixed.
+    """
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [(str(i), item) for i, item in enumerate(value) if item is not None]
+    if isinstance(value, dict):
+        return [(k, value[k]) for k in sorted(value, key=_child_sort_key) if value[k] is not None]
+    return []
+
+
+def ordered_children(value: Any) -> List[Dict]:
+    """Return an append-only node as an ordered list of its items."""
+    return [item for _, item in ordered_child_items(value)]
 
 
 def save_session_start(user_id: str, session_id: str, condition: int):
     """Record that a session has started."""
     try:
-        ref = db.reference(f'users/{user_id}/sessions/{session_id}')
+        # Messages / counters still queued from an earlier run of this
+        # session must not land on top of the reset below
+        if not get_write_buffer().discard(f'users/{user_id}/sessions/{session_id}'):
+            print(f"WARNING: write buffer busy while restarting {user_id}/{session_id}")
+
+        now = time.time()
+        ref = db.reference(f'users/{user_id}')
         ref.update({
-            'status': 'in_progress',
-            'start_time': time.time(),
-            'condition': condition,
-            'messages': [],
-            'scaffold_progress': []
+            f'sessions/{session_id}/status': 'in_progress',
+            f'sessions/{session_id}/start_time': now,
+            f'sessions/{session_id}/condition': condition,
+            f'sessions/{session_id}/messages': [],
+            f'sessions/{session_id}/scaffold_progress': [],
+            f'sessions/{session_id}/total_messages': 0,
+            f'sessions/{session_id}/user_messages': 0,
+            f'sessions/{session_id}/assistant_messages': 0,
+            f'sessions/{session_id}/last_activity': now,
+            f'status/{session_id}': 'in_progress'
         })
+        invalidate(f'users/{user_id}')
     except Exception as e:
         st.error(f"Error saving session start: {e}")
 
@@ -28,8 +129,6 @@ def save_message(user_id: str, session_id: str, role: str, content: str,
                  step: Optional[str] = None):
     """Save a conversation message."""
     try:
-        ref = db.reference(f'users/{user_id}/sessions/{session_id}/messages')
-        
         message_data = {
             'role': role,
             'content': content,
@@ -39,12 +138,22 @@ def save_message(user_id: str, session_id: str, role: str, content: str,
         if step:
             message_data['step'] = step
         
-        # Get current messages
-        messages = ref.get() or []
-        messages.append(message_data)
-        
-        # Save back
-        ref.set(messages)
+        # Append under a new push key - no read of the existing transcript.
+        # Running counters ride along in the same batch, so completion
+        # never has to download the transcript to count it.
+        # Written behind by the buffer so the chat turn doesn't wait on it.
+        session_path = f'users/{user_id}/sessions/{session_id}'
+        updates = {
+            f'{session_path}/messages/{new_push_key()}': message_data,
+            f'{session_path}/total_messages': Increment(1),
+            f'{session_path}/last_activity': message_data['timestamp'],
+            f'{SESSION_ACTIVITY_PATH}/{user_id}/{session_id}': message_data['timestamp'],
+        }
+        if role in ('user', 'assistant'):
+            updates[f'{session_path}/{role}_messages'] = Increment(1)
+
+        get_write_buffer().enqueue(updates)
+        invalidate(session_path)
         
     except Exception as e:
         st.error(f"Error saving message: {e}")
@@ -53,19 +162,16 @@ def save_message(user_id: str, session_id: str, role: str, content: str,
 def save_scaffold_progress(user_id: str, session_id: str, step: str):
     """Record scaffold step progression."""
     try:
-        ref = db.reference(f'users/{user_id}/sessions/{session_id}/scaffold_progress')
-        
         progress_data = {
             'step': step,
             'timestamp': time.time()
         }
         
-        # Get current progress
-        progress = ref.get() or []
-        progress.append(progress_data)
-        
-        # Save back
-        ref.set(progress)
+        # Append under a new push key - no read of the existing progress list
+        get_write_buffer().enqueue({
+            f'users/{user_id}/sessions/{session_id}/scaffold_progress/{new_push_key()}': progress_data
+        })
+        invalidate(f'users/{user_id}/sessions/{session_id}/scaffold_progress')
         
     except Exception as e:
         st.error(f"Error saving scaffold progress: {e}")
@@ -81,6 +187,7 @@ def save_quiz_responses(user_id: str, session_id: str, responses: Dict, score: i
             'quiz_total': total,
             'quiz_completed_time': time.time()
         })
+        invalidate(f'users/{user_id}/sessions/{session_id}')
     except Exception as e:
         st.error(f"Error saving quiz responses: {e}")
 
@@ -93,77 +200,116 @@ def save_survey_responses(user_id: str, session_id: str, responses: Dict):
             'survey_responses': responses,
             'survey_completed_time': time.time()
         })
+        invalidate(f'users/{user_id}/sessions/{session_id}')
     except Exception as e:
         st.error(f"Error saving survey responses: {e}")
 
 
 def complete_session(user_id: str, session_id: str):
-    """Mark a session as complete."""
+    """
+    Mark a session as complete.
+    Message counts are kept up to date by save_message, so this only
+    reads start_time and writes the completion fields. A session with no
+    start_time (legacy data, failed save_session_start) is still completed,
+    with a duration of 0.
+    """
     try:
-        ref = db.reference(f'users/{user_id}/sessions/{session_id}')
+        # Land any buffered messages (and their counters) first
+        if not get_write_buffer().flush(timeout=WRITE_BUFFER_REQUEST_FLUSH_TIMEOUT):
+            st.warning("Some messages are still being saved and will be retried.")
+
+        start_time = cached_get(f'users/{user_id}/sessions/{session_id}/start_time')
+        end_time = time.time()
         
-        # Get session data
-        session_data = ref.get()
+        if start_time is None:
+            print(f"WARNING: completing {user_id}/{session_id} with no start_time - duration recorded as 0")
+            start_time = end_time
         
-        if session_data:
-            start_time = session_data.get('start_time', time.time())
-            duration = time.time() - start_time
-            
-            # Count messages
-            messages = session_data.get('messages', [])
-            user_messages = sum(1 for m in messages if m['role'] == 'user')
-            assistant_messages = sum(1 for m in messages if m['role'] == 'assistant')
-            
-            ref.update({
-                'status': 'completed',
-                'end_time': time.time(),
-                'duration_seconds': duration,
-                'total_messages': len(messages),
-                'user_messages': user_messages,
-                'assistant_messages': assistant_messages
-            })
+        session_path = f'users/{user_id}/sessions/{session_id}'
+        
+        # The completion log lets incremental exports fetch only
+        # sessions completed since their last checkpoint
+        db.reference('/').update({
+            f'{session_path}/status': 'completed',
+            f'{session_path}/end_time': end_time,
+            f'{session_path}/duration_seconds': end_time - start_time,
+            f'{session_path}/last_activity': end_time,
+            f'users/{user_id}/status/{session_id}': 'completed',
+            f'{COMPLETION_LOG_PATH}/{new_push_key()}': {
+                'user_id': user_id,
+                'session_id': session_id,
+                'end_time': end_time
+            }
+        })
+        invalidate(f'users/{user_id}')
+        invalidate_study_stats()
     except Exception as e:
         st.error(f"Error completing session: {e}")
 
 
-def get_session_status(user_id: str, session_id: str) -> str:
+def get_session_statuses(user_id: str) -> Dict[str, str]:
     """
-    Get the status of a session.
-    
-    Returns: 'not_started', 'in_progress', 'completed'
+    Get the status of every session in one small read.
+
+    Statuses live in a compact index at users/{uid}/status/{session_id},
+    kept in step with the session nodes by save_session_start and
+    complete_session. Users created before the index existed get it
+    backfilled from their session status fields on first read.
+
+    Returns: {session_id: 'not_started' | 'in_progress' | 'completed'}
     """
     try:
-        ref = db.reference(f'users/{user_id}/sessions/{session_id}')
-        session_data = ref.get()
+        statuses = cached_get(f'users/{user_id}/status') or {}
         
-        if not session_data:
-            return 'not_started'
+        missing = [s['id'] for s in SESSIONS.values() if s['id'] not in statuses]
+        if missing:
+            backfill = {}
+            for session_id in missing:
+                status = cached_get(f'users/{user_id}/sessions/{session_id}/status')
+                backfill[session_id] = status or 'not_started'
+            db.reference(f'users/{user_id}/status').update(backfill)
+            invalidate(f'users/{user_id}/status')
+            statuses.update(backfill)
         
-        return session_data.get('status', 'not_started')
+        return statuses
         
     except Exception as e:
-        st.error(f"Error getting session status: {e}")
-        return 'not_started'
+        st.error(f"Error getting session statuses: {e}")
+        return {}
 
 
-def get_next_session(user_id: str) -> Optional[str]:
+def get_session_status(user_id: str, session_id: str,
+                       statuses: Optional[Dict[str, str]] = None) -> str:
+    """
+    Get the status of a session.
+    Pass `statuses` from get_session_statuses() to avoid another read.
+    
+    Returns: 'not_started', 'in_progress', 'completed'
+    """
+    if statuses is None:
+        statuses = get_session_statuses(user_id)
+    
+    return statuses.get(session_id, 'not_started')
+
+
+def get_next_session(user_id: str,
+                     statuses: Optional[Dict[str, str]] = None) -> Optional[str]:
     """
     Determine which session the user should do next.
+    Pass `statuses` from get_session_statuses() to avoid another read.
     
     Returns: 'arraylist', 'recursion', or None if all complete
     """
     try:
-        # Check ArrayList
-        arraylist_status = get_session_status(user_id, 'arraylist')
-        if arraylist_status != 'completed':
-            return 'arraylist'
+        if statuses is None:
+            statuses = get_session_statuses(user_id)
         
-        # Check Recursion
-        recursion_status = get_session_status(user_id, 'recursion')
-        if recursion_status != 'completed':
-            return 'recursion'
+        ordered = sorted(SESSIONS.values(), key=lambda s: s['order'])
+        for session_config in ordered:
+            if statuses.get(session_config['id'], 'not_started') != 'completed':
+                return session_config['id']
         
-        # Both complete
+        # All complete
         return None
         
     except Exception as e:
@@ -172,20 +318,29 @@ def get_next_session(user_id: str) -> Optional[str]:
 
 
 def get_all_users() -> Dict:
-    """Get all user data (admin only)."""
+    """Get all user data (admin only), fetched per user in parallel."""
     try:
-        ref = db.reference('users')
-        return ref.get() or {}
+        return fetch_all_users()
     except Exception as e:
         st.error(f"Error getting all users: {e}")
         return {}
 
 
+def iter_users():
+    """
+    Yield (user_id, user_data) one user at a time.
+
+    Lists user ids with a shallow query, then fetches user subtrees from a
+    bounded thread pool, so only a small window of users is held in memory.
+    Users arrive in completion order.
+    """
+    yield from iter_user_subtrees()
+
+
 def get_user_condition(user_id: str) -> int:
     """Get the condition assigned to a user."""
     try:
-        ref = db.reference(f'users/{user_id}')
-        user_data = ref.get()
+        user_data = cached_get(f'users/{user_id}')
         
         if user_data and 'condition' in user_data:
             return user_data['condition']
@@ -198,6 +353,30 @@ def get_user_condition(user_id: str) -> int:
         return 1
 
 
+def build_summary_row(user_id: str, user_data: Dict, session_id: str, session_data: Dict) -> Dict:
+    """One summary export row for a completed session."""
+    return {
+        'user_id': user_id,
+        'email': user_data.get('email', ''),
+        'condition': user_data.get('condition', 0),
+        'condition_name': user_data.get('condition_name', ''),
+        'topic': session_id,
+        'session_start': session_data.get('start_time', ''),
+        'session_end': session_data.get('end_time', ''),
+        'duration_seconds': session_data.get('duration_seconds', 0),
+        'duration_minutes': round(session_data.get('duration_seconds', 0) / 60, 2),
+        'total_messages': session_data.get('total_messages', 0),
+        'user_messages': session_data.get('user_messages', 0),
+        'assistant_messages': session_data.get('assistant_messages', 0),
+        'scaffold_steps_completed': len(ordered_children(session_data.get('scaffold_progress'))),
+        'quiz_score': session_data.get('quiz_score', 0),
+        'quiz_total': session_data.get('quiz_total', 0),
+        'quiz_percentage': round((session_data.get('quiz_score', 0) / session_data.get('quiz_total', 1)) * 100, 1),
+        'survey_responses': str(session_data.get('survey_responses', {})),
+        'completed': True
+    }
+
+
 def export_data_to_dict() -> List[Dict]:
     """
     Export all data for analysis.
@@ -205,43 +384,20 @@ def export_data_to_dict() -> List[Dict]:
     Returns list of dicts, one per session completion.
     """
     try:
-        all_users = get_all_users()
         export_data = []
-        
-        for user_id, user_data in all_users.items():
-            email = user_data.get('email', '')
-            condition = user_data.get('condition', 0)
-            condition_name = user_data.get('condition_name', '')
-            
+
+        # Session scalars + scaffold/survey only; transcripts are never downloaded
+        for user_id, user_data in iter_user_subtrees(**USER_SUMMARY):
             sessions = user_data.get('sessions', {})
-            
+
             for session_id, session_data in sessions.items():
                 if session_data.get('status') == 'completed':
-                    messages = session_data.get('messages', [])
-                    
-                    row = {
-                        'user_id': user_id,
-                        'email': email,
-                        'condition': condition,
-                        'condition_name': condition_name,
-                        'topic': session_id,
-                        'session_start': session_data.get('start_time', ''),
-                        'session_end': session_data.get('end_time', ''),
-                        'duration_seconds': session_data.get('duration_seconds', 0),
-                        'duration_minutes': round(session_data.get('duration_seconds', 0) / 60, 2),
-                        'total_messages': session_data.get('total_messages', 0),
-                        'user_messages': session_data.get('user_messages', 0),
-                        'assistant_messages': session_data.get('assistant_messages', 0),
-                        'scaffold_steps_completed': len(session_data.get('scaffold_progress', [])),
-                        'quiz_score': session_data.get('quiz_score', 0),
-                        'quiz_total': session_data.get('quiz_total', 0),
-                        'quiz_percentage': round((session_data.get('quiz_score', 0) / session_data.get('quiz_total', 1)) * 100, 1),
-                        'survey_responses': str(session_data.get('survey_responses', {})),
-                        'completed': True
-                    }
-                    
-                    export_data.append(row)
-        
+                    export_data.append(
+                        build_summary_row(user_id, user_data, session_id, session_data)
+                    )
+
+        # Fetches finish out of order; keep rows grouped by user id
+        export_data.sort(key=lambda row: row['user_id'])
         return export_data
 
     except Exception as e:
@@ -290,6 +446,7 @@ def save_quiz_responses(user_id: str, session_id: str, responses: Dict,
                 })
 
         ref.update(quiz_data)
+        invalidate(f'users/{user_id}/sessions/{session_id}')
 
     except Exception as e:
         st.error(f"Error saving quiz responses: {e}")
@@ -358,6 +515,86 @@ def calculate_difficulty_breakdown(results: List[Dict]) -> Dict:
 # QUERY FUNCTIONS FOR DIFFICULTY ANALYSIS
 # ============================================================================
 
+DIFFICULTY_LEVELS = range(1, 6)  # 1-5
+STUDY_CONDITIONS = (1, 2, 3)
+
+
+def _difficulty_fields(topic: str) -> tuple:
+    """Child paths the difficulty analytics read for one topic."""
+    return (
+        'condition',
+        f'sessions/{topic}/question_details',
+        f'sessions/{topic}/difficulty_breakdown',
+    )
+
+
+def aggregate_difficulty_stats(topic: str, all_users: Dict) -> Dict:
+    """
+    Compute every difficulty statistic for a topic in one pass over the users.
+
+    Walks each user's `question_details` and `difficulty_breakdown` once and
+    fills the per-level, per-condition and overall tables together.
+    Returns the same shape as get_all_difficulty_stats().
+    """
+    by_level = {
+        level: {f'condition_{c}': {'correct': 0, 'total': 0} for c in STUDY_CONDITIONS}
+        for level in DIFFICULTY_LEVELS
+    }
+    condition_avgs = {
+        f'condition_{c}': {'correct': [], 'incorrect': []} for c in STUDY_CONDITIONS
+    }
+
+    for user_id, user_data in all_users.items():
+        condition = user_data.get('condition', 0)
+        if condition not in STUDY_CONDITIONS:
+            continue
+        condition_key = f'condition_{condition}'
+
+        session_data = user_data.get('sessions', {}).get(topic, {})
+
+        # Per-level counts
+        for q in session_data.get('question_details', []) or []:
+            level_stats = by_level.get(q.get('difficulty'))
+            if level_stats is None:
+                continue
+            level_stats[condition_key]['total'] += 1
+            if q.get('is_correct'):
+                level_stats[condition_key]['correct'] += 1
+
+        # Overall averages
+        breakdown = session_data.get('difficulty_breakdown', {})
+
+        avg_correct = breakdown.get('average_difficulty_correct', 0)
+        avg_incorrect = breakdown.get('average_difficulty_incorrect', 0)
+
+        if avg_correct > 0:
+            condition_avgs[condition_key]['correct'].append(avg_correct)
+        if avg_incorrect > 0:
+            condition_avgs[condition_key]['incorrect'].append(avg_incorrect)
+
+    # Add percentages
+    for level_stats in by_level.values():
+        for stats in level_stats.values():
+            total = stats['total']
+            stats['percentage'] = round((stats['correct'] / total) * 100, 1) if total > 0 else 0
+
+    # Calculate overall averages
+    overall = {}
+    for condition_key, avgs in condition_avgs.items():
+        overall[condition_key] = {
+            'avg_difficulty_correct': round(sum(avgs['correct']) / len(avgs['correct']), 2) if avgs[
+                'correct'] else 0,
+            'avg_difficulty_incorrect': round(sum(avgs['incorrect']) / len(avgs['incorrect']), 2) if avgs[
+                'incorrect'] else 0,
+            'n_students': len(avgs['correct'])
+        }
+
+    return {
+        'by_difficulty': by_level,
+        'overall': overall
+    }
+
+
 def get_difficulty_stats_by_condition(topic: str, difficulty_level: int) -> Dict:
     """
     Query: How many students answered a specific difficulty level correctly, by condition?
@@ -372,51 +609,17 @@ def get_difficulty_stats_by_condition(topic: str, difficulty_level: int) -> Dict
             'condition_2': {'correct': 12, 'total': 20, 'percentage': 60},
             'condition_3': {'correct': 10, 'total': 20, 'percentage': 50}
         }
-    """
-    try:
-        ref = db.reference('users')
-        all_users = ref.get() or {}
-
-        stats = {
-            'condition_1': {'correct': 0, 'total': 0},
-            'condition_2': {'correct': 0, 'total': 0},
-            'condition_3': {'correct': 0, 'total': 0}
-        }
-
-        for user_id, user_data in all_users.items():
-            condition = user_data.get('condition', 0)
-            if condition not in [1, 2, 3]:
-                continue
-
-            session_data = user_data.get('sessions', {}).get(topic, {})
-            question_details = session_data.get('question_details', [])
 
-            for q in question_details:
-                if q.get('difficulty') == difficulty_level:
-                    stats[f'condition_{condition}']['total'] += 1
-                    if q.get('is_correct'):
-                        stats[f'condition_{condition}']['correct'] += 1
-
-        # Add percentages
-        for condition_key in stats:
-            total = stats[condition_key]['total']
-            if total > 0:
-                stats[condition_key]['percentage'] = round(
-                    (stats[condition_key]['correct'] / total) * 100, 1
-                )
-            else:
-                stats[condition_key]['percentage'] = 0
-
-        return stats
-
-    except Exception as e:
-        print(f"Error getting difficulty stats: {e}")
-        return {}
+    To get several levels, call get_all_difficulty_stats() once instead.
+    """
+    return get_all_difficulty_stats(topic)['by_difficulty'].get(difficulty_level, {})
 
 
 def get_all_difficulty_stats(topic: str) -> Dict:
     """
     Get comprehensive difficulty statistics for a topic.
+    Fetches only condition and quiz difficulty data per user, then
+    aggregates everything in a single pass.
 
     Returns:
         {
@@ -432,56 +635,17 @@ def get_all_difficulty_stats(topic: str) -> Dict:
             }
         }
     """
-    result = {
-        'by_difficulty': {},
-        'overall': {}
-    }
-
-    # Get stats for each difficulty level
-    for difficulty in range(1, 6):  # 1-5
-        result['by_difficulty'][difficulty] = get_difficulty_stats_by_condition(topic, difficulty)
-
-    # Get overall averages
     try:
-        ref = db.reference('users')
-        all_users = ref.get() or {}
+        all_users = fetch_all_users(fields=_difficulty_fields(topic))
 
-        condition_avgs = {
-            'condition_1': {'correct': [], 'incorrect': []},
-            'condition_2': {'correct': [], 'incorrect': []},
-            'condition_3': {'correct': [], 'incorrect': []}
-        }
-
-        for user_id, user_data in all_users.items():
-            condition = user_data.get('condition', 0)
-            if condition not in [1, 2, 3]:
-                continue
-
-            session_data = user_data.get('sessions', {}).get(topic, {})
-            breakdown = session_data.get('difficulty_breakdown', {})
-
-            avg_correct = breakdown.get('average_difficulty_correct', 0)
-            avg_incorrect = breakdown.get('average_difficulty_incorrect', 0)
-
-            if avg_correct > 0:
-                condition_avgs[f'condition_{condition}']['correct'].append(avg_correct)
-            if avg_incorrect > 0:
-                condition_avgs[f'condition_{condition}']['incorrect'].append(avg_incorrect)
-
-        # Calculate overall averages
-        for condition_key, avgs in condition_avgs.items():
-            result['overall'][condition_key] = {
-                'avg_difficulty_correct': round(sum(avgs['correct']) / len(avgs['correct']), 2) if avgs[
-                    'correct'] else 0,
-                'avg_difficulty_incorrect': round(sum(avgs['incorrect']) / len(avgs['incorrect']), 2) if avgs[
-                    'incorrect'] else 0,
-                'n_students': len(avgs['correct'])
-            }
+        return aggregate_difficulty_stats(topic, all_users)
 
     except Exception as e:
-        print(f"Error calculating overall stats: {e}")
-
-    return result
+        print(f"Error getting difficulty stats: {e}")
+        return {
+            'by_difficulty': {},
+            'overall': {}
+        }
 
 
 def export_difficulty_data_csv(topic: str, output_file: str = None):
@@ -493,12 +657,11 @@ def export_difficulty_data_csv(topic: str, output_file: str = None):
     import pandas as pd
 
     try:
-        ref = db.reference('users')
-        all_users = ref.get() or {}
+        all_users = fetch_all_users(fields=('email',) + _difficulty_fields(topic))
 
         rows = []
 
-        for user_id, user_data in all_users.items():
+        for user_id, user_data in sorted(all_users.items()):
             email = user_data.get('email', '')
             condition = user_data.get('condition', 0)
 
@@ -0,0 +1,168 @@
+"""
+Parallel User Fetch Engine
+Admin-wide reads without one giant `users` download: list user ids with a
+shallow query, then fetch per-user subtrees concurrently from a bounded
+thread pool. Callers can ask for only the child paths they need (skipping
+transcripts) and consume users as a stream.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from firebase_admin import db
+
+from utils.config import SESSIONS, FETCH_MAX_WORKERS
+
+SESSION_IDS = [s['id'] for s in SESSIONS.values()]
+
+# ---------------------------------------------------------------------------
+# Field presets
+#
+# `shallow` paths are fetched with a shallow query: scalar children come back
+# with their values, nested objects come back as True (not downloaded).
+# `fields` paths are fetched in full. '{session}' expands to every session id.
+# ---------------------------------------------------------------------------
+
+# Email, condition and every scalar session field (status, times, counts,
+# quiz score) - no messages
+USER_OVERVIEW = {
+    'shallow': ('', 'sessions/{session}'),
+    'fields': (),
+}
+
+# Everything the summary export needs - still no messages
+USER_SUMMARY = {
+    'shallow': ('', 'sessions/{session}'),
+    'fields': ('sessions/{session}/scaffold_progress', 'sessions/{session}/survey_responses'),
+}
+
+
+def list_user_ids() -> List[str]:
+    """All user ids, from one shallow query."""
+    return list(db.reference('users').get(shallow=True) or {})
+
+
+def _expand(paths: Iterable[str]) -> List[str]:
+    expanded = []
+    for path in paths:
+        if '{session}' in path:
+            expanded.extend(path.format(session=session_id) for session_id in SESSION_IDS)
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def _place(target: Dict, path: str, value) -> None:
+    """Set `value` at a '/'-separated path inside `target`, merging dicts."""
+    parts = [p for p in path.split('/') if p]
+    if not parts:
+        if isinstance(value, dict):
+            target.update(value)
+        return
+
+    node = target
+    for part in parts[:-1]:
+        child = node.get(part)
+        if not isinstance(child, dict):
+            child = {}
+            node[part] = child
+        node = child
+
+    existing = node.get(parts[-1])
+    if isinstance(existing, dict) and isinstance(value, dict):
+        existing.update(value)
+    else:
+        node[parts[-1]] = value
+
+
+def fetch_user(user_id: str, fields: Optional[Iterable[str]] = None,
+               shallow: Iterable[str] = ()) -> Optional[Dict]:
+    """
+    Fetch one user's data.
+
+    With no `fields` or `shallow` paths, returns the full subtree. Otherwise
+    returns a dict holding only the requested paths. Returns None if the
+    user doesn't exist.
+    """
+    base = f'users/{user_id}'
+
+    if fields is None and not shallow:
+        return db.reference(base).get()
+
+    user_data: Dict = {}
+
+    for path in _expand(shallow):
+        value = db.reference(f'{base}/{path}' if path else base).get(shallow=True)
+        if value is None:
+            if not path:
+                return None
+            continue
+        _place(user_data, path, value)
+
+    requested = _expand(fields or ())
+    for path in requested:
+        value = db.reference(f'{base}/{path}').get()
+        if value is not None:
+            _place(user_data, path, value)
+
+    # A shallow placeholder on the way to a requested path that wasn't there
+    # (e.g. `sessions` when only one session exists) becomes an empty dict,
+    # so callers can keep using .get() on it
+    for path in _expand(shallow) + requested:
+        parts = [p for p in path.split('/') if p]
+        node = user_data
+        for part in parts[:-1]:
+            if node.get(part) is True:
+                node[part] = {}
+            node = node.get(part)
+            if not isinstance(node, dict):
+                break
+
+    return user_data or None
+
+
+def iter_user_subtrees(fields: Optional[Iterable[str]] = None, shallow: Iterable[str] = (),
+                       max_workers: int = FETCH_MAX_WORKERS,
+                       user_ids: Optional[List[str]] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yield (user_id, user_data) as each user's fetch completes.
+
+    At most `max_workers` requests run at once, and at most twice that many
+    users are in flight, so memory stays bounded however many users exist.
+    Order is completion order, not key order.
+    """
+    if user_ids is None:
+        user_ids = list_user_ids()
+    fields = list(fields) if fields is not None else None
+    shallow = list(shallow)
+
+    pending_ids = iter(user_ids)
+    window = max_workers * 2
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="user-fetch") as pool:
+        in_flight = {}
+
+        def submit_next() -> bool:
+            user_id = next(pending_ids, None)
+            if user_id is None:
+                return False
+            in_flight[pool.submit(fetch_user, user_id, fields, shallow)] = user_id
+            return True
+
+        while len(in_flight) < window and submit_next():
+            pass
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                user_id = in_flight.pop(future)
+                submit_next()
+                user_data = future.result()
+                if user_data:
+                    yield user_id, user_data
+
+
+def fetch_all_users(fields: Optional[Iterable[str]] = None, shallow: Iterable[str] = (),
+                    max_workers: int = FETCH_MAX_WORKERS) -> Dict[str, Dict]:
+    """Collect iter_user_subtrees() into a {user_id: user_data} dict."""
+    return dict(iter_user_subtrees(fields, shallow, max_workers))
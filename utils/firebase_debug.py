@@ -6,6 +6,8 @@ Use this to verify data is being saved correctly
 import streamlit as st
 from firebase_admin import db
 import json
+from utils.database import ordered_children
+from utils.fetch_engine import fetch_all_users, fetch_user, list_user_ids, USER_OVERVIEW
 from datetime import datetime
 
 
@@ -79,8 +81,8 @@ def view_all_users_summary():
     st.subheader("👥 All Users Summary")
 
     try:
-        ref = db.reference('users')
-        all_users = ref.get() or {}
+        # Scalar fields only - no transcripts
+        all_users = dict(sorted(fetch_all_users(**USER_OVERVIEW).items()))
 
         if not all_users:
             st.warning("No users in database yet")
@@ -133,7 +135,7 @@ def view_session_messages(user_id: str, session_id: str):
 
     try:
         ref = db.reference(f'users/{user_id}/sessions/{session_id}/messages')
-        messages = ref.get() or []
+        messages = ordered_children(ref.get())
 
         if not messages:
             st.warning("No messages in this session yet")
@@ -207,16 +209,15 @@ def check_data_structure():
     st.subheader("🏗️ Data Structure Verification")
 
     try:
-        ref = db.reference('users')
-        all_users = ref.get() or {}
+        user_ids = list_user_ids()
 
-        if not all_users:
+        if not user_ids:
             st.info("No users yet - database structure cannot be verified")
             return
 
-        # Pick first user to check structure
-        first_user_id = list(all_users.keys())[0]
-        first_user = all_users[first_user_id]
+        # Pick first user to check structure - only that user is downloaded
+        first_user_id = user_ids[0]
+        first_user = fetch_user(first_user_id) or {}
 
         st.write("**Expected Structure:**")
         expected = {
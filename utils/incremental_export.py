@@ -0,0 +1,305 @@
+"""
+Incremental Export
+Exports only what changed since the last checkpoint instead of
+re-downloading the whole users tree on every click.
+
+The manifest (checkpoints + list of partitions) lives in RTDB at
+EXPORT_MANIFEST_PATH, next to the `completion_log` it tracks, so it
+survives restarts and redeploys. Partition files live under EXPORT_DIR:
+
+    summary/part-00001.csv        completed sessions, one row per session
+    messages/part-00001.csv.gz    messages, one row per message
+
+EXPORT_DIR should be persistent storage. If partition files listed in the
+manifest go missing, that table's checkpoint is reset and the next run is
+a full walk again, so no rows are lost from the bundle.
+
+The first run of each export is a full walk; later runs read the small
+`completion_log` / `session_activity` indexes and fetch only new data.
+Rows are keyed by user_id + topic (+ message_number); if a partition
+repeats a row, the later partition wins.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import time
+import zipfile
+from typing import Dict, List, Optional
+
+from firebase_admin import db
+
+from utils.config import EXPORT_DIR, EXPORT_ACTIVITY_OVERLAP
+from utils.data_export import DETAILED_FIELDNAMES, SUMMARY_FIELDNAMES
+from utils.fetch_engine import iter_user_subtrees, USER_SUMMARY
+from utils.database import (
+    COMPLETION_LOG_PATH, EXPORT_MANIFEST_PATH, SESSION_ACTIVITY_PATH,
+    build_summary_row, iter_users, ordered_child_items
+)
+
+MANIFEST_FILE = 'manifest.json'  # Name of the manifest copy inside the bundle
+
+
+# ============================================================================
+# MANIFEST
+# ============================================================================
+
+def _empty_table(table: str) -> Dict:
+    if table == 'messages':
+        return {'checkpoint': None, 'sessions': {}, 'partitions': []}
+    return {'checkpoint': None, 'partitions': []}
+
+
+def _empty_manifest() -> Dict:
+    return {
+        'summary': _empty_table('summary'),
+        'messages': _empty_table('messages'),
+        'users': {},
+    }
+
+
+def _as_list(value) -> List:
+    # RTDB returns a list for 0..n keys, but a dict once any index is missing
+    if isinstance(value, dict):
+        return [value[k] for k in sorted(value, key=int)]
+    return [v for v in (value or []) if v is not None]
+
+
+def load_manifest(export_dir: str = EXPORT_DIR) -> Dict:
+    """
+    Read the manifest from RTDB, or start a new one if none exists yet.
+    A table whose partition files are missing from export_dir starts over.
+    """
+    stored = db.reference(EXPORT_MANIFEST_PATH).get() or {}
+    manifest = _empty_manifest()
+    manifest['users'] = stored.get('users') or {}
+
+    for table in ('summary', 'messages'):
+        state = manifest[table]
+        # RTDB drops None values and empty containers, so fill them back in
+        state.update(stored.get(table) or {})
+        state.setdefault('checkpoint', None)
+        state['partitions'] = _as_list(state.get('partitions'))
+        if table == 'messages':
+            state['sessions'] = state.get('sessions') or {}
+
+        if any(not os.path.exists(os.path.join(export_dir, p['file'])) for p in state['partitions']):
+            print(f"Export partitions missing from {export_dir}; "
+                  f"the next {table} export is a full walk")
+            manifest[table] = _empty_table(table)
+
+    return manifest
+
+
+def _save_manifest(manifest: Dict) -> None:
+    # One set() so the checkpoint and its partition list always move together
+    db.reference(EXPORT_MANIFEST_PATH).set(manifest)
+
+
+def _write_partition(export_dir: str, table: str, fieldnames: List[str],
+                     rows: List[Dict], compress: bool, partitions: List[Dict],
+                     high_water) -> Optional[Dict]:
+    """Write rows as the next numbered partition of a table and record it."""
+    if not rows:
+        return None
+
+    os.makedirs(os.path.join(export_dir, table), exist_ok=True)
+    extension = 'csv.gz' if compress else 'csv'
+    relative = f'{table}/part-{len(partitions) + 1:05d}.{extension}'
+
+    opener = gzip.open if compress else open
+    with opener(os.path.join(export_dir, relative), 'wt', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    partition = {
+        'file': relative,
+        'rows': len(rows),
+        'created': time.time(),
+        'high_water': high_water,
+    }
+    partitions.append(partition)
+    return partition
+
+
+def _user_meta(manifest: Dict, user_id: str, user_data: Optional[Dict] = None) -> Dict:
+    """Email/condition for a user, remembered in the manifest between runs."""
+    users = manifest.setdefault('users', {})
+    if user_id not in users:
+        if user_data is None:
+            user_data = {
+                field: db.reference(f'users/{user_id}/{field}').get()
+                for field in ('email', 'condition', 'condition_name')
+            }
+        users[user_id] = {
+            'email': user_data.get('email') or '',
+            'condition': user_data.get('condition') or 0,
+            'condition_name': user_data.get('condition_name') or '',
+        }
+    return users[user_id]
+
+
+# ============================================================================
+# SUMMARY (completed sessions)
+# ============================================================================
+
+def export_summary_increment(export_dir: str = EXPORT_DIR) -> Optional[Dict]:
+    """
+    Append sessions completed since the last checkpoint as a new partition.
+    Returns the new partition entry, or None if nothing new was completed.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    manifest = load_manifest(export_dir)
+    state = manifest['summary']
+    log_ref = db.reference(COMPLETION_LOG_PATH)
+    rows = []
+
+    if state['checkpoint'] is None:
+        # First run: take the checkpoint first, then walk everything, so a
+        # completion landing mid-walk is repeated next time rather than lost
+        latest = log_ref.order_by_key().limit_to_last(1).get() or {}
+        checkpoint = next(iter(latest), '')
+
+        for user_id, user_data in iter_user_subtrees(**USER_SUMMARY):
+            meta = _user_meta(manifest, user_id, user_data)
+            for session_id, session_data in (user_data.get('sessions') or {}).items():
+                if session_data.get('status') == 'completed':
+                    rows.append(build_summary_row(user_id, meta, session_id, session_data))
+    else:
+        checkpoint = state['checkpoint']
+        query = log_ref.order_by_key()
+        if checkpoint:
+            query = query.start_at(checkpoint)
+        entries = query.get() or {}
+
+        for key, entry in entries.items():
+            if key == checkpoint:
+                continue
+            checkpoint = max(checkpoint, key)
+
+            user_id, session_id = entry['user_id'], entry['session_id']
+            session_data = db.reference(f'users/{user_id}/sessions/{session_id}').get() or {}
+            if session_data.get('status') == 'completed':
+                meta = _user_meta(manifest, user_id)
+                rows.append(build_summary_row(user_id, meta, session_id, session_data))
+
+    high_water = max((row['session_end'] or 0 for row in rows), default=None)
+    partition = _write_partition(
+        export_dir, 'summary', SUMMARY_FIELDNAMES, rows,
+        compress=False, partitions=state['partitions'], high_water=high_water
+    )
+
+    state['checkpoint'] = checkpoint
+    _save_manifest(manifest)
+    return partition
+
+
+# ============================================================================
+# MESSAGES
+# ============================================================================
+
+def _message_rows(user_id: str, meta: Dict, session_id: str, items, start_number: int) -> List[Dict]:
+    return [
+        {
+            'user_id': user_id,
+            'email': meta['email'],
+            'condition': meta['condition'],
+            'condition_name': meta['condition_name'],
+            'topic': session_id,
+            'message_number': start_number + i + 1,
+            'role': msg.get('role', ''),
+            'content': msg.get('content', ''),
+            'timestamp': msg.get('timestamp', ''),
+            'step': msg.get('step', '')
+        }
+        for i, (_, msg) in enumerate(items)
+    ]
+
+
+def export_messages_increment(export_dir: str = EXPORT_DIR) -> Optional[Dict]:
+    """
+    Append messages written since the last checkpoint as a new partition.
+
+    Each session remembers the last message key exported; sessions are
+    revisited only if `session_activity` shows a message newer than the
+    checkpoint (minus EXPORT_ACTIVITY_OVERLAP for late-flushed writes).
+    Returns the new partition entry, or None if there were no new messages.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    manifest = load_manifest(export_dir)
+    state = manifest['messages']
+    sessions_state = state['sessions']
+    rows = []
+
+    def take(user_id, meta, session_id, items):
+        # Nested by user: '/' isn't allowed in an RTDB key
+        user_sessions = sessions_state.setdefault(user_id, {})
+        previous = user_sessions.get(session_id, {'last_key': None, 'count': 0})
+        if previous.get('last_key') is not None:
+            items = [(k, m) for k, m in items if k != previous['last_key']]
+        if not items:
+            return
+        rows.extend(_message_rows(user_id, meta, session_id, items, previous['count']))
+        user_sessions[session_id] = {
+            'last_key': items[-1][0],
+            'count': previous['count'] + len(items),
+        }
+
+    # Activity index is one small node: a timestamp per session
+    activity = db.reference(SESSION_ACTIVITY_PATH).get() or {}
+    high_water = max(
+        (ts for sessions in activity.values() for ts in (sessions or {}).values()),
+        default=state['checkpoint']
+    )
+
+    if state['checkpoint'] is None:
+        # First run: full walk
+        for user_id, user_data in iter_users():
+            meta = _user_meta(manifest, user_id, user_data)
+            for session_id, session_data in (user_data.get('sessions') or {}).items():
+                take(user_id, meta, session_id, ordered_child_items(session_data.get('messages')))
+    else:
+        since = state['checkpoint'] - EXPORT_ACTIVITY_OVERLAP
+
+        for user_id, sessions in activity.items():
+            for session_id, last_activity in (sessions or {}).items():
+                if last_activity < since:
+                    continue
+
+                ref = db.reference(f'users/{user_id}/sessions/{session_id}/messages')
+                last_key = sessions_state.get(user_id, {}).get(session_id, {}).get('last_key')
+                raw = ref.order_by_key().start_at(last_key).get() if last_key else ref.get()
+
+                take(user_id, _user_meta(manifest, user_id), session_id, ordered_child_items(raw))
+
+    partition = _write_partition(
+        export_dir, 'messages', DETAILED_FIELDNAMES, rows,
+        compress=True, partitions=state['partitions'], high_water=high_water
+    )
+
+    state['checkpoint'] = high_water if high_water is not None else time.time()
+    _save_manifest(manifest)
+    return partition
+
+
+# ============================================================================
+# BUNDLING
+# ============================================================================
+
+def bundle_partitions(export_dir: str = EXPORT_DIR) -> bytes:
+    """Zip the manifest and every partition for download."""
+    manifest = load_manifest(export_dir)
+    buffer = io.BytesIO()
+
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        bundle.writestr(MANIFEST_FILE, json.dumps(manifest, indent=2))
+        for table in ('summary', 'messages'):
+            for partition in manifest[table]['partitions']:
+                path = os.path.join(export_dir, partition['file'])
+                if os.path.exists(path):
+                    bundle.write(path, arcname=partition['file'])
+
+    return buffer.getvalue()
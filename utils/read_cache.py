@@ -0,0 +1,106 @@
+"""
+Request-Scoped Read Cache
+Read-through cache for Firebase lookups that lives for one Streamlit
+script run. Each rerun touches a database path at most once; writes made
+through utils/database.py and utils/auth.py invalidate what they change.
+"""
+
+import copy
+import threading
+from typing import Any, Dict
+
+# Streamlit executes each session's script runs on that session's own
+# script thread, one run at a time, so thread-local state is run-scoped
+# once begin_run() resets it at the top of every run.
+_local = threading.local()
+
+
+def _normalize(path: str) -> str:
+    return path.strip('/')
+
+
+def _cache() -> Dict[str, Any]:
+    return _local.__dict__.setdefault('cache', {})
+
+
+def _is_active() -> bool:
+    return getattr(_local, 'active', False)
+
+
+def begin_run() -> None:
+    """Start a fresh cache for this script run. Call once at the top of main()."""
+    _local.cache = {}
+    _local.reads = 0
+    _local.active = True
+
+
+def get_read_count() -> int:
+    """Number of database reads issued through the cache in the current run."""
+    return getattr(_local, 'reads', 0)
+
+
+def _lookup(path: str):
+    """Return (hit, value) from the cache, resolving through cached ancestors."""
+    cache = _cache()
+    if path in cache:
+        return True, cache[path]
+
+    parts = path.split('/')
+    for i in range(len(parts) - 1, 0, -1):
+        ancestor = '/'.join(parts[:i])
+        if ancestor not in cache:
+            continue
+
+        value = cache[ancestor]
+        for part in parts[i:]:
+            if isinstance(value, dict):
+                value = value.get(part)
+            elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+                value = value[int(part)]
+            else:
+                value = None
+                break
+        return True, value
+
+    return False, None
+
+
+def cached_get(path: str) -> Any:
+    """
+    Read `path`, at most once per script run.
+    Outside a script run (background threads, CLI scripts) this is a plain read.
+    """
+    from firebase_admin import db  # Not at import time: app.py loads this module before login
+
+    path = _normalize(path)
+
+    if not _is_active():
+        return db.reference(path).get()
+
+    hit, value = _lookup(path)
+    if not hit:
+        value = db.reference(path).get()
+        _local.reads = get_read_count() + 1
+        _cache()[path] = value
+
+    # Callers may mutate what they get back; keep the cached copy clean
+    return copy.deepcopy(value)
+
+
+def prime(path: str, value: Any) -> None:
+    """Seed the cache with a value already fetched elsewhere in this run."""
+    if _is_active():
+        _cache()[_normalize(path)] = copy.deepcopy(value)
+
+
+def invalidate(path: str) -> None:
+    """Drop `path`, its ancestors and its descendants after a write."""
+    if not _is_active():
+        return
+
+    path = _normalize(path)
+    cache = _cache()
+    for key in list(cache):
+        if (key == path or key.startswith(path + '/')
+                or path.startswith(key + '/') or key == ''):
+            del cache[key]
@@ -0,0 +1,220 @@
+"""
+Research Table Export
+Typed, columnar exports (Parquet / Feather) and compressed JSONL for the
+analysis notebooks. Data is split into separate tables that join on
+user_id + topic:
+
+    sessions  - one row per session (timing, counts, quiz score)
+    survey    - one row per submitted survey, one column per question
+    quiz      - one row per quiz question answered
+    messages  - one row per conversation message
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import zipfile
+from typing import Dict, List
+
+from content.survey import SURVEY_QUESTIONS
+from utils.database import iter_users, ordered_children
+
+EXPORT_FORMATS = {
+    'parquet': 'Parquet',
+    'feather': 'Feather (Arrow IPC)',
+    'jsonl': 'JSONL (gzip)',
+}
+
+# Column dtypes for the columnar formats. Epoch-second columns are
+# converted to UTC datetimes; everything else maps to a pandas dtype.
+TABLE_SCHEMAS = {
+    'sessions': {
+        'user_id': 'string',
+        'email': 'string',
+        'condition': 'Int64',
+        'condition_name': 'string',
+        'topic': 'string',
+        'status': 'string',
+        'start_time': 'datetime',
+        'end_time': 'datetime',
+        'duration_seconds': 'float64',
+        'total_messages': 'Int64',
+        'user_messages': 'Int64',
+        'assistant_messages': 'Int64',
+        'scaffold_steps_completed': 'Int64',
+        'quiz_score': 'Int64',
+        'quiz_total': 'Int64',
+        'quiz_percentage': 'float64',
+        'quiz_completed_time': 'datetime',
+    },
+    'survey': {
+        'user_id': 'string',
+        'topic': 'string',
+        'condition': 'Int64',
+        'survey_completed_time': 'datetime',
+        **{key: 'string' for key in SURVEY_QUESTIONS},
+    },
+    'quiz': {
+        'user_id': 'string',
+        'topic': 'string',
+        'condition': 'Int64',
+        'question_number': 'Int64',
+        'difficulty': 'Int64',
+        'is_correct': 'boolean',
+        'user_answer': 'string',
+    },
+    'messages': {
+        'user_id': 'string',
+        'topic': 'string',
+        'condition': 'Int64',
+        'message_number': 'Int64',
+        'role': 'string',
+        'content': 'string',
+        'timestamp': 'datetime',
+        'step': 'string',
+    },
+}
+
+
+def collect_research_tables() -> Dict[str, List[Dict]]:
+    """
+    Walk every user once and split their data into the research tables.
+    Returns {table_name: [row, ...]} with raw (JSON-compatible) values.
+    """
+    tables = {name: [] for name in TABLE_SCHEMAS}
+
+    for user_id, user_data in iter_users():
+        email = user_data.get('email', '')
+        condition = user_data.get('condition')
+        condition_name = user_data.get('condition_name', '')
+
+        for topic, session_data in (user_data.get('sessions') or {}).items():
+            keys = {'user_id': user_id, 'topic': topic}
+
+            tables['sessions'].append({
+                **keys,
+                'email': email,
+                'condition': condition,
+                'condition_name': condition_name,
+                'status': session_data.get('status'),
+                'start_time': session_data.get('start_time'),
+                'end_time': session_data.get('end_time'),
+                'duration_seconds': session_data.get('duration_seconds'),
+                'total_messages': session_data.get('total_messages'),
+                'user_messages': session_data.get('user_messages'),
+                'assistant_messages': session_data.get('assistant_messages'),
+                'scaffold_steps_completed': len(ordered_children(session_data.get('scaffold_progress'))),
+                'quiz_score': session_data.get('quiz_score'),
+                'quiz_total': session_data.get('quiz_total'),
+                'quiz_percentage': session_data.get('quiz_percentage'),
+                'quiz_completed_time': session_data.get('quiz_completed_time'),
+            })
+
+            survey = session_data.get('survey_responses')
+            if survey:
+                tables['survey'].append({
+                    **keys,
+                    'condition': condition,
+                    'survey_completed_time': session_data.get('survey_completed_time'),
+                    **{key: survey.get(key) for key in SURVEY_QUESTIONS},
+                })
+
+            for q in session_data.get('question_details') or []:
+                if not q:
+                    continue
+                tables['quiz'].append({
+                    **keys,
+                    'condition': condition,
+                    'question_number': q.get('question_number'),
+                    'difficulty': q.get('difficulty'),
+                    'is_correct': q.get('is_correct'),
+                    'user_answer': q.get('user_answer'),
+                })
+
+            for i, msg in enumerate(ordered_children(session_data.get('messages'))):
+                tables['messages'].append({
+                    **keys,
+                    'condition': condition,
+                    'message_number': i + 1,
+                    'role': msg.get('role'),
+                    'content': msg.get('content'),
+                    'timestamp': msg.get('timestamp'),
+                    'step': msg.get('step'),
+                })
+
+    return tables
+
+
+def to_dataframe(table: str, rows: List[Dict]):
+    """Build a DataFrame for a table with the dtypes from TABLE_SCHEMAS."""
+    import pandas as pd
+
+    schema = TABLE_SCHEMAS[table]
+    df = pd.DataFrame(rows, columns=list(schema))
+
+    for column, dtype in schema.items():
+        if dtype == 'datetime':
+            df[column] = pd.to_datetime(pd.to_numeric(df[column], errors='coerce'), unit='s', utc=True)
+        elif dtype in ('Int64', 'float64'):
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(dtype)
+        else:
+            df[column] = df[column].astype(dtype)
+
+    return df
+
+
+def _write_table(table: str, rows: List[Dict], fmt: str, directory: str) -> str:
+    """Write one table in the given format and return its file path."""
+    if fmt == 'jsonl':
+        path = os.path.join(directory, f'{table}.jsonl.gz')
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+        return path
+
+    df = to_dataframe(table, rows)
+
+    if fmt == 'parquet':
+        path = os.path.join(directory, f'{table}.parquet')
+        df.to_parquet(path, index=False, compression='zstd')
+    elif fmt == 'feather':
+        path = os.path.join(directory, f'{table}.feather')
+        df.to_feather(path, compression='zstd')
+    else:
+        raise ValueError(f"Unknown export format '{fmt}'. Available: {list(EXPORT_FORMATS)}")
+
+    return path
+
+
+def export_research_tables(fmt: str = 'parquet') -> str:
+    """
+    Export all research tables in one format, bundled into a zip file.
+
+    Args:
+        fmt: 'parquet', 'feather' or 'jsonl'
+
+    Returns:
+        Path of the zip file - the caller removes it
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'. Available: {list(EXPORT_FORMATS)}")
+
+    tables = collect_research_tables()
+
+    handle, zip_path = tempfile.mkstemp(prefix='research_tables_', suffix='.zip')
+    os.close(handle)
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            # Members are already compressed, so store them as-is
+            with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as bundle:
+                for table, rows in tables.items():
+                    path = _write_table(table, rows, fmt, directory)
+                    bundle.write(path, arcname=os.path.basename(path))
+    except BaseException:
+        # Don't leave a partial zip behind in the temp dir
+        os.remove(zip_path)
+        raise
+
+    return zip_path
@@ -0,0 +1,134 @@
+"""
+Study Statistics
+Process-wide cache of the participant and completion counts shown on the
+admin pages. Recomputed when older than STATS_TTL_SECONDS or after a
+completion / condition assignment marks it stale - not on every rerun.
+"""
+
+import threading
+import time
+from typing import Dict
+
+import streamlit as st
+
+from utils.config import SESSIONS, STATS_TTL_SECONDS
+from utils.fetch_engine import iter_user_subtrees, USER_OVERVIEW
+
+STATS_CONDITIONS = (1, 2, 3)
+
+
+def compute_study_stats() -> Dict:
+    """Walk every user's scalar fields once and build all the admin counts."""
+    session_ids = [s['id'] for s in SESSIONS.values()]
+
+    stats = {
+        'total_users': 0,
+        'total_students': 0,
+        'condition_counts': {c: 0 for c in STATS_CONDITIONS},
+        'student_condition_counts': {c: 0 for c in STATS_CONDITIONS},
+        'completed': {session_id: 0 for session_id in session_ids},
+        'completed_all': 0,
+        # Per condition: users, and completions of each session
+        'by_condition': {
+            c: {'users': 0, 'completed': {session_id: 0 for session_id in session_ids}}
+            for c in STATS_CONDITIONS
+        },
+    }
+
+    for user_id, user_data in iter_user_subtrees(**USER_OVERVIEW):
+        stats['total_users'] += 1
+        is_admin = user_data.get('is_admin', False)
+        if not is_admin:
+            stats['total_students'] += 1
+
+        condition = user_data.get('condition', 0)
+        if condition in STATS_CONDITIONS:
+            stats['condition_counts'][condition] += 1
+            stats['by_condition'][condition]['users'] += 1
+            if not is_admin:
+                stats['student_condition_counts'][condition] += 1
+
+        sessions = user_data.get('sessions', {})
+        done = [
+            session_id for session_id in session_ids
+            if sessions.get(session_id, {}).get('status') == 'completed'
+        ]
+
+        for session_id in done:
+            stats['completed'][session_id] += 1
+            if condition in STATS_CONDITIONS:
+                stats['by_condition'][condition]['completed'][session_id] += 1
+        if len(done) == len(session_ids):
+            stats['completed_all'] += 1
+
+    stats['as_of'] = time.time()
+    return stats
+
+
+class StudyStatsCache:
+    """Holds the latest stats; recomputes at most once at a time."""
+
+    def __init__(self, ttl: float = STATS_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = None
+        self._stale = True
+
+    def invalidate(self):
+        self._stale = True
+
+    def get(self, force_refresh: bool = False) -> Dict:
+        if not force_refresh and not self._needs_refresh():
+            return self._stats
+
+        with self._lock:
+            # Another session may have refreshed while we waited
+            if force_refresh or self._needs_refresh():
+                self._stale = False
+                try:
+                    self._stats = compute_study_stats()
+                except Exception:
+                    self._stale = True
+                    raise
+            return self._stats
+
+    def _needs_refresh(self) -> bool:
+        return (
+            self._stale
+            or self._stats is None
+            or time.time() - self._stats['as_of'] > self.ttl
+        )
+
+
+@st.cache_resource(show_spinner=False)
+def get_study_stats_cache() -> StudyStatsCache:
+    """Process-wide stats cache, shared by all admin sessions."""
+    return StudyStatsCache()
+
+
+def get_study_stats(force_refresh: bool = False) -> Dict:
+    """Cached study statistics; see compute_study_stats() for the shape."""
+    return get_study_stats_cache().get(force_refresh)
+
+
+def invalidate_study_stats():
+    """Mark the stats stale after a write that changes them."""
+    try:
+        get_study_stats_cache().invalidate()
+    except Exception as e:
+        print(f"WARNING: could not invalidate study stats: {e}")
+
+
+def render_study_stats_header(key: str) -> Dict:
+    """Refresh button + "as of" caption; returns the (possibly refreshed) stats."""
+    col1, col2 = st.columns([4, 1])
+    with col2:
+        refresh = st.button("🔄 Refresh", key=f"{key}_refresh_stats")
+
+    stats = get_study_stats(force_refresh=refresh)
+
+    with col1:
+        as_of = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats['as_of']))
+        st.caption(f"As of {as_of} (refreshes every {STATS_TTL_SECONDS // 60} min or after new completions)")
+
+    return stats
@@ -0,0 +1,45 @@
+"""
+Token Counting
+Approximate prompt sizes in model tokens. Uses tiktoken when it's
+installed, otherwise ~4 characters per token.
+"""
+
+from functools import lru_cache
+
+TOKEN_ENCODING = 'o200k_base'  # gpt-4o / gpt-4o-mini
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _encoder():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception:
+        # Not installed, or the encoding can't be downloaded
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in `text` (estimated if tiktoken is unavailable)."""
+    if not text:
+        return 0
+    encoder = _encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def tokens_exact() -> bool:
+    """True when counts come from the real tokenizer."""
+    return _encoder() is not None
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = " …[truncated]") -> str:
+    """Clip `text` to about `max_tokens` tokens, keeping the start."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoder = _encoder()
+    if encoder is not None:
+        return encoder.decode(encoder.encode(text, disallowed_special=())[:max_tokens]) + marker
+    return text[:max_tokens * CHARS_PER_TOKEN] + marker
@@ -0,0 +1,320 @@
+"""
+Write-Behind Buffer
+Batches tutoring telemetry (messages, scaffold progress) into multi-path
+Firebase updates flushed on a background thread, so database latency
+stays off the critical path of each chat turn.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import streamlit as st
+from firebase_admin import db
+
+from utils.config import (
+    WRITE_BUFFER_MAX_BATCH, WRITE_BUFFER_FLUSH_INTERVAL,
+    WRITE_BUFFER_MAX_RETRIES, WRITE_BUFFER_RETRY_BACKOFF, WRITE_BUFFER_MAX_BACKOFF,
+    WRITE_BUFFER_DEAD_LETTER_NODE, WRITE_BUFFER_DEAD_LETTER_PATH,
+    WRITE_BUFFER_REQUEST_FLUSH_TIMEOUT
+)
+
+# Firebase error codes for a request the database answered and refused:
+# sending the same write again can't succeed
+_REJECTED_CODES = frozenset({
+    'INVALID_ARGUMENT', 'FAILED_PRECONDITION', 'OUT_OF_RANGE',
+    'PERMISSION_DENIED', 'NOT_FOUND', 'ALREADY_EXISTS', 'CONFLICT',
+})
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    True for errors worth retrying (network, timeout, 5xx, 429); False when
+    the database rejected the write itself (rules, validation, bad value).
+    """
+    if isinstance(error, (ValueError, TypeError)):
+        return False  # Raised by the SDK for values it can't send
+    status = getattr(getattr(error, 'http_response', None), 'status_code', None)
+    if status is not None:
+        return status in (408, 429) or status >= 500
+    return getattr(error, 'code', None) not in _REJECTED_CODES
+
+
+class Increment:
+    """Queued server-side increment; increments to one path in a batch are summed."""
+
+    __slots__ = ('amount',)
+
+    def __init__(self, amount: int = 1) -> None:
+        self.amount = amount
+
+
+class WriteBehindBuffer:
+    """
+    Per-process queue of pending writes.
+
+    Each write is a (path, value) pair. Pending writes are merged into one
+    multi-path `update()` on the database root. A flush happens when the
+    queue reaches `max_batch` writes or `flush_interval` seconds pass,
+    whichever comes first.
+
+    While the database is unreachable, writes stay queued and the worker
+    backs off (doubling, up to `max_backoff`), so an outage delays writes
+    but never drops them. A batch the database rejects is written one path
+    at a time; only the writes it rejects again are dead-lettered (see
+    replay_dead_letters), so the rest of the queue keeps draining.
+    """
+
+    def __init__(self, max_batch: int = WRITE_BUFFER_MAX_BATCH,
+                 flush_interval: float = WRITE_BUFFER_FLUSH_INTERVAL,
+                 max_retries: int = WRITE_BUFFER_MAX_RETRIES,
+                 retry_backoff: float = WRITE_BUFFER_RETRY_BACKOFF,
+                 max_backoff: float = WRITE_BUFFER_MAX_BACKOFF,
+                 dead_letter_node: str = WRITE_BUFFER_DEAD_LETTER_NODE,
+                 dead_letter_path: str = WRITE_BUFFER_DEAD_LETTER_PATH) -> None:
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.dead_letter_node = dead_letter_node
+        self.dead_letter_path = dead_letter_path
+
+        self._pending: List[Tuple[str, Any]] = []
+        self._failed_flushes = 0  # Consecutive flushes that found the database unreachable
+        self._retry_at = 0.0  # monotonic time before which the worker doesn't flush
+        self.dead_lettered = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        self._worker = threading.Thread(
+            target=self._run, name="write-behind", daemon=True
+        )
+        self._worker.start()
+
+    def enqueue(self, updates: Dict[str, Any]) -> None:
+        """
+        Queue writes given as {absolute_path: value}.
+        A value of Increment(n) adds n to the number stored at that path.
+        """
+        with self._lock:
+            self._pending.extend(updates.items())
+            full = len(self._pending) >= self.max_batch
+
+        if full:
+            self._wakeup.set()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write everything queued so far.
+        Blocks until done, or for at most `timeout` seconds - use one on the
+        request path. Returns False if writes are still queued (the database
+        is unreachable, or time ran out); they go out on a later flush.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if deadline is not None and time.monotonic() < self._retry_at:
+            return False  # Database down: don't hold up the page, the worker retries
+
+        if not self._flush_lock.acquire(timeout=-1 if timeout is None else timeout):
+            return False  # Another flush (the worker's) is still writing
+
+        try:
+            while True:
+                with self._lock:
+                    batch = self._pending[:self.max_batch]
+                if not batch:
+                    return True
+
+                error = self._write_batch(batch, deadline)
+                if error is not None:
+                    if is_retryable(error):
+                        self._back_off()
+                        return False
+                    if deadline is not None:
+                        return False  # Rejected write: leave sorting it out to the worker
+                    # One rejected write fails the whole multi-path update:
+                    # land the rest and dead-letter only what is refused again
+                    written, error = self._write_one_by_one(batch)
+                    self._remove(written)
+                    if error is not None:
+                        self._back_off()
+                        return False
+                else:
+                    self._remove(batch)
+
+                self._failed_flushes = 0
+                self._retry_at = 0.0
+                if deadline is not None and time.monotonic() >= deadline:
+                    return self.pending_count() == 0
+        finally:
+            self._flush_lock.release()
+
+    def discard(self, prefix: str, timeout: float = WRITE_BUFFER_REQUEST_FLUSH_TIMEOUT) -> bool:
+        """
+        Drop queued writes under `prefix`, before that subtree is reset.
+        Waits (up to `timeout`) for a batch that is already being written,
+        so none of its writes can land after the reset. Returns False if
+        that wait timed out.
+        """
+        prefix = prefix.strip('/') + '/'
+        settled = self._flush_lock.acquire(timeout=timeout)
+        try:
+            with self._lock:
+                self._pending = [(path, value) for path, value in self._pending
+                                 if not path.strip('/').startswith(prefix)]
+        finally:
+            if settled:
+                self._flush_lock.release()
+        return settled
+
+    def _remove(self, batch: List[Tuple[str, Any]]) -> None:
+        # By identity, not position: discard() may have dropped other writes
+        # while this batch was being written
+        written = {id(item) for item in batch}
+        with self._lock:
+            self._pending = [item for item in self._pending if id(item) not in written]
+
+    @staticmethod
+    def _merge(batch: List[Tuple[str, Any]]) -> Dict[str, Any]:
+        # Later writes to the same path win, same as issuing them in order.
+        # Increments are summed and sent as a server-side increment.
+        updates: Dict[str, Any] = {}
+        for path, value in batch:
+            if isinstance(value, Increment):
+                previous = updates.get(path)
+                if isinstance(previous, dict) and '.sv' in previous:
+                    previous['.sv']['increment'] += value.amount
+                else:
+                    updates[path] = {'.sv': {'increment': value.amount}}
+            else:
+                updates[path] = value
+        return updates
+
+    def _back_off(self) -> None:
+        self._failed_flushes += 1
+        delay = min(self.flush_interval * (2 ** self._failed_flushes), self.max_backoff)
+        self._retry_at = time.monotonic() + delay
+
+    def _write_batch(self, batch: List[Tuple[str, Any]],
+                     deadline: Optional[float] = None) -> Optional[Exception]:
+        """Write a batch as one update. Returns None on success, else the last error."""
+        updates = self._merge(batch)
+        error = None
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                db.reference('/').update(updates)
+                return None
+            except Exception as e:
+                error = e
+                print(f"ERROR flushing {len(updates)} writes (attempt {attempt + 1}): {e}")
+                if not is_retryable(e):
+                    break
+                if attempt < self.max_retries:
+                    delay = self.retry_backoff * (2 ** attempt)
+                    if deadline is not None and time.monotonic() + delay > deadline:
+                        break  # Leave the retries to the background worker
+                    time.sleep(delay)
+
+        return error
+
+    def _write_one_by_one(self, batch: List[Tuple[str, Any]]) -> Tuple[List[Tuple[str, Any]], Optional[Exception]]:
+        """
+        Write a batch one path at a time, dead-lettering rejected writes.
+        Returns the writes that are settled (written or dead-lettered), and
+        the error that stopped it early if the database became unreachable.
+        """
+        items_by_path: Dict[str, List[Tuple[str, Any]]] = {}
+        for item in batch:
+            items_by_path.setdefault(item[0], []).append(item)
+
+        settled: List[Tuple[str, Any]] = []
+        for path, value in self._merge(batch).items():
+            try:
+                db.reference('/').update({path: value})
+            except Exception as e:
+                if is_retryable(e):
+                    return settled, e
+                self._dead_letter(path, value, e)
+            settled.extend(items_by_path[path])
+        return settled, None
+
+    def _dead_letter(self, path: str, value: Any, error: Exception) -> None:
+        self.dead_lettered += 1
+        print(f"ERROR dead-lettering write to {path}: {error}")
+        record = {
+            'time': time.time(), 'path': path,
+            # Encoded, since the value itself may be what the database refuses
+            'value': json.dumps(value, default=str), 'error': str(error),
+        }
+        try:
+            # The database answered (it refused the write), so it can usually
+            # keep the record - unlike the local disk on a hosted app
+            db.reference(self.dead_letter_node).push(record)
+            return
+        except Exception as e:
+            print(f"ERROR storing dead letter for {path}: {e}")
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.dead_letter_path)), exist_ok=True)
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError as e:
+            print(f"ERROR writing dead letter for {path}: {e}")
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(max(self.flush_interval, self._retry_at - time.monotonic()))
+            self._wakeup.clear()
+            if time.monotonic() < self._retry_at:
+                continue  # Woken by a full queue while backing off
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"ERROR in write-behind worker: {e}")
+
+
+def replay_dead_letters(node: str = WRITE_BUFFER_DEAD_LETTER_NODE,
+                        path: str = WRITE_BUFFER_DEAD_LETTER_PATH) -> Tuple[int, int]:
+    """
+    Retry dead-lettered writes, once whatever rejected them (rules, data)
+    is fixed. Writes that go through are removed from the node / file.
+    Returns (replayed, still_failing).
+    """
+    replayed = failed = 0
+
+    def write(record) -> bool:
+        nonlocal replayed, failed
+        try:
+            db.reference('/').update({record['path']: json.loads(record['value'])})
+            replayed += 1
+            return True
+        except Exception as e:
+            print(f"ERROR replaying write to {record['path']}: {e}")
+            failed += 1
+            return False
+
+    ref = db.reference(node)
+    for key, record in (ref.get() or {}).items():
+        if write(record):
+            ref.child(key).delete()
+
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            remaining = [line for line in f if line.strip() and not write(json.loads(line))]
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(remaining)
+
+    return replayed, failed
+
+
+@st.cache_resource(show_spinner=False)
+def get_write_buffer() -> WriteBehindBuffer:
+    """Process-wide write-behind buffer, shared by all sessions."""
+    return WriteBehindBuffer()
@@ -3,7 +3,7 @@
 import streamlit as st
 from firebase_admin import db
 
-from utils.database import get_all_users
+from utils.study_stats import render_study_stats_header
 from utils.config import SESSIONS
 from utils.auth import logout_user
 
@@ -135,16 +135,10 @@ def render_admin_dashboard():
         st.write("---")
 
         st.write("**User Management**")
-        users = get_all_users()
+        stats = render_study_stats_header("admin_dashboard")
 
-        total_users = len([u for u in users.values() if not u.get("is_admin", False)])
-        condition_counts = {1: 0, 2: 0, 3: 0}
-
-        for user_data in users.values():
-            if not user_data.get("is_admin", False):
-                condition = user_data.get("condition", 0)
-                if condition in condition_counts:
-                    condition_counts[condition] += 1
+        total_users = stats["total_students"]
+        condition_counts = stats["student_condition_counts"]
 
         col1, col2, col3, col4 = st.columns(4)
         with col1:
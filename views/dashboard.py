@@ -11,15 +11,13 @@ from utils.config import (
 from utils.auth import logout_user, get_user_data
 from utils.database import (
     save_session_start, save_message,
-    get_session_status, get_next_session
+    get_session_statuses, get_session_status, get_next_session
 )
 
 from content.research_topics import get_research_topic
 
-from client.ai_client import SimpleAIClient
-import tutor_flow.flow_manager
-# Lazy import to avoid circular dependency
-# from tutor_flow.handlers import generate_initial_message
+# Lazy imports: the AI client (OpenAI SDK) and tutor_flow are only needed
+# once a session starts, see start_session()
 
 from characters import get_all_character_names, get_character
 
@@ -35,6 +33,14 @@ def render_dashboard():
 
     st.session_state.condition = condition
 
+    # The first dashboard render in this process builds the opening pool,
+    # which starts pre-generating every topic's openings in the background
+    try:
+        from tutor_flow.opening_pool import get_opening_pool
+        get_opening_pool()
+    except Exception as e:
+        print(f"ERROR starting opening pool: {e}")
+
     # Study info
     # with st.expander("ℹ️ About This Study"):
     #     st.write(STUDY_INFO["description"])
@@ -43,8 +49,11 @@ def render_dashboard():
 
     st.write("---")
 
+    # One small read of the status index serves every check below
+    statuses = get_session_statuses(st.session_state.user_id)
+
     # Next session
-    next_session = get_next_session(st.session_state.user_id)
+    next_session = get_next_session(st.session_state.user_id, statuses)
 
     if next_session is None:
         st.success("🎉 You've completed both sessions!")
@@ -63,7 +72,7 @@ def render_dashboard():
     for session_key in ["session_1", "session_2"]:
         session_config = SESSIONS[session_key]
         session_id = session_config["id"]
-        status = get_session_status(st.session_state.user_id, session_id)
+        status = get_session_status(st.session_state.user_id, session_id, statuses)
 
         # Availability - time-based check
         start_date = datetime.strptime(session_config["start_date"], '%Y-%m-%d')
@@ -73,7 +82,8 @@ def render_dashboard():
             required = session_config["requires_completion"]
             required_status = get_session_status(
                 st.session_state.user_id,
-                SESSIONS["session_1"]["id"],
+                SESSIONS[required]["id"],
+                statuses,
             )
             if required_status != "completed":
                 is_available = False
@@ -142,12 +152,15 @@ def render_character_selection():
 
 def start_session(session_id: str):
     """Initialize a learning session."""
+    from client.ai_client import SimpleAIClient
+    from tutor_flow.flow_manager import TutorFlow
     from tutor_flow.handlers import generate_initial_message
+    from tutor_flow.opening_pool import get_opening_pool
     
     topic = get_research_topic(session_id)
     condition = st.session_state.condition
 
-    # Initialize AI client
+    # Handle onto the shared, connection-pooled AI client
     st.session_state.ai_client = SimpleAIClient()
     st.session_state.current_session_id = session_id
 
@@ -156,7 +169,13 @@ def start_session(session_id: str):
 
     # Initialize based on condition
     if condition in [1, 2]:  # Scaffolded
-        st.session_state.flow = tutor_flow.flow_manager.TutorFlow(
+        # Top this topic's opening pools back up (first filled at startup)
+        try:
+            get_opening_pool().warm(topic)
+        except Exception as e:
+            print(f"ERROR warming opening pool: {e}")
+
+        st.session_state.flow = TutorFlow(
             topic.name, "Tutor"
         )
 
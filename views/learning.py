@@ -2,18 +2,22 @@
 """
 Learning session view.
 UPDATED: Auto-generates initial message when session starts.
+The chat runs in a fragment, so sending a message doesn't rerun the page.
+The timer counts down in the browser; see views/session_timer.py.
 """
 
 import time
 import streamlit as st
 
-from utils.config import SESSION_DURATION
+from utils.config import STREAM_RESPONSES, SHOW_DEBUG_INFO
 from content.research_topics import get_research_topic
 from tutor_flow.handlers import (
     generate_initial_message,
     handle_user_message_scaffolded,
     handle_user_message_direct,
+    expire_session,
 )
+from views.session_timer import time_remaining, render_countdown, schedule_expiry
 
 
 def render_learning_session():
@@ -43,16 +47,13 @@ def render_learning_session():
     # -------------------------
     st.title(f"Learning: {topic.name}")
 
-    elapsed = time.time() - st.session_state.start_time
-    remaining = max(0, SESSION_DURATION - elapsed)
-    mins = int(remaining // 60)
-    secs = int(remaining % 60)
+    remaining = time_remaining()
 
     col1, col2 = st.columns([3, 1])
     with col1:
         st.write(f"**Topic:** {topic.name} ({topic.difficulty})")
     with col2:
-        st.metric("Time Left", f"{mins}:{secs:02d}")
+        render_countdown(remaining)
 
     # -------------------------
     # Progress Indicator (Scaffolded Conditions Only)
@@ -89,10 +90,13 @@ def render_learning_session():
     # -------------------------
     # Time up → move to quiz
     # -------------------------
-    if elapsed >= SESSION_DURATION:
+    if remaining <= 0:
         st.session_state.phase = "quiz"
         st.rerun()
 
+    # Ends the session at the deadline even if the student goes quiet
+    schedule_expiry(remaining, lambda: expire_session(condition))
+
     # =========================================================
     # AUTO-GENERATE INITIAL MESSAGE (if not already done)
     # This ensures the AI speaks first without user prompting
@@ -131,36 +135,120 @@ def render_learning_session():
     # -------------------------
     # Chat display
     # -------------------------
+    _count_run("app")
+
     top_content = st.container()
     with top_content:
         st.title(f"**Topic:** {topic.name}")
         st.write(f"Let's learn about {topic.name} together!")
         st.write("---")
 
-    chat_history_container = st.container()
+    # History so far is drawn once per full run; the fragment below only
+    # draws what arrives after it
+    messages = _chat_messages(condition)
+    for role, content in messages:
+        with st.chat_message(role):
+            st.markdown(content)
+    st.session_state.chat_rendered_upto = len(messages)
+    st.session_state.chat_full_run = True
 
-    # Create a container for the Input (This "pins" it to the end of the history)
-    input_container = st.container()
+    _chat_fragment(condition)
 
-    with input_container:
-        user_input = st.chat_input("Type your response...")
 
-    # Render History INTO the history container
-    with chat_history_container:
-        if condition in [1, 2]:
-            for msg in st.session_state.flow.messages:
-                with st.chat_message(msg.role):
-                    st.markdown(msg.content)
-        else:
-            for msg in st.session_state.messages:
-                with st.chat_message(msg["role"]):
-                    st.markdown(msg["content"])
+def _chat_messages(condition, start=0):
+    """(role, content) for the session's messages from `start` on."""
+    if condition in [1, 2]:
+        return [(m.role, m.content) for m in st.session_state.flow.messages[start:]]
+    return [(m["role"], m["content"]) for m in st.session_state.messages[start:]]
+
+
+def _render_chat_tail(condition):
+    """
+    New messages plus the chat input. Submitting a message reruns only this
+    part; the page header is left alone unless the step changes.
+    """
+    if not st.session_state.pop("chat_full_run", False):
+        _count_run("fragment")
+
+    stats_slot = st.empty()
+    tail_container = st.container()
+    user_input = st.chat_input("Type your response...")
 
-    # Logic Handling
     if user_input:
-        with st.spinner("Thinking..."):
-            if condition in [1, 2]:
-                handle_user_message_scaffolded(user_input)
-            else:
-                handle_user_message_direct(user_input)
-        st.rerun()
\ No newline at end of file
+        st.session_state.turn_reruns = 1  # This run
+    if SHOW_DEBUG_INFO or st.session_state.get("is_admin_test", False):
+        stats = get_rerun_stats()
+        stats_slot.caption(
+            f"Reruns — page: {stats['app_reruns']}, chat: {stats['fragment_reruns']}, "
+            f"this turn: {stats['turn_reruns']}"
+        )
+
+    with tail_container:
+        # Messages added since the last full run (earlier fragment turns)
+        for role, content in _chat_messages(condition, st.session_state.get("chat_rendered_upto", 0)):
+            with st.chat_message(role):
+                st.markdown(content)
+
+        if not user_input:
+            return
+
+        step_before = st.session_state.flow.current_step if condition in [1, 2] else None
+        shown_before = len(_chat_messages(condition))
+        st.session_state.reply_rendered = False
+
+        # Echo the student's turn right away; the reply streams in below it
+        with st.chat_message("user"):
+            st.markdown(user_input)
+
+        if STREAM_RESPONSES:
+            _handle_user_input(condition, user_input)
+        else:
+            with st.spinner("Thinking..."):
+                _handle_user_input(condition, user_input)
+
+        # Draw whatever the handler added and didn't already show, instead of
+        # rerunning to pick it up
+        new_messages = _chat_messages(condition, shown_before + 1)
+        if st.session_state.pop("reply_rendered", False):
+            new_messages = new_messages[:-1]
+        for role, content in new_messages:
+            with st.chat_message(role):
+                st.markdown(content)
+
+    # A new step changes the progress bar above the fragment
+    if condition in [1, 2] and st.session_state.flow.current_step != step_before:
+        st.rerun()
+
+
+# Partial reruns need st.fragment (Streamlit 1.37+, experimental_fragment
+# from 1.33). On older versions the chat is part of the page run as before.
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+_chat_fragment = _fragment(_render_chat_tail) if _fragment else _render_chat_tail
+
+
+def _count_run(kind):
+    """Count script runs: 'app' for the whole page, 'fragment' for the chat only."""
+    key = f"{kind}_reruns"
+    st.session_state[key] = st.session_state.get(key, 0) + 1
+    st.session_state.turn_reruns = st.session_state.get("turn_reruns", 0) + 1
+
+
+def get_rerun_stats():
+    """
+    Run counts for the learning view. turn_reruns counts the runs since the
+    student's last message, including the one that handled it - 1 unless
+    the turn moved to a new step (2) or ended the session.
+    """
+    return {
+        "app_reruns": st.session_state.get("app_reruns", 0),
+        "fragment_reruns": st.session_state.get("fragment_reruns", 0),
+        "turn_reruns": st.session_state.get("turn_reruns", 0),
+    }
+
+
+def _handle_user_input(condition, user_input):
+    """Dispatch the student's message to the handler for their condition."""
+    if condition in [1, 2]:
+        handle_user_message_scaffolded(user_input)
+    else:
+        handle_user_message_direct(user_input)
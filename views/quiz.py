@@ -28,56 +28,62 @@ def render_quiz():
     # ---------------------------------------------------------
     if not st.session_state.quiz_submitted:
 
-        for i, q in enumerate(quiz_questions):
-            st.subheader(f"Question {i + 1}")
-            st.write(q.question)
-
-            answer = st.radio(
-                "Select your answer:",
-                options=q.options,
-                key=f"quiz_q_{i}",
-                index=None,
-            )
+        # One form, one rerun on submit - picking an answer doesn't rerun the page
+        with st.form("quiz_form"):
+            answers = {}
+            for i, q in enumerate(quiz_questions):
+                st.subheader(f"Question {i + 1}")
+                st.write(q.question)
 
-            if answer:
-                st.session_state.quiz_answers[i] = answer
+                # Answers from an earlier, incomplete submit are preselected
+                saved = st.session_state.quiz_answers.get(i)
+                answer = st.radio(
+                    "Select your answer:",
+                    options=q.options,
+                    key=f"quiz_q_{i}",
+                    index=q.options.index(saved) if saved in q.options else None,
+                )
 
-            st.write("")
+                if answer:
+                    answers[i] = answer
 
-        # Check if all answered
-        all_answered = len(st.session_state.quiz_answers) == len(quiz_questions)
+                st.write("")
 
-        if st.button("Submit Quiz", type="primary", disabled=not all_answered):
-            # Score quiz - now returns results with difficulty
-            score, total, results = score_quiz(
-                session_id, st.session_state.quiz_answers
-            )
+            submitted = st.form_submit_button("Submit Quiz", type="primary")
 
-            # Save with results (includes difficulty tracking)
-            save_quiz_responses(
-                st.session_state.user_id,
-                session_id,
-                st.session_state.quiz_answers,
-                score,
-                total,
-                results  # ✅ NEW: Pass results to save difficulty data
-            )
+        if not submitted:
+            return
 
-            # Store results
-            st.session_state.quiz_submitted = True
-            st.session_state.quiz_score = score
-            st.session_state.quiz_total = total
-            st.session_state.quiz_results = results
+        st.session_state.quiz_answers = answers
 
-            st.rerun()
-
-        if not all_answered:
+        # Check if all answered
+        if len(answers) < len(quiz_questions):
             st.info(
                 f"Please answer all questions "
-                f"({len(st.session_state.quiz_answers)}/{len(quiz_questions)} complete)"
+                f"({len(answers)}/{len(quiz_questions)} complete)"
             )
+            return
+
+        # Score quiz - now returns results with difficulty
+        score, total, results = score_quiz(session_id, answers)
+
+        # Save with results (includes difficulty tracking)
+        save_quiz_responses(
+            st.session_state.user_id,
+            session_id,
+            answers,
+            score,
+            total,
+            results  # ✅ NEW: Pass results to save difficulty data
+        )
+
+        # Store results
+        st.session_state.quiz_submitted = True
+        st.session_state.quiz_score = score
+        st.session_state.quiz_total = total
+        st.session_state.quiz_results = results
 
-        return
+        st.rerun()
 
     # ---------------------------------------------------------
     # QUIZ SUBMITTED — SHOW RESULTS
@@ -0,0 +1,84 @@
+# views/session_timer.py
+"""
+Learning session timer.
+The countdown ticks in the browser, and a one-shot fragment ends the session
+when time runs out, so nothing has to rerun the page every second.
+"""
+
+import math
+import time
+import streamlit as st
+import streamlit.components.v1 as components
+
+from utils.config import SESSION_DURATION
+
+COUNTDOWN_HEIGHT = 90  # px, fits the label and value in an st.metric-sized box
+EXPIRY_SLACK = 1  # Seconds early the expiry timer may fire and still end the session
+
+# Styled like st.metric. The deadline is taken from the browser's own clock
+# (now + seconds left), so server/client clock skew doesn't matter.
+_COUNTDOWN_HTML = """
+<div style="font-family: 'Source Sans Pro', sans-serif; color: rgb(49, 51, 63);">
+  <div style="font-size: 14px; color: rgba(49, 51, 63, 0.6);">Time Left</div>
+  <div id="countdown" style="font-size: 2.25rem; line-height: 1.4;">__TEXT__</div>
+</div>
+<script>
+  const deadline = Date.now() + __REMAINING_MS__;
+  const el = document.getElementById("countdown");
+  function tick() {
+    const left = Math.max(0, Math.ceil((deadline - Date.now()) / 1000));
+    el.textContent = Math.floor(left / 60) + ":" + String(left % 60).padStart(2, "0");
+    if (left > 0) {
+      // Wake on the next whole second of the remaining time
+      setTimeout(tick, ((deadline - Date.now()) % 1000) || 1000);
+    }
+  }
+  tick();
+</script>
+"""
+
+
+def time_remaining():
+    """Seconds left in the learning session (0 when time is up)."""
+    return max(0, SESSION_DURATION - (time.time() - st.session_state.start_time))
+
+
+def format_time(seconds):
+    """m:ss, rounding up like the browser countdown."""
+    seconds = math.ceil(seconds)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def render_countdown(remaining):
+    """Countdown that keeps ticking in the browser between reruns."""
+    html = (
+        _COUNTDOWN_HTML
+        .replace("__TEXT__", format_time(remaining))
+        .replace("__REMAINING_MS__", str(int(remaining * 1000)))
+    )
+    components.html(html, height=COUNTDOWN_HEIGHT)
+
+
+def schedule_expiry(remaining, on_expire):
+    """
+    Call on_expire() once the session time runs out, even if the student
+    never sends another message.
+
+    Uses a fragment with run_every set to the time left: Streamlit runs it
+    on the server when the timer fires, without a page rerun in between.
+    On versions without fragments, expiry is still caught by the time check
+    on the next page run or message.
+    """
+    fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+    if fragment is None:
+        return
+
+    # Redefined on every page run so run_every tracks the time left
+    @fragment(run_every=max(remaining, 1))
+    def _expiry_check():
+        # Also runs inline with the page - only act once time is up. The
+        # browser timer can fire a little early, hence the slack.
+        if time_remaining() <= EXPIRY_SLACK:
+            on_expire()
+
+    _expiry_check()
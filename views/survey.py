@@ -16,8 +16,19 @@ def render_survey_page():
 
     # ---------------------------------------------------------
     # Render survey questions (UI comes from content/survey.py)
+    # in one form: answers are sent together on submit
     # ---------------------------------------------------------
-    responses = render_survey(topic.name, condition)
+    with st.form("survey_form"):
+        responses = render_survey(
+            topic.name, condition, st.session_state.get("survey_responses")
+        )
+        st.write("---")
+        submitted = st.form_submit_button("Submit Survey", type="primary")
+
+    if not submitted:
+        return
+
+    # Kept so a partial submit comes back prefilled
     st.session_state.survey_responses = responses
 
     # ---------------------------------------------------------
@@ -25,34 +36,25 @@ def render_survey_page():
     # ---------------------------------------------------------
     is_complete, missing = validate_survey_complete(responses)
 
-    st.write("---")
-
-    # ---------------------------------------------------------
-    # Submit button
-    # ---------------------------------------------------------
-    if st.button("Submit Survey", type="primary", disabled=not is_complete):
-
-        # Save unless admin test
-        if not st.session_state.get("is_admin_test", False):
-            save_survey_responses(
-                st.session_state.user_id,
-                session_id,
-                responses
-            )
-            complete_session(
-                st.session_state.user_id,
-                session_id
-            )
-
-        # Move to completion screen
-        st.session_state.phase = "complete"
-        st.rerun()
-
-    # ---------------------------------------------------------
-    # Warning if incomplete
-    # ---------------------------------------------------------
     if not is_complete:
         st.warning(
             f"Please answer all required questions "
             f"({missing} remaining)"
-        )
\ No newline at end of file
+        )
+        return
+
+    # Save unless admin test
+    if not st.session_state.get("is_admin_test", False):
+        save_survey_responses(
+            st.session_state.user_id,
+            session_id,
+            responses
+        )
+        complete_session(
+            st.session_state.user_id,
+            session_id
+        )
+
+    # Move to completion screen
+    st.session_state.phase = "complete"
+    st.rerun()